@@ -8,24 +8,42 @@ from core.models import (
     Comment,
     Log,
     Note,
+    NoteTag,
     NotificationAck,
     PrivateNote,
     Project,
     ProjectAccess,
+    ProjectTag,
     Reminder,
     Task,
     TaskAccess,
+    TaskTag,
     TaskWorkSession,
 )
+from core.utils.hashtags import parse_tags
+from core.utils.task_search import search_tasks
+
+
+def filter_by_tags(queryset, link_model, value):
+    """Items having every tag of `value`, each tag is one lookup in the (tag, item) index of `link_model`"""
+    for name in parse_tags(value):
+        tagged = link_model.objects.filter(tag__name=name).values(link_model.ITEM)
+        queryset = queryset.filter(id__in=tagged)
+
+    return queryset
 
 
 class ProjectFilter(filters.FilterSet):
     title = django_filters.CharFilter(lookup_expr="icontains")
     show_closed = django_filters.BooleanFilter(field_name="is_closed")
+    tag = filters.CharFilter(method="filter_by_tag")
 
     class Meta:
         model = Project
-        fields = ["title", "show_closed"]
+        fields = ["title", "show_closed", "tag"]
+
+    def filter_by_tag(self, queryset, name, value):
+        return filter_by_tags(queryset, ProjectTag, value)
 
 
 class TaskFilter(filters.FilterSet):
@@ -33,6 +51,7 @@ class TaskFilter(filters.FilterSet):
     project__title = django_filters.CharFilter(lookup_expr="icontains")
     created_at = filters.DateFromToRangeFilter()
     query = filters.CharFilter(method="filter_by_all_fields")
+    tag = filters.CharFilter(method="filter_by_tag")
 
     class Meta:
         model = Task
@@ -53,12 +72,11 @@ class TaskFilter(filters.FilterSet):
         ]
 
     def filter_by_all_fields(self, queryset, name, value):
-        return queryset.filter(
-            Q(title__icontains=value)
-            | Q(description__icontains=value)
-            | Q(tag__icontains=value)
-            | Q(blocks__content__icontains=value)  # content JSONField
-        )
+        # title, tag, description and block text through the full-text index, best matches first
+        return search_tasks(queryset, value)
+
+    def filter_by_tag(self, queryset, name, value):
+        return filter_by_tags(queryset, TaskTag, value)
 
 
 class ReminderFilter(filters.FilterSet):
@@ -77,10 +95,12 @@ class NotificationAckFilter(filters.FilterSet):
 
 class LogFilter(filters.FilterSet):
     message = django_filters.CharFilter(lookup_expr="icontains")
+    event_type = django_filters.MultipleChoiceFilter(choices=Log.EventType.choices)
+    created_at = django_filters.DateFromToRangeFilter()
 
     class Meta:
         model = Log
-        fields = ["message", "project", "task"]
+        fields = ["message", "project", "task", "event_type"]
 
 
 class CommentFilter(filters.FilterSet):
@@ -91,14 +111,18 @@ class CommentFilter(filters.FilterSet):
 
 class NoteFilter(filters.FilterSet):
     search = filters.CharFilter(method="filter_by_all_fields")
+    tag = filters.CharFilter(method="filter_by_tag")
 
     class Meta:
         model = Note
-        fields = ["user"]
+        fields = ["user", "tag"]
 
     def filter_by_all_fields(self, queryset, name, value):
         return queryset.filter(Q(title__icontains=value) | Q(content__icontains=value))
 
+    def filter_by_tag(self, queryset, name, value):
+        return filter_by_tags(queryset, NoteTag, value)
+
 
 class PrivateNoteFilter(filters.FilterSet):
     class Meta:
@@ -118,6 +142,16 @@ class TaskSessionFilter(filters.FilterSet):
         fields = ["task", "user"]
 
 
+class TimesheetFilter(filters.FilterSet):
+    start_date = filters.DateFilter(field_name="started_at", lookup_expr="date__gte")
+    end_date = filters.DateFilter(field_name="started_at", lookup_expr="date__lte")
+    project = filters.UUIDFilter(field_name="task__project")
+
+    class Meta:
+        model = TaskWorkSession
+        fields = ["task", "user"]
+
+
 class ProjectAccessFilter(filters.FilterSet):
     class Meta:
         model = ProjectAccess
@@ -1,7 +1,14 @@
+import base64
+import binascii
 import math
+import uuid
 
-from rest_framework.pagination import PageNumberPagination
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class CustomPagination(PageNumberPagination):
@@ -30,3 +37,106 @@ class CustomPagination(PageNumberPagination):
 
 class CustomPaginationPageSize1k(CustomPagination):
     page_size = 1000
+
+
+class LogCursorPagination(BasePagination):
+    """
+    Keyset pagination over (-created_at, -id) for (partitioned) logs.
+    Views apply `cursor_filter` themselves so the bound reaches every partition before they are merged.
+    """
+
+    page_size = 20
+    max_page_size = 500
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+
+    @classmethod
+    def decode_cursor(cls, request):
+        encoded = request.query_params.get(cls.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            created_at, pk = base64.urlsafe_b64decode(encoded.encode()).decode().split("|")
+            position = (parse_datetime(created_at), uuid.UUID(pk))
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound("Invalid cursor")
+
+        if position[0] is None:
+            raise NotFound("Invalid cursor")
+
+        return position
+
+    @staticmethod
+    def encode_cursor(log):
+        return base64.urlsafe_b64encode(f"{log.created_at.isoformat()}|{log.id}".encode()).decode()
+
+    @staticmethod
+    def cursor_filter(position):
+        created_at, pk = position
+        return Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+
+        return max(1, min(page_size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        items = list(queryset[: page_size + 1])
+        self.has_next = len(items) > page_size
+        self.page = items[:page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        next_link = None
+        if self.has_next:
+            next_link = replace_query_param(
+                self.request.build_absolute_uri(),
+                self.cursor_query_param,
+                self.encode_cursor(self.page[-1]),
+            )
+
+        return Response({"next": next_link, "results": data})
+
+
+class PositionCursorPagination(LogCursorPagination):
+    """
+    Keyset pagination over (position, id), for card items loaded a page at a time as a column is scrolled.
+    Unlike logs the cursor is applied here, the queryset has to be ordered by ("position", "id").
+    """
+
+    page_size = 50
+
+    @classmethod
+    def decode_cursor(cls, request):
+        encoded = request.query_params.get(cls.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            position, pk = base64.urlsafe_b64decode(encoded.encode()).decode().split("|")
+            return int(position), uuid.UUID(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound("Invalid cursor")
+
+    @staticmethod
+    def encode_cursor(item):
+        return base64.urlsafe_b64encode(f"{item.position}|{item.id}".encode()).decode()
+
+    @staticmethod
+    def cursor_filter(position):
+        item_position, pk = position
+        return Q(position__gt=item_position) | Q(position=item_position, id__gt=pk)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        position = self.decode_cursor(request)
+        if position:
+            queryset = queryset.filter(self.cursor_filter(position))
+
+        return super().paginate_queryset(queryset, request, view)
@@ -1,3 +1,7 @@
+import zoneinfo
+from decimal import Decimal
+
+from django.conf import settings
 from django.db.models import Q, Sum
 from rest_framework import serializers
 
@@ -17,16 +21,24 @@ from core.models import (
     Project,
     ProjectAccess,
     Reminder,
+    Tag,
     Task,
     TaskAccess,
     TaskBlock,
+    TaskBlockRevision,
     TaskChecklistItem,
     TaskWorkSession,
     User,
     UserTaskQueue,
 )
-from core.utils.permissions import user_can_see_project, user_can_see_task
+from core.utils.permissions import (
+    user_can_see_project,
+    user_can_see_task,
+    visible_project_ids,
+    visible_task_ids,
+)
 from core.utils.time_from_seconds import time_from_seconds
+from core.utils.work_breakdown import MAX_DAYS
 
 masked_string = "*" * 5
 
@@ -97,6 +109,11 @@ class ProjectDetailReadOnlySerializer(serializers.ModelSerializer):
     def get_title(self, instance):
         request = self.context.get("request")
         if request:
+            # resolved for all projects at once when serializing a board
+            visible_project_ids = self.context.get("visible_project_ids")
+            if visible_project_ids is not None:
+                return instance.title if instance.id in visible_project_ids else masked_string
+
             user = request.user
             if user_can_see_project(user, instance):
                 return instance.title
@@ -120,14 +137,57 @@ class TaskListSerializer(serializers.ModelSerializer):
             "progress",
             "description",
             "project",
-            "position",
+            "rank",
             "responsible",
             "urgency_level",
-            "position",
             "estimated_work_hours",
             "is_urgent",
             "follow_up",
         )
+        read_only_fields = ("rank",)
+
+
+class TaskSubtreeSerializer(serializers.ModelSerializer):
+    """Node of core.utils.task_tree.load_subtree, titles of tasks the user can't see are masked"""
+
+    title = serializers.SerializerMethodField()
+    depth = serializers.IntegerField()
+    logged_seconds = serializers.IntegerField()
+    rollup_progress = serializers.SerializerMethodField()
+    rollup_estimated_work_hours = serializers.SerializerMethodField()
+    rollup_logged_seconds = serializers.IntegerField()
+    is_visible = serializers.BooleanField()
+    has_more_children = serializers.BooleanField()
+
+    class Meta:
+        model = Task
+        fields = (
+            "id",
+            "parent_task",
+            "depth",
+            "title",
+            "status",
+            "is_closed",
+            "progress",
+            "estimated_work_hours",
+            "logged_seconds",
+            "rollup_progress",
+            "rollup_estimated_work_hours",
+            "rollup_logged_seconds",
+            "is_visible",
+            "has_more_children",
+        )
+
+    def get_title(self, instance):
+        return instance.title if instance.is_visible else masked_string
+
+    def get_rollup_progress(self, instance):
+        return round(float(instance.rollup_progress))
+
+    def get_rollup_estimated_work_hours(self, instance):
+        if instance.rollup_estimated_work_hours is None:
+            return None
+        return f"{Decimal(str(instance.rollup_estimated_work_hours)):.1f}"
 
 
 class TaskReadOnlySerializer(serializers.ModelSerializer):
@@ -150,12 +210,11 @@ class TaskReadOnlySerializer(serializers.ModelSerializer):
             "progress",
             "description",
             "project",
-            "position",
+            "rank",
             "responsible",
             "owner",
             "is_closed",
             "urgency_level",
-            "position",
             "estimated_work_hours",
             "is_urgent",
             "follow_up",
@@ -165,6 +224,11 @@ class TaskReadOnlySerializer(serializers.ModelSerializer):
     def get_title(self, instance):
         request = self.context.get("request")
         if request:
+            # resolved for all tasks at once when serializing a board
+            visible_task_ids = self.context.get("visible_task_ids")
+            if visible_task_ids is not None:
+                return instance.title if instance.id in visible_task_ids else masked_string
+
             user = request.user
             if user_can_see_task(user, instance):
                 return instance.title
@@ -178,6 +242,9 @@ class TaskReadOnlySerializer(serializers.ModelSerializer):
         user = getattr(request, "user", None)
 
         if request and user and instance:
+            pinned_task_ids = self.context.get("pinned_task_ids")
+            if pinned_task_ids is not None:
+                return instance.id in pinned_task_ids
             return Pin.objects.filter(Q(user=user) & Q(task=instance)).exists()
 
         return False
@@ -191,14 +258,13 @@ class TaskDetailSerializer(serializers.ModelSerializer):
             "title",
             "description",
             "tag",
-            "position",
+            "rank",
             "progress",
             "eta_date",
             "status",
             "project",
             "responsible",
             "urgency_level",
-            "position",
             "estimated_work_hours",
             "is_urgent",
             "follow_up",
@@ -206,6 +272,7 @@ class TaskDetailSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         )
+        read_only_fields = ("rank",)
 
 
 class TaskTotalTimeReadOnlySerializer(serializers.ModelSerializer):
@@ -213,13 +280,10 @@ class TaskTotalTimeReadOnlySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Task
-        fields = ("id", "total_time")
+        fields = ("id", "total_time", "logged_seconds")
 
     def get_total_time(self, instance: Task):
-        total_seconds = instance.task_work.aggregate(time_sum=Sum("total_time")).get("time_sum", 0)
-        if not total_seconds:
-            total_seconds = 0
-        hours, minutes, _ = time_from_seconds(total_seconds)
+        hours, minutes, _ = time_from_seconds(instance.logged_seconds)
         return {"hours": f"{hours:02}", "minutes": f"{minutes:02}"}
 
 
@@ -231,11 +295,12 @@ class TaskBlockListSerializer(serializers.ModelSerializer):
             "block_type",
             "position",
             "content",
+            "version",
             "created_at",
             "updated_at",
             "created_by",
         )
-        read_only_fields = ("created_by",)
+        read_only_fields = ("created_by", "version")
 
 
 class TaskBlockWebsocketSerializer(TaskBlockListSerializer):
@@ -264,6 +329,35 @@ class TaskBlockUpdateSerializer(serializers.ModelSerializer):
         )
 
 
+class TaskBlockOperationSerializer(serializers.ModelSerializer):
+    """Block fields of a batch operation, the task is common for the whole batch"""
+
+    class Meta:
+        model = TaskBlock
+        fields = (
+            "block_type",
+            "position",
+            "content",
+        )
+
+
+class TaskBlockRevisionSerializer(serializers.ModelSerializer):
+    user = UserSerializer()
+
+    class Meta:
+        model = TaskBlockRevision
+        fields = (
+            "id",
+            "number",
+            "version",
+            "block_type",
+            "is_keyframe",
+            "user",
+            "created_at",
+            "updated_at",
+        )
+
+
 class LogListSerializer(serializers.ModelSerializer):
     user = UserSerializer()
     task = TaskReadOnlySerializer()
@@ -271,7 +365,7 @@ class LogListSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Log
-        fields = ("id", "message", "created_at", "user", "task", "project")
+        fields = ("id", "message", "event_type", "payload", "created_at", "user", "task", "project")
 
 
 class CommentListSerializer(serializers.ModelSerializer):
@@ -296,6 +390,12 @@ class CommentDetailSerializer(serializers.ModelSerializer):
         fields = ("id", "content", "task_id", "project_id")
 
 
+class TagCountSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Tag
+        fields = ("id", "name", "task_count", "project_count", "note_count")
+
+
 class NoteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Note
@@ -334,6 +434,18 @@ class TaskSessionDetailSerializer(serializers.ModelSerializer):
             "task",
         )
 
+    def validate(self, data):
+        instance = self.instance
+        user = data.get("user", instance and instance.user)
+        stopped_at = data["stopped_at"] if "stopped_at" in data else instance and instance.stopped_at
+        if user and stopped_at is None:
+            open_sessions = TaskWorkSession.objects.filter(user=user, stopped_at__isnull=True)
+            if instance:
+                open_sessions = open_sessions.exclude(pk=instance.pk)
+            if open_sessions.exists():
+                raise serializers.ValidationError({"stopped_at": "Another work session of the user is still running"})
+        return data
+
 
 class TaskSessionListSerializer(serializers.ModelSerializer):
     user = UserSerializer()
@@ -485,21 +597,54 @@ class PinDetailSerializer(serializers.ModelSerializer):
 
 
 class WorkSessionsBreakdownInputSerializer(serializers.Serializer):
-    user_id = serializers.UUIDField(required=True)
-    timezone = ...  # TODO: Details for that
+    user_id = serializers.UUIDField(required=False)
+    # several users for team reports
+    user_ids = serializers.ListField(child=serializers.UUIDField(), required=False)
+    timezone = serializers.CharField(required=False, default=settings.TIME_ZONE)
+    start_date = serializers.DateField(required=True)
+    end_date = serializers.DateField(required=True)
+
+    def validate_timezone(self, value):
+        try:
+            return zoneinfo.ZoneInfo(value)
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            raise serializers.ValidationError(f"Unknown timezone: {value}")
+
+    def validate(self, data):
+        user_ids = list(dict.fromkeys(data.get("user_ids", []) + ([data["user_id"]] if data.get("user_id") else [])))
+        if not user_ids:
+            raise serializers.ValidationError({"user_ids": "At least one user is required"})
+        if data["end_date"] < data["start_date"]:
+            raise serializers.ValidationError({"end_date": "Has to be after start_date"})
+        if (data["end_date"] - data["start_date"]).days >= MAX_DAYS:
+            raise serializers.ValidationError({"end_date": f"At most {MAX_DAYS} days can be requested"})
+
+        data["user_ids"] = user_ids
+        return data
+
+
+class ProjectHoursInputSerializer(serializers.Serializer):
     start_date = serializers.DateField(required=True)
     end_date = serializers.DateField(required=True)
 
+    def validate(self, data):
+        if data["end_date"] < data["start_date"]:
+            raise serializers.ValidationError({"end_date": "Has to be after start_date"})
+        if (data["end_date"] - data["start_date"]).days >= MAX_DAYS:
+            raise serializers.ValidationError({"end_date": f"At most {MAX_DAYS} days can be requested"})
+        return data
+
 
 class WorkSessionsWSBSerializer(serializers.ModelSerializer):
     start = serializers.DateTimeField(format="%Y-%m-%d %H:%M", source="started_at")
     end = serializers.DateTimeField(format="%Y-%m-%d %H:%M", source="stopped_at")
     title = serializers.CharField(source="task.title")
     task_id = serializers.UUIDField(source="task.id")
+    user_id = serializers.UUIDField()
 
     class Meta:
         model = TaskWorkSession
-        fields = ("start", "end", "title", "task_id", "total_time")
+        fields = ("start", "end", "title", "task_id", "user_id", "total_time")
 
 
 class BoardSerializer(serializers.ModelSerializer):
@@ -537,6 +682,26 @@ class CardItemSerializer(serializers.ModelSerializer):
         )
 
 
+class BoardLayoutCardSerializer(serializers.Serializer):
+    id = serializers.UUIDField()
+    items = serializers.ListField(child=serializers.UUIDField(), allow_empty=True)
+
+
+class BoardLayoutSerializer(serializers.Serializer):
+    """Every card of a board in the desired order, each with every one of its items in the desired order"""
+
+    cards = BoardLayoutCardSerializer(many=True)
+
+    def validate_cards(self, value):
+        card_ids = [card["id"] for card in value]
+        item_ids = [item_id for card in value for item_id in card["items"]]
+        if len(set(card_ids)) != len(card_ids):
+            raise serializers.ValidationError("Cards can be listed only once")
+        if len(set(item_ids)) != len(item_ids):
+            raise serializers.ValidationError("Items can be listed only once")
+        return value
+
+
 class CardItemReadOnlySerializer(serializers.ModelSerializer):
     task = TaskReadOnlySerializer()
     project = ProjectDetailReadOnlySerializer()
@@ -555,6 +720,25 @@ class CardItemReadOnlySerializer(serializers.ModelSerializer):
             "config",
         )
 
+    @staticmethod
+    def bulk_context(items, user):
+        """
+        Visibility and pins of the tasks and projects of `items` for the nested serializers, resolved with a few
+        queries instead of a few per item
+        """
+        tasks = [item.task for item in items if item.task]
+        projects = [item.project for item in items if item.project] + [task.project for task in tasks if task.project]
+        pinned_task_ids = set()
+        if tasks:
+            pinned = Pin.objects.filter(user=user, task__in=[task.id for task in tasks])
+            pinned_task_ids = set(pinned.values_list("task", flat=True))
+
+        return {
+            "visible_task_ids": visible_task_ids(user, tasks),
+            "visible_project_ids": visible_project_ids(user, projects),
+            "pinned_task_ids": pinned_task_ids,
+        }
+
 
 class CardReadOnlySerializer(serializers.ModelSerializer):
     card_items = CardItemReadOnlySerializer(many=True)
@@ -564,6 +748,14 @@ class CardReadOnlySerializer(serializers.ModelSerializer):
         fields = ("id", "board", "name", "position", "card_items", "config")
 
 
+class CardSummarySerializer(serializers.ModelSerializer):
+    item_count = serializers.IntegerField()
+
+    class Meta:
+        model = Card
+        fields = ("id", "board", "name", "position", "item_count", "config")
+
+
 class BoardReadonlySerializer(serializers.ModelSerializer):
     cards = CardReadOnlySerializer(many=True)
     is_pinned = serializers.SerializerMethodField()
@@ -580,3 +772,29 @@ class BoardReadonlySerializer(serializers.ModelSerializer):
             return Pin.objects.filter(Q(user=user) & Q(board=instance)).exists()
 
         return False
+
+    @staticmethod
+    def bulk_context(board, user):
+        """Visibility and pins of all items on `board` (with cards and items prefetched) for the nested serializers"""
+        items = [item for card in board.cards.all() for item in card.card_items.all()]
+        return CardItemReadOnlySerializer.bulk_context(items, user)
+
+
+class BoardSummarySerializer(serializers.ModelSerializer):
+    """Cards with their number of items, the items are loaded per card from card-items"""
+
+    cards = CardSummarySerializer(many=True)
+    is_pinned = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Board
+        fields = ("id", "name", "owner", "cards", "config", "is_pinned")
+
+    def get_is_pinned(self, instance):
+        request = self.context.get("request")
+        user = getattr(request, "user", None)
+
+        if request and user and instance:
+            return Pin.objects.filter(Q(user=user) & Q(board=instance)).exists()
+
+        return False
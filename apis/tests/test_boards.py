@@ -1,11 +1,14 @@
 import uuid
+from unittest.mock import patch
 
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 from apis.serializers import CardItemReadOnlySerializer
-from core.models import Board, BoardUser, Card, CardItem, Project, Task, User
+from core.models import Board, BoardUser, Card, CardItem, Log, Pin, Project, ProjectAccess, Task, TaskAccess, User
 
 
 class BoardTest(APITestCase):
@@ -471,6 +474,76 @@ class BoardTest(APITestCase):
         # previous 1 in old card is now 0
         self.assertEqual(self.card_item_2.position, 0)
 
+    # ---- Board Events Tests ----
+
+    @patch("core.utils.websockets.WebsocketHelper.send")
+    def test_card_move_event(self, mock_websocket_send):
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(reverse("card_move"), {"card": self.card.id, "position": 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        mock_websocket_send.assert_called_once_with(
+            channel=f"BRD_{self.board.id}",
+            event_name="card_moved",
+            data={"changed_positions": {str(self.card.id): 1, str(self.card_2.id): 0}},
+        )
+
+    @patch("core.utils.websockets.WebsocketHelper.send")
+    def test_card_item_move_event(self, mock_websocket_send):
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(
+                reverse("card_item_move"), {"item": self.card_item.id, "card": self.card_2.id, "position": 0}
+            )
+
+        data = mock_websocket_send.call_args.kwargs["data"]
+        self.assertEqual(mock_websocket_send.call_args.kwargs["event_name"], "card_item_moved")
+        self.assertEqual(data["card_item"], str(self.card_item.id))
+        self.assertEqual(
+            data["changed_positions"],
+            {
+                str(self.card.id): {str(self.card_item_2.id): 0},
+                str(self.card_2.id): {str(self.card_item.id): 0, str(self.card_item_3.id): 1},
+            },
+        )
+
+    @patch("core.utils.websockets.WebsocketHelper.send")
+    def test_card_item_events(self, mock_websocket_send):
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("card_item_create"), {"card": self.card.id, "comment": "Comment", "position": 2}
+            )
+        data = mock_websocket_send.call_args.kwargs["data"]
+        self.assertEqual(mock_websocket_send.call_args.kwargs["event_name"], "card_item_created")
+        self.assertEqual(data["card_item"]["id"], response.json()["id"])
+        self.assertEqual(data["card_item"]["comment"], "Comment")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse("card_item_detail", kwargs={"pk": self.card_item_2.id}))
+        mock_websocket_send.assert_called_with(
+            channel=f"BRD_{self.board.id}",
+            event_name="card_item_deleted",
+            data={"card_item": str(self.card_item_2.id), "card": str(self.card.id)},
+        )
+
+    @patch("core.utils.websockets.WebsocketHelper.send")
+    def test_no_event_for_rolled_back_change(self, mock_websocket_send):
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                response = self.client.put(
+                    reverse("card_detail", kwargs={"pk": self.card.id}), {"name": "Renamed", "board": self.board.id}
+                )
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                raise RuntimeError("rolled back")
+
+        self.card.refresh_from_db()
+        self.assertNotEqual(self.card.name, "Renamed")
+        self.assertEqual(callbacks, [])
+        mock_websocket_send.assert_not_called()
+
     def test_card_item_board_data_in_readonly_serializer(self):
         card_item_with_board = CardItem.objects.create(
             card=self.card,
@@ -523,10 +596,11 @@ class BoardTest(APITestCase):
 
     def test_board_log_list(self):
         self.client.force_login(user=self.user)
-        self.client.put(  # Create log
-            reverse("board_detail", kwargs={"pk": self.board.id}),
-            {"name": "Board 1 Name Updated", "owner": self.user.id},
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(  # Create log
+                reverse("board_detail", kwargs={"pk": self.board.id}),
+                {"name": "Board 1 Name Updated", "owner": self.user.id},
+            )
 
         response = self.client.get(reverse("board_log_list", kwargs={"pk": self.board.id}))
         messages = [x["message"] for x in response.json()["results"]]
@@ -545,3 +619,140 @@ class BoardTest(APITestCase):
 
     def test_user_has_board_access_method_no_access(self):
         self.assertFalse(self.board.user_has_board_access(self.user_3))
+
+    def board_detail_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("board_detail", kwargs={"pk": self.board.pk}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # leaves out queries of the session, the user and silk
+        queries = [
+            query["sql"]
+            for query in queries
+            if "silk_" not in query["sql"]
+            and not query["sql"].startswith("EXPLAIN")
+            and "SAVEPOINT" not in query["sql"]
+            and "django_session" not in query["sql"]
+            and 'FROM "core_user"' not in query["sql"].split("WHERE")[0]
+        ]
+        return response.json(), len(queries)
+
+    def test_board_detail_constant_queries(self):
+        project_2 = Project.objects.create(title="project2", owner=self.user_2)
+
+        def add_items(count):
+            for position in range(count):
+                task = Task.objects.create(owner=self.user_3, responsible=self.user_2, title="Task", project=project_2)
+                CardItem.objects.create(card=self.card_2, task=task, position=position + 1)
+                CardItem.objects.create(card=self.card, project=project_2, position=position + 2)
+                CardItem.objects.create(card=self.card, board=self.board_2, position=position + 12)
+
+        self.client.force_login(self.user)
+        add_items(1)
+        _, query_count = self.board_detail_queries()
+        add_items(10)
+        data, more_items_query_count = self.board_detail_queries()
+
+        # board, cards, items, pins of tasks, task access, project access of tasks and of projects, board pin
+        self.assertEqual(query_count, 8)
+        self.assertEqual(more_items_query_count, query_count)
+        self.assertEqual([card["name"] for card in data["cards"]], ["Card 1", "Card 2"])
+        self.assertEqual(len(data["cards"][0]["card_items"]), 24)
+
+    def test_board_detail_visibility_and_pins(self):
+        shared_task = Task.objects.create(owner=self.user_3, title="Shared task")
+        hidden_task = Task.objects.create(owner=self.user_3, title="Hidden task")
+        shared_project = Project.objects.create(title="Shared project", owner=self.user_3)
+        project_task = Task.objects.create(owner=self.user_3, title="Project task", project=shared_project)
+        TaskAccess.objects.create(task=shared_task, user=self.user)
+        ProjectAccess.objects.create(project=shared_project, user=self.user)
+        Pin.objects.create(user=self.user, task=shared_task)
+        for position, task in enumerate((shared_task, hidden_task, project_task), 1):
+            CardItem.objects.create(card=self.card_2, task=task, position=position)
+
+        self.client.force_login(self.user)
+        data, _ = self.board_detail_queries()
+        tasks = [item["task"] for item in data["cards"][1]["card_items"]]
+        self.assertEqual([task["title"] for task in tasks], ["Task 3", "Shared task", "*****", "Project task"])
+        self.assertEqual([task["is_pinned"] for task in tasks], [False, True, False, False])
+        self.assertEqual(tasks[3]["project"]["title"], "Shared project")
+
+    def test_board_layout(self):
+        # card 2 first, item 1 moves to card 2 between the others, item 2 moves up
+        layout = {
+            "cards": [
+                {"id": str(self.card_2.id), "items": [str(self.card_item_3.id), str(self.card_item.id)]},
+                {"id": str(self.card.id), "items": [str(self.card_item_2.id)]},
+            ]
+        }
+        self.client.force_login(self.user_2)
+        # logs of the request are written once its transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(reverse("board_layout", kwargs={"pk": self.board.pk}), layout, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {"cards": 2, "items": 2})
+
+        self.assertEqual(
+            list(Card.objects.filter(board=self.board).order_by("position").values_list("id", flat=True)),
+            [self.card_2.id, self.card.id],
+        )
+        self.assertEqual(
+            list(CardItem.objects.filter(card=self.card_2).order_by("position").values_list("id", flat=True)),
+            [self.card_item_3.id, self.card_item.id],
+        )
+        self.assertEqual(CardItem.objects.get(pk=self.card_item_2.pk).position, 0)
+        self.assertEqual(Log.objects.filter(board=self.board, event_type=Log.EventType.BOARD_LAYOUT_CHANGED).count(), 1)
+
+        response = self.client.put(reverse("board_layout", kwargs={"pk": self.board.pk}), layout, format="json")
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_board_layout_incomplete(self):
+        layout = {"cards": [{"id": str(self.card.id), "items": [str(self.card_item.id), str(self.card_item_2.id)]}]}
+        self.client.force_login(self.user)
+        response = self.client.put(reverse("board_layout", kwargs={"pk": self.board.pk}), layout, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        layout["cards"].append({"id": str(self.card_2.id), "items": [str(self.card_item.id)]})
+        response = self.client.put(reverse("board_layout", kwargs={"pk": self.board.pk}), layout, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_board_layout_no_access(self):
+        self.client.force_login(self.user_3)
+        response = self.client.put(reverse("board_layout", kwargs={"pk": self.board.pk}), {"cards": []}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_board_detail_summary(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("board_detail", kwargs={"pk": self.board.pk}), {"summary": "true"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        cards = response.json()["cards"]
+        self.assertEqual([(card["name"], card["item_count"]) for card in cards], [("Card 1", 2), ("Card 2", 1)])
+        self.assertNotIn("card_items", cards[0])
+
+    def test_card_item_list_pages(self):
+        hidden_task = Task.objects.create(owner=self.user_3, title="Hidden task")
+        for position in range(2, 7):
+            CardItem.objects.create(card=self.card, comment=f"Comment {position}", position=position)
+        CardItem.objects.create(card=self.card, task=hidden_task, position=6)
+
+        self.client.force_login(self.user)
+        url = reverse("card_item_list", kwargs={"pk": self.card.pk})
+        items, next_url = [], url + "?page_size=3"
+        while next_url:
+            response = self.client.get(next_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.json()["results"]), 3)
+            items += response.json()["results"]
+            next_url = response.json()["next"]
+
+        self.assertEqual([item["position"] for item in items], [0, 1, 2, 3, 4, 5, 6, 6])
+        self.assertEqual(len({item["id"] for item in items}), 8)
+        self.assertIn("*****", [item["task"]["title"] for item in items if item["task"]])
+
+    def test_card_item_list_no_access(self):
+        self.client.force_login(self.user_3)
+        response = self.client.get(reverse("card_item_list", kwargs={"pk": self.card.pk}))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("card_item_list", kwargs={"pk": self.card.pk}), {"cursor": "nope"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -47,3 +47,20 @@ class CurrentTaskTest(APITestCase):
         response = self.client.get(reverse("current_task") + f"?user={self.user_2.id}")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.json().get("description"), None)
+
+    def test_deleted_task(self):
+        self.client.force_login(self.user_1)
+        task = Task.objects.create(owner=self.user_1, description="Test 123")
+        TaskWorkSession.objects.create(task=task, user=self.user_1, started_at=now())
+        response = self.client.get(reverse("current_task"))
+        self.assertEqual(response.json().get("description"), task.description)
+
+        # the session goes with the task by a cascade, the cached open session must not outlive it
+        task.delete()
+        response = self.client.get(reverse("current_task"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {})
+
+        response = self.client.get(reverse("sideapp_home"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.json()["currently_working_on"])
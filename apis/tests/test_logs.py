@@ -1,8 +1,13 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from core.models import Log, Project, ProjectAccess, User
+from core.models import Log, LogArchive, Project, ProjectAccess, User
 
 
 class LogsTests(APITestCase):
@@ -42,6 +47,13 @@ class LogsTests(APITestCase):
             message="User 3 Project 3 Log",
         )
 
+        cls.log_user_1_project_created = Log.objects.create(
+            user=cls.user,
+            project=cls.project,
+            message="Project created",
+            event_type=Log.EventType.PROJECT_CREATED,
+        )
+
     def test_log_list_not_authenticated(self):
         response = self.client.get(reverse("log_list"))
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -74,3 +86,50 @@ class LogsTests(APITestCase):
             str(self.log_user_3_project_3.id),
             [x.get("id") for x in response.json().get("results")],
         )
+
+    def test_log_list_filter_event_type(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("log_list"), {"event_type": Log.EventType.PROJECT_CREATED})
+        results = response.json().get("results")
+        self.assertEqual([x.get("id") for x in results], [str(self.log_user_1_project_created.id)])
+        self.assertEqual(results[0].get("event_type"), Log.EventType.PROJECT_CREATED)
+
+    def test_log_list_cursor_pagination(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("log_list"), {"cursor": "", "page_size": 2})
+        first_page = response.json()
+        self.assertEqual(len(first_page.get("results")), 2)
+        self.assertIsNotNone(first_page.get("next"))
+
+        response = self.client.get(first_page.get("next"))
+        second_page = response.json()
+        self.assertEqual(len(second_page.get("results")), 2)
+        self.assertIsNone(second_page.get("next"))
+
+        ids = [x.get("id") for x in first_page.get("results") + second_page.get("results")]
+        response = self.client.get(reverse("log_list"))
+        self.assertEqual(ids, [x.get("id") for x in response.json().get("results")])
+
+    def test_log_list_invalid_cursor(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("log_list"), {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_log_list_includes_archived_logs(self):
+        Log.objects.filter(pk=self.log_user_1_no_project.pk).update(created_at=timezone.now() - timedelta(days=800))
+        self.assertEqual(call_command("manage_log_partitions", stdout=StringIO()), None)
+        self.assertTrue(LogArchive.objects.filter(pk=self.log_user_1_no_project.pk).exists())
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("log_list"))
+        ids = [x.get("id") for x in response.json().get("results")]
+        self.assertEqual(ids[-1], str(self.log_user_1_no_project.id))
+        self.assertEqual(response.json().get("count"), 4)
+
+        recent = (timezone.now() - timedelta(days=30)).date()
+        response = self.client.get(reverse("log_list"), {"created_at_after": recent})
+        self.assertNotIn(str(self.log_user_1_no_project.id), [x.get("id") for x in response.json().get("results")])
+
+        old = (timezone.now() - timedelta(days=799)).date()
+        response = self.client.get(reverse("log_list"), {"created_at_before": old})
+        self.assertEqual([x.get("id") for x in response.json().get("results")], [str(self.log_user_1_no_project.id)])
@@ -1,10 +1,11 @@
+import datetime
 import json
 
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from core.models import Project, ProjectAccess, User
+from core.models import Project, ProjectAccess, Task, TaskWorkSession, User
 
 
 class ProjectTests(APITestCase):
@@ -130,3 +131,31 @@ class ProjectTests(APITestCase):
         self.assertNotContains(response, self.project_2)
         self.assertNotContains(response, self.project_3)
         self.assertEqual(json.loads(response.content).get("count"), 1)
+
+    def test_api_project_hours(self):
+        task = Task.objects.create(owner=self.user, title="Task", project=self.project)
+        started_at = datetime.datetime(2024, 1, 1, 23, tzinfo=datetime.timezone.utc)
+        for user in (self.user, self.user_2):
+            TaskWorkSession.objects.create(
+                task=task, user=user, started_at=started_at, stopped_at=started_at + datetime.timedelta(hours=2)
+            )
+
+        url = reverse("project_hours", kwargs={"pk": self.project.pk})
+        self.client.force_login(self.user_2)
+        response = self.client.get(url, {"start_date": "2024-01-01", "end_date": "2024-01-01"})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_login(self.user)
+        response = self.client.get(url, {"start_date": "2024-01-01", "end_date": "2024-01-01"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(),
+            {
+                "total_seconds": 7200,
+                "days": {"2024-01-01": 7200},
+                "users": {str(self.user.id): 3600, str(self.user_2.id): 3600},
+            },
+        )
+
+        response = self.client.get(url, {"start_date": "2024-01-02", "end_date": "2024-01-01"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,79 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import Note, Project, Task, User
+
+
+class TagsTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="user1")
+        cls.user_2 = User.objects.create(username="user2")
+
+        cls.project = Project.objects.create(title="Project", owner=cls.user, tag="#Backend")
+        cls.task_1 = Task.objects.create(owner=cls.user, title="Task 1", tag="backend,urgent")
+        cls.task_2 = Task.objects.create(owner=cls.user, title="Task 2", tag="backendx")
+        cls.task_3 = Task.objects.create(owner=cls.user, title="Task 3", tag="backend")
+        cls.task_4 = Task.objects.create(owner=cls.user_2, title="Task 4", tag="backend")
+        cls.note = Note.objects.create(user=cls.user, title="Note", content="Note", tag="urgent")
+
+    def test_task_tag_filter(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse("task_list"), {"tag": "backend"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        task_ids = {task["id"] for task in response.json()["results"]}
+        self.assertEqual(task_ids, {str(self.task_1.id), str(self.task_3.id)})
+
+        response = self.client.get(reverse("task_list"), {"tag": "#backend,urgent"})
+        self.assertEqual([task["id"] for task in response.json()["results"]], [str(self.task_1.id)])
+
+    def test_task_tag_from_title(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(reverse("task_list"), {"title": "Fix login #Auth"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.get(reverse("task_list"), {"tag": "auth"})
+        self.assertEqual([task["title"] for task in response.json()["results"]], ["Fix login #Auth"])
+
+    def test_project_and_note_tag_filter(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse("project_list"), {"tag": "backend"})
+        self.assertEqual([project["id"] for project in response.json()["results"]], [str(self.project.id)])
+
+        response = self.client.get(reverse("note_list"), {"tag": "urgent"})
+        self.assertEqual([note["id"] for note in response.json()["results"]], [str(self.note.id)])
+        response = self.client.get(reverse("note_list"), {"tag": "backend"})
+        self.assertEqual(response.json()["results"], [])
+
+    def test_tag_counts(self):
+        self.task_3.delete()
+        self.note.tag = ""
+        self.note.save()
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse("tag_counts"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        counts = [
+            (tag["name"], tag["task_count"], tag["project_count"], tag["note_count"])
+            for tag in response.json()["results"]
+        ]
+        self.assertEqual(counts, [("backend", 2, 1, 0), ("backendx", 1, 0, 0), ("urgent", 1, 0, 0)])
+
+        response = self.client.get(reverse("tag_counts"), {"search": "backendx"})
+        self.assertEqual([tag["name"] for tag in response.json()["results"]], ["backendx"])
+
+    def test_tag_counts_only_visible_tags(self):
+        Note.objects.create(user=self.user_2, title="Private", content="Private", tag="secret")
+
+        self.client.force_authenticate(user=self.user_2)
+        response = self.client.get(reverse("tag_counts"))
+        self.assertEqual([tag["name"] for tag in response.json()["results"]], ["backend", "secret"])
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse("tag_counts"))
+        self.assertNotIn("secret", [tag["name"] for tag in response.json()["results"]])
+
+    def test_tag_counts_not_authenticated(self):
+        response = self.client.get(reverse("tag_counts"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
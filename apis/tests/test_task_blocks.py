@@ -1,11 +1,14 @@
 from unittest.mock import patch
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 from apis.serializers import TaskBlockWebsocketSerializer
 from core.models import Project, ProjectAccess, Task, TaskBlock, User
+from core.utils.block_positions import BLOCK_POSITION_GAP
 
 
 class TaskBlocksTestsV2(APITestCase):
@@ -22,6 +25,7 @@ class TaskBlocksTestsV2(APITestCase):
             block_type=TaskBlock.BlockTypeChoices.MARKDOWN,
             content='{"markdown":"Block 1 Content"}',
             created_by=cls.user,
+            position=BLOCK_POSITION_GAP,
         )
 
         cls.project_2 = Project.objects.create(
@@ -61,6 +65,7 @@ class TaskBlocksTestsV2(APITestCase):
             block_type=TaskBlock.BlockTypeChoices.MARKDOWN,
             content='{"markdown":"Block 3 Content"}',
             created_by=cls.user_3,
+            position=BLOCK_POSITION_GAP,
         )
 
         cls.block_4 = TaskBlock.objects.create(
@@ -68,7 +73,7 @@ class TaskBlocksTestsV2(APITestCase):
             block_type=TaskBlock.BlockTypeChoices.MARKDOWN,
             content='{"markdown":"Block 4 Content"}',
             created_by=cls.user_3,
-            position=1,
+            position=2 * BLOCK_POSITION_GAP,
         )
 
         cls.block_5 = TaskBlock.objects.create(
@@ -76,7 +81,7 @@ class TaskBlocksTestsV2(APITestCase):
             block_type=TaskBlock.BlockTypeChoices.MARKDOWN,
             content='{"markdown":"Block 5 Content"}',
             created_by=cls.user_3,
-            position=2,
+            position=3 * BLOCK_POSITION_GAP,
         )
 
         ProjectAccess.objects.create(project=cls.project_3, user=cls.user)
@@ -132,7 +137,7 @@ class TaskBlocksTestsV2(APITestCase):
         )
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
-        created_block = TaskBlock.objects.get(task=self.task_1.id, position=1)
+        created_block = TaskBlock.objects.get(task=self.task_1.id, position=2 * BLOCK_POSITION_GAP)
         self.assertEqual(created_block.created_by, self.user)
 
         mock_websocket_send.assert_called_once_with(
@@ -166,12 +171,8 @@ class TaskBlocksTestsV2(APITestCase):
             channel=f"{self.task_3.id}",
             event_name="block_created",
             data={
-                # Assure blocks moved
-                "changed_positions": {
-                    str(self.block_3.id): 1,
-                    str(self.block_4.id): 2,
-                    str(self.block_5.id): 3,
-                },
+                # Following blocks keep their positions
+                "changed_positions": {},
                 "created_block": TaskBlockWebsocketSerializer(instance=created_block).data,
             },
         )
@@ -190,22 +191,57 @@ class TaskBlocksTestsV2(APITestCase):
             format="json",
         )
 
-        created_block = TaskBlock.objects.get(task=self.task_3.id, position=1)
+        created_block = TaskBlock.objects.get(task=self.task_3.id, position=BLOCK_POSITION_GAP * 3 // 2)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
         mock_websocket_send.assert_called_once_with(
             channel=f"{self.task_3.id}",
             event_name="block_created",
             data={
-                # Assure blocks moved
-                "changed_positions": {
-                    str(self.block_4.id): 2,
-                    str(self.block_5.id): 3,
-                },
+                # Following blocks keep their positions
+                "changed_positions": {},
                 "created_block": TaskBlockWebsocketSerializer(instance=created_block).data,
             },
         )
 
+    @patch("core.utils.websockets.WebsocketHelper.send")
+    def test_block_create_rebalances_when_no_gap_left(self, mock_websocket_send):
+        crowded_block = TaskBlock.objects.create(
+            task=self.task_1,
+            block_type=TaskBlock.BlockTypeChoices.MARKDOWN,
+            created_by=self.user,
+            position=BLOCK_POSITION_GAP + 1,
+        )
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(
+            reverse("task_block_create"),
+            {
+                "task": str(self.task_1.id),
+                "block_type": TaskBlock.BlockTypeChoices.MARKDOWN,
+                "content": '{"markdown":"New Block Content"}',
+                "position": 1,
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        created_block = TaskBlock.objects.get(task=self.task_1.id, position=2 * BLOCK_POSITION_GAP)
+        changed_positions = {
+            str(self.block_1.id): BLOCK_POSITION_GAP,
+            str(crowded_block.id): 3 * BLOCK_POSITION_GAP,
+        }
+        mock_websocket_send.assert_called_once_with(
+            channel=f"{self.task_1.id}",
+            event_name="block_created",
+            data={
+                "changed_positions": changed_positions,
+                "created_block": TaskBlockWebsocketSerializer(instance=created_block).data,
+            },
+        )
+        for block_id, position in changed_positions.items():
+            self.assertEqual(TaskBlock.objects.get(pk=block_id).position, position)
+
     @patch("core.utils.websockets.WebsocketHelper.send")
     def test_block_create_invalid_data(self, mock_websocket_send):
         self.client.force_authenticate(user=self.user)
@@ -266,10 +302,7 @@ class TaskBlocksTestsV2(APITestCase):
             event_name="block_archived",
             data={
                 "archived_block": str(self.block_3.id),
-                "changed_positions": {
-                    str(self.block_4.id): 0,
-                    str(self.block_5.id): 1,
-                },
+                "changed_positions": {},
             },
         )
 
@@ -293,9 +326,7 @@ class TaskBlocksTestsV2(APITestCase):
             event_name="block_moved",
             data={
                 "changed_positions": {
-                    str(self.block_4.id): 0,
-                    str(self.block_5.id): 1,
-                    str(self.block_3.id): 2,
+                    str(self.block_3.id): 4 * BLOCK_POSITION_GAP,
                 }
             },
         )
@@ -320,9 +351,7 @@ class TaskBlocksTestsV2(APITestCase):
             event_name="block_moved",
             data={
                 "changed_positions": {
-                    str(self.block_4.id): 0,
-                    str(self.block_5.id): 1,
-                    str(self.block_3.id): 2,
+                    str(self.block_3.id): 4 * BLOCK_POSITION_GAP,
                 }
             },
         )
@@ -348,8 +377,6 @@ class TaskBlocksTestsV2(APITestCase):
             data={
                 "changed_positions": {
                     str(self.block_5.id): 0,
-                    str(self.block_3.id): 1,
-                    str(self.block_4.id): 2,
                 }
             },
         )
@@ -375,8 +402,6 @@ class TaskBlocksTestsV2(APITestCase):
             data={
                 "changed_positions": {
                     str(self.block_5.id): 0,
-                    str(self.block_3.id): 1,
-                    str(self.block_4.id): 2,
                 }
             },
         )
@@ -396,3 +421,299 @@ class TaskBlocksTestsV2(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
         mock_websocket_send.assert_not_called()
+
+    @patch("core.utils.websockets.WebsocketHelper.send")
+    def test_block_batch(self, mock_websocket_send):
+        new_block_id = "6f1c8a4e-2f7e-4d38-9c35-0a4a1c7f2b11"
+        history_counts = {block.id: block.history.count() for block in (self.block_4, self.block_5)}
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(
+            reverse("task_block_batch"),
+            {
+                "task": str(self.task_3.id),
+                "operations": [
+                    {
+                        "op": "create",
+                        "id": new_block_id,
+                        "block_type": TaskBlock.BlockTypeChoices.MARKDOWN,
+                        "content": {"markdown": "Pasted"},
+                        "position": 0,
+                    },
+                    {"op": "update", "block": new_block_id, "content": {"markdown": "Pasted and edited"}},
+                    {
+                        "op": "update",
+                        "block": str(self.block_4.id),
+                        "version": self.block_4.version,
+                        "content": {"markdown": "Block 4 edited"},
+                    },
+                    {"op": "move", "block": str(self.block_5.id), "position": 1},
+                    {"op": "delete", "block": str(self.block_3.id)},
+                ],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        blocks = list(self.task_3.blocks.filter(is_archived=False).order_by("position"))
+        self.assertEqual(
+            [str(block.id) for block in blocks], [new_block_id, str(self.block_5.id), str(self.block_4.id)]
+        )
+        self.assertEqual(blocks[0].content, {"markdown": "Pasted and edited"})
+        self.assertEqual(blocks[0].history.count(), 1)
+        self.assertEqual(blocks[2].content, {"markdown": "Block 4 edited"})
+        # content edits are recorded as revisions, moves still get history rows
+        self.assertEqual(blocks[2].history.count(), history_counts[self.block_4.id])
+        self.assertEqual(blocks[2].revisions.get().content, {"markdown": "Block 4 edited"})
+        self.assertEqual(blocks[1].history.count(), history_counts[self.block_5.id] + 1)
+        self.assertTrue(TaskBlock.objects.get(pk=self.block_3.pk).is_archived)
+
+        mock_websocket_send.assert_called_once()
+        data = mock_websocket_send.call_args.kwargs["data"]
+        self.assertEqual([block["id"] for block in data["created_blocks"]], [new_block_id])
+        self.assertEqual([block["id"] for block in data["updated_blocks"]], [str(self.block_4.id)])
+        self.assertEqual(data["archived_blocks"], [str(self.block_3.id)])
+        self.assertEqual(data["changed_positions"], {str(self.block_5.id): blocks[1].position})
+
+    @patch("core.utils.websockets.WebsocketHelper.send")
+    def test_block_batch_paste_document(self, mock_websocket_send):
+        operations = [
+            {"op": "create", "block_type": TaskBlock.BlockTypeChoices.MARKDOWN, "content": {"markdown": f"{i}"}}
+            for i in range(200)
+        ]
+        self.client.force_authenticate(user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse("task_block_batch"), {"task": str(self.task_1.id), "operations": operations}, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        block_queries = [
+            query["sql"]
+            for query in queries
+            if "taskblock" in query["sql"] and "silk_" not in query["sql"] and not query["sql"].startswith("EXPLAIN")
+        ]
+        # reads of blocks and their latest revisions, then bulk inserts of blocks, history and revisions
+        # (SQLite splits the inserts into a few batches)
+        self.assertLess(len(block_queries), 15)
+
+        contents = [
+            block.content["markdown"] for block in self.task_1.blocks.exclude(pk=self.block_1.pk).order_by("position")
+        ]
+        self.assertEqual(contents, [f"{i}" for i in range(200)])
+        mock_websocket_send.assert_called_once()
+
+    @patch("core.utils.websockets.WebsocketHelper.send")
+    def test_block_batch_invalid_operation_rolls_back(self, mock_websocket_send):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(
+            reverse("task_block_batch"),
+            {
+                "task": str(self.task_3.id),
+                "operations": [
+                    {"op": "delete", "block": str(self.block_3.id)},
+                    {"op": "move", "block": str(self.block_2.id), "position": 0},
+                ],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json().get("index"), 1)
+        self.assertFalse(TaskBlock.objects.get(pk=self.block_3.pk).is_archived)
+        mock_websocket_send.assert_not_called()
+
+    @patch("core.utils.websockets.WebsocketHelper.send")
+    def test_block_batch_create_with_taken_id(self, mock_websocket_send):
+        self.client.force_authenticate(user=self.user)
+        new_block_id = "6f1c8a4e-2f7e-4d38-9c35-0a4a1c7f2b11"
+        create = {"op": "create", "block_type": TaskBlock.BlockTypeChoices.MARKDOWN, "content": {"markdown": "New"}}
+        for operations, index in [
+            ([{**create, "id": str(self.block_1.id)}], 0),
+            ([{**create, "id": new_block_id}, {**create, "id": new_block_id}], 1),
+        ]:
+            response = self.client.post(
+                reverse("task_block_batch"), {"task": str(self.task_3.id), "operations": operations}, format="json"
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.json().get("index"), index)
+            self.assertIn("id", response.json()["errors"])
+
+        self.assertFalse(TaskBlock.objects.filter(pk=new_block_id).exists())
+        mock_websocket_send.assert_not_called()
+
+    @patch("core.utils.websockets.WebsocketHelper.send")
+    def test_block_batch_update_checks_version(self, mock_websocket_send):
+        self.client.force_authenticate(user=self.user)
+        move = {"op": "move", "block": str(self.block_3.id), "position": 0}
+        update = {"op": "update", "block": str(self.block_4.id), "content": {"markdown": "Block 4 edited"}}
+        patch_update = {
+            "op": "update",
+            "block": str(self.block_4.id),
+            "version": self.block_4.version,
+            "patch": [{"op": "test", "path": "", "value": "Changed by someone else"}],
+        }
+        for operation, status_code in [
+            (update, status.HTTP_400_BAD_REQUEST),
+            ({**update, "version": self.block_4.version + 1}, status.HTTP_409_CONFLICT),
+            (patch_update, status.HTTP_409_CONFLICT),
+        ]:
+            response = self.client.post(
+                reverse("task_block_batch"),
+                {"task": str(self.task_3.id), "operations": [move, operation]},
+                format="json",
+            )
+            self.assertEqual(response.status_code, status_code)
+            self.assertEqual(response.json().get("index"), 1)
+            if status_code == status.HTTP_409_CONFLICT:
+                self.assertEqual(response.json().get("version"), self.block_4.version)
+
+        block_4 = TaskBlock.objects.get(pk=self.block_4.pk)
+        self.assertEqual((block_4.content, block_4.version), (self.block_4.content, self.block_4.version))
+        mock_websocket_send.assert_not_called()
+
+    @patch("core.utils.websockets.WebsocketHelper.send")
+    def test_block_batch_no_task_access(self, mock_websocket_send):
+        self.client.force_authenticate(user=self.user_2)
+        response = self.client.post(
+            reverse("task_block_batch"),
+            {"task": str(self.task_1.id), "operations": [{"op": "delete", "block": str(self.block_1.id)}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        mock_websocket_send.assert_not_called()
+
+    @patch("core.utils.websockets.WebsocketHelper.send")
+    def test_block_update_json_patch(self, mock_websocket_send):
+        checklist = TaskBlock.objects.create(
+            task=self.task_1,
+            block_type=TaskBlock.BlockTypeChoices.CHECKLIST,
+            content={
+                "title": "Todo",
+                "elements": [{"label": "one", "checked": False}, {"label": "two", "checked": False}],
+            },
+            created_by=self.user,
+        )
+        patch_operations = [
+            {"op": "test", "path": "/elements/1/checked", "value": False},
+            {"op": "replace", "path": "/elements/1/checked", "value": True},
+        ]
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.put(
+            reverse("task_block_update"),
+            {"task": str(self.task_1.id), "block": str(checklist.id), "version": 1, "patch": patch_operations},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {"id": str(checklist.id), "version": 2})
+
+        checklist.refresh_from_db()
+        self.assertEqual(checklist.content["elements"][1], {"label": "two", "checked": True})
+        mock_websocket_send.assert_called_once_with(
+            channel=f"{self.task_1.id}",
+            event_name="block_patched",
+            data={"block": str(checklist.id), "patch": patch_operations, "version": 2},
+        )
+
+    @patch("core.utils.websockets.WebsocketHelper.send")
+    def test_block_update_stale_version(self, mock_websocket_send):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.put(
+            reverse("task_block_update"),
+            {
+                "task": str(self.task_1.id),
+                "block": str(self.block_1.id),
+                "version": 3,
+                "patch": [{"op": "add", "path": "/markdown", "value": "stale"}],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.json().get("version"), 1)
+        mock_websocket_send.assert_not_called()
+
+    @patch("core.utils.websockets.WebsocketHelper.send")
+    def test_block_update_checks_access_before_version(self, mock_websocket_send):
+        patch_operations = [{"op": "add", "path": "/markdown", "value": "probe"}]
+        self.client.force_authenticate(user=self.user_2)
+        for data in [{"version": 3}, {}]:
+            response = self.client.put(
+                reverse("task_block_update"),
+                {"task": str(self.task_1.id), "block": str(self.block_1.id), "patch": patch_operations, **data},
+                format="json",
+            )
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+            self.assertNotIn("version", response.json())
+
+        # a block of another task is not found through a task the user can access
+        self.client.force_authenticate(user=self.user)
+        response = self.client.put(
+            reverse("task_block_update"),
+            {"task": str(self.task_3.id), "block": str(self.block_1.id), "version": 3, "patch": patch_operations},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        mock_websocket_send.assert_not_called()
+
+    @patch("core.utils.websockets.WebsocketHelper.send")
+    def test_block_update_invalid_patch(self, mock_websocket_send):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.put(
+            reverse("task_block_update"),
+            {
+                "task": str(self.task_1.id),
+                "block": str(self.block_1.id),
+                "version": 1,
+                "patch": [{"op": "remove", "path": "/missing"}],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.block_1.refresh_from_db()
+        self.assertEqual(self.block_1.version, 1)
+        mock_websocket_send.assert_not_called()
+
+    @patch("core.utils.websockets.WebsocketHelper.send")
+    def test_block_revisions(self, mock_websocket_send):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(
+            reverse("task_block_create"),
+            {
+                "task": str(self.task_1.id),
+                "block_type": TaskBlock.BlockTypeChoices.CHECKLIST,
+                "content": {"elements": [{"label": "one", "checked": False}]},
+                "position": 0,
+            },
+            format="json",
+        )
+        block = TaskBlock.objects.get(task=self.task_1, position=0)
+        for checked in (True, False):
+            self.client.put(
+                reverse("task_block_update"),
+                {
+                    "task": str(self.task_1.id),
+                    "block": str(block.id),
+                    "version": block.version,
+                    "patch": [{"op": "replace", "path": "/elements/0/checked", "value": checked}],
+                },
+                format="json",
+            )
+            block.refresh_from_db()
+            # history rows are not written for content edits
+            self.assertEqual(block.history.count(), 1)
+
+        response = self.client.get(reverse("task_block_revisions", kwargs={"block": block.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        revisions = response.json().get("results")
+        # create and both edits by the same user are a single revision
+        self.assertEqual([revision.get("version") for revision in revisions], [3])
+
+        response = self.client.get(reverse("task_block_revision", kwargs={"pk": revisions[0].get("id")}))
+        self.assertEqual(response.json().get("content"), {"elements": [{"label": "one", "checked": False}]})
+        self.assertEqual(
+            response.json().get("diff"),
+            [{"op": "add", "path": "/elements", "value": [{"label": "one", "checked": False}]}],
+        )
+
+    def test_block_revisions_no_task_access(self):
+        self.client.force_authenticate(user=self.user_2)
+        response = self.client.get(reverse("task_block_revisions", kwargs={"block": self.block_1.id}))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
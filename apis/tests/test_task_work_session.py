@@ -1,6 +1,11 @@
+import csv
 import datetime
+import io
+import zipfile
 
 from dateutil.relativedelta import relativedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
@@ -98,6 +103,19 @@ class TasksSessionTests(APITestCase):
         tsd = TaskWorkSession.objects.get(pk=task_work_session_id)
         self.assertEqual(tsd.started_at.strftime("%Y-%m-%d %H:%M:%S"), new_started_at)
 
+    def test_reopen_task_session_while_another_runs(self):
+        self.client.force_login(self.user)
+        self.client.post(reverse("task_start_work", kwargs={"pk": self.task_1.id}))
+        session_id = self.client.post(reverse("task_stop_work", kwargs={"pk": self.task_1.id})).json().get("id")
+        self.client.post(reverse("task_start_work", kwargs={"pk": self.task_1.id}))
+
+        response = self.client.patch(
+            reverse("task_sessions_detail", kwargs={"pk": session_id}), {"stopped_at": None}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("stopped_at", response.json())
+        self.assertIsNotNone(TaskWorkSession.objects.get(pk=session_id).stopped_at)
+
     def test_task_total_time(self):
         self.client.force_login(self.user)
         now = datetime.datetime.now()
@@ -111,3 +129,101 @@ class TasksSessionTests(APITestCase):
         resp_data = response.json()
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(resp_data["total_time"], {"hours": "01", "minutes": "30"})
+
+    def test_logged_seconds_follow_session_edits(self):
+        started_at = datetime.datetime(2024, 1, 1, 10, tzinfo=datetime.timezone.utc)
+        session = TaskWorkSession.objects.create(
+            started_at=started_at, stopped_at=started_at + relativedelta(hours=1), user=self.user, task=self.task_4
+        )
+        self.task_4.refresh_from_db()
+        self.project_4.refresh_from_db()
+        self.assertEqual((self.task_4.logged_seconds, self.project_4.logged_seconds), (3600, 3600))
+
+        self.client.force_login(self.user)
+        self.client.patch(
+            reverse("task_sessions_detail", kwargs={"pk": session.id}),
+            data={"stopped_at": "2024-01-01 10:30:00", "task": str(self.task_1.id)},
+        )
+        self.task_1.refresh_from_db()
+        self.task_4.refresh_from_db()
+        self.project_4.refresh_from_db()
+        self.assertEqual((self.task_1.logged_seconds, self.task_4.logged_seconds), (1800, 0))
+        self.assertEqual(self.project_4.logged_seconds, 0)
+
+        # saving a task loaded before the session changed keeps the total
+        stale_task = Task.objects.get(pk=self.task_1.id)
+        TaskWorkSession.objects.create(
+            started_at=started_at, stopped_at=started_at + relativedelta(minutes=10), user=self.user, task=self.task_1
+        )
+        stale_task.project = self.project_4
+        stale_task.save()
+        self.task_1.refresh_from_db()
+        self.project_4.refresh_from_db()
+        self.assertEqual((self.task_1.logged_seconds, self.project_4.logged_seconds), (2400, 2400))
+
+    def test_task_total_times(self):
+        started_at = datetime.datetime(2024, 1, 1, 10, tzinfo=datetime.timezone.utc)
+        for task in (self.task_1, self.task_2, self.task_3):
+            TaskWorkSession.objects.create(
+                started_at=started_at, stopped_at=started_at + relativedelta(minutes=45), user=self.user, task=task
+            )
+
+        self.client.force_login(self.user)
+        ids = ",".join(str(task.id) for task in (self.task_1, self.task_2, self.task_3, self.task_4))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("task_total_times"), {"ids": ids})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        task_queries = [query for query in queries if query["sql"].startswith('SELECT "core_task"')]
+        self.assertEqual(len(task_queries), 1)
+        totals = {entry["id"]: (entry["total_time"], entry["logged_seconds"]) for entry in response.json()}
+        # task 2 is not visible
+        self.assertEqual(
+            totals,
+            {
+                str(self.task_1.id): ({"hours": "00", "minutes": "45"}, 2700),
+                str(self.task_3.id): ({"hours": "00", "minutes": "45"}, 2700),
+                str(self.task_4.id): ({"hours": "00", "minutes": "00"}, 0),
+            },
+        )
+
+        response = self.client.get(reverse("task_total_times"), {"ids": "not-an-id"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def create_export_sessions(self):
+        started_at = datetime.datetime(2024, 1, 1, 10, tzinfo=datetime.timezone.utc)
+        for user, task in ((self.user, self.task_1), (self.user_2, self.task_2), (self.user_3, self.task_4)):
+            TaskWorkSession.objects.create(
+                task=task, user=user, started_at=started_at, stopped_at=started_at + datetime.timedelta(hours=1)
+            )
+
+    def test_task_sessions_export_csv(self):
+        self.create_export_sessions()
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("task_sessions_export"), {"start_date": "2024-01-01"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/csv")
+
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:5], ["session", "user", "task_id", "task", "project"])
+        # sessions of other users on tasks not owned by or shared with the user are left out
+        self.assertEqual(sorted(row[3] for row in rows[1:]), ["Task 1"])
+        self.assertEqual(rows[1][5:8], ["2024-01-01 10:00:00", "2024-01-01 11:00:00", "3600"])
+
+        response = self.client.get(reverse("task_sessions_export"), {"start_date": "2024-01-02"})
+        self.assertEqual(len(b"".join(response.streaming_content).decode().splitlines()), 1)
+
+    def test_task_sessions_export_xlsx(self):
+        self.create_export_sessions()
+        self.client.force_login(self.user_2)
+        response = self.client.get(reverse("task_sessions_export"), {"file_format": "xlsx"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        workbook = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        sheet = workbook.read("xl/worksheets/sheet1.xml").decode()
+        self.assertEqual(sheet.count("<row "), 2)
+        self.assertIn("Testing Project 2", sheet)
+
+    def test_task_sessions_export_invalid_format(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("task_sessions_export"), {"file_format": "pdf"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,8 +1,10 @@
+import datetime
+
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from core.models import Pin, Project, ProjectAccess, Task, User
+from core.models import Log, Pin, Project, ProjectAccess, Task, TaskBlock, TaskWorkSession, User
 
 
 class TasksTests(APITestCase):
@@ -82,6 +84,63 @@ class TasksTests(APITestCase):
         response = self.client.get(reverse("task_list"))
         self.assertContains(response, self.task_4.title)
 
+    def test_task_list_search(self):
+        TaskBlock.objects.create(
+            task=self.task_1,
+            block_type=TaskBlock.BlockTypeChoices.MARKDOWN,
+            content={"markdown": "Invoice"},
+            created_by=self.user,
+        )
+        self.client.force_authenticate(user=self.user)
+        response = self.client.put(
+            reverse("task_block_update"),
+            {
+                "task": str(self.task_1.id),
+                "block": str(self.task_1.blocks.get().id),
+                "block_type": TaskBlock.BlockTypeChoices.MARKDOWN,
+                "content": {"markdown": "Quarterly invoices"},
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.task_4.title = "Invoices"
+        self.task_4.save()
+        Task.objects.create(owner=self.user_2, title="Invoices of user 2")
+
+        response = self.client.get(reverse("task_list"), {"query": "invoic"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # title matches first, tasks of other users are not searched
+        self.assertEqual(
+            [task["id"] for task in response.json()["results"]], [str(self.task_4.id), str(self.task_1.id)]
+        )
+
+    def test_task_list_search_skips_archived_blocks(self):
+        block = TaskBlock.objects.create(
+            task=self.task_1,
+            block_type=TaskBlock.BlockTypeChoices.CHECKLIST,
+            content={"title": "Todo", "elements": [{"label": "Renew certificate", "checked": False}]},
+            created_by=self.user,
+        )
+        self.client.force_authenticate(user=self.user)
+        response = self.client.put(
+            reverse("task_block_update"),
+            {
+                "task": str(self.task_1.id),
+                "block": str(block.id),
+                "block_type": block.block_type,
+                "content": block.content,
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(reverse("task_list"), {"query": "certificate renew"})
+        self.assertEqual([task["id"] for task in response.json()["results"]], [str(self.task_1.id)])
+
+        self.client.delete(reverse("task_block_delete"), {"task": str(self.task_1.id), "block": str(block.id)})
+        response = self.client.get(reverse("task_list"), {"query": "certificate"})
+        self.assertEqual(response.json()["results"], [])
+
     def test_task_detail_not_logged(self):
         response = self.client.get(reverse("task_detail", kwargs={"pk": self.task_1.id}))
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -148,6 +207,28 @@ class TasksTests(APITestCase):
         )
         self.assertEqual(r.status_code, 200)
 
+    def test_api_task_update_logs_single_diff_event(self):
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            r = self.client.patch(
+                reverse("task_detail", kwargs={"pk": self.task_1.id}),
+                {"status": Task.StatusChoices.DONE, "progress": 50, "title": "Not tracked"},
+            )
+        self.assertEqual(r.status_code, 200)
+
+        logs = Log.objects.filter(task=self.task_1, event_type=Log.EventType.TASK_UPDATED)
+        self.assertEqual(logs.count(), 1)
+        self.assertEqual(
+            logs[0].payload["changes"],
+            {"status": {"from": None, "to": "DONE"}, "progress": {"from": 0, "to": 50}},
+        )
+
+    def test_api_task_update_no_changes_no_log(self):
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse("task_detail", kwargs={"pk": self.task_1.id}), {"title": "Only title"})
+        self.assertFalse(Log.objects.filter(task=self.task_1, event_type=Log.EventType.TASK_UPDATED).exists())
+
     def test_api_task_delete(self):
         self.client.force_login(self.user)
         response = self.client.delete(reverse("task_detail", kwargs={"pk": self.task_4.id}))
@@ -164,6 +245,49 @@ class TasksTests(APITestCase):
         self.assertEqual(task_db.title, title)
         self.assertEqual(task_db.project, None)
 
+    def test_task_subtree(self):
+        child = Task.objects.create(
+            owner=self.user, title="Child", parent_task=self.task_1, progress=50, estimated_work_hours=2
+        )
+        hidden = Task.objects.create(
+            owner=self.user_2, title="Hidden", parent_task=child, progress=100, estimated_work_hours=1.5
+        )
+        Task.objects.create(owner=self.user, title="Child 2", parent_task=self.task_1)
+        started_at = datetime.datetime(2024, 1, 1, 10, tzinfo=datetime.timezone.utc)
+        TaskWorkSession.objects.create(
+            task=child, user=self.user, started_at=started_at, stopped_at=started_at + datetime.timedelta(minutes=5)
+        )
+        TaskWorkSession.objects.create(
+            task=hidden, user=self.user_2, started_at=started_at, stopped_at=started_at + datetime.timedelta(minutes=10)
+        )
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("task_subtree", kwargs={"pk": self.task_1.pk}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        nodes = response.json()
+        self.assertEqual(
+            [(node["title"], node["depth"]) for node in nodes],
+            [("Task 1", 0), ("Child", 1), ("*****", 2), ("Child 2", 1)],
+        )
+        root = nodes[0]
+        self.assertEqual(
+            (root["rollup_progress"], root["rollup_estimated_work_hours"], root["rollup_logged_seconds"]),
+            (38, "3.5", 900),
+        )
+        self.assertEqual((nodes[1]["logged_seconds"], nodes[1]["rollup_logged_seconds"]), (300, 900))
+        self.assertFalse(nodes[2]["is_visible"])
+
+        response = self.client.get(reverse("task_subtree", kwargs={"pk": self.task_1.pk}), {"depth": 1})
+        nodes = response.json()
+        self.assertEqual([node["title"] for node in nodes], ["Task 1", "Child", "Child 2"])
+        self.assertEqual([node["has_more_children"] for node in nodes], [False, True, False])
+        self.assertEqual(nodes[0]["rollup_logged_seconds"], 300)
+
+    def test_task_subtree_no_access(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("task_subtree", kwargs={"pk": self.task_2.pk}))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
     def test_task_change_owner(self):
         self.client.force_login(self.user)
         # r = self.client.put(
@@ -189,3 +313,32 @@ class TasksTests(APITestCase):
         Pin.objects.create(user=self.user, task=self.task_1)
         request = self.client.get(reverse("task_detail", kwargs={"pk": self.task_1.id}))
         self.assertTrue(request.json().get("is_pinned"))
+
+    def test_task_position_change_below_task(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("task_position_change", kwargs={"pk": self.task_4.id}),
+            {"task_above_id": str(self.task_1.id)},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        ranked_ids = list(Task.objects.order_by("rank").values_list("id", flat=True))
+        self.assertEqual(ranked_ids[:3], [self.task_1.id, self.task_4.id, self.task_2.id])
+
+    def test_task_position_change_top_of_project(self):
+        task = Task.objects.create(owner=self.user, title="Task in project 4", project=self.project_4)
+
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("task_position_change", kwargs={"pk": task.id}),
+            {"project": str(self.project_4.id)},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        ranked_ids = list(Task.objects.order_by("rank").values_list("id", flat=True))
+        self.assertEqual(ranked_ids[2:5], [self.task_3.id, task.id, self.task_4.id])
+
+    def test_task_position_change_no_access(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse("task_position_change", kwargs={"pk": self.task_2.id}), {})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -2,7 +2,8 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from core.models import Notification, NotificationAck, Task, User
+from core.models import Notification, NotificationAck, Task, User, UserTaskQueue
+from core.utils.queue_priorities import top_priority
 
 
 class UserTaskQueueTests(APITestCase):
@@ -66,3 +67,61 @@ class UserTaskQueueTests(APITestCase):
         response = self.client.get(reverse("user_task_queue_manage", kwargs={"pk": self.task.pk}))
         users = [x.get("id") for x in response.json().get("users")]
         self.assertTrue(f"{self.user_2.pk}" not in users)
+
+    def queue_task_ids(self, user):
+        return list(UserTaskQueue.objects.filter(user=user).order_by("-priority").values_list("task_id", flat=True))
+
+    def create_queue(self, user, count):
+        tasks = [Task.objects.create(owner=user, title=f"Queue task {i}") for i in range(count)]
+        entries = [UserTaskQueue.objects.create(user=user, task=task, priority=top_priority(user)) for task in tasks]
+        return tasks[::-1], entries[::-1]
+
+    def test_user_task_queue_position_change(self):
+        tasks, entries = self.create_queue(self.user_1, 4)
+        self.client.force_login(self.user_1)
+
+        response = self.client.post(
+            reverse("user_task_queue_position_change", kwargs={"pk": entries[0].pk}),
+            {"task_above_id": entries[2].pk},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.queue_task_ids(self.user_1), [tasks[1].id, tasks[2].id, tasks[0].id, tasks[3].id])
+
+        self.client.post(reverse("user_task_queue_position_change", kwargs={"pk": entries[3].pk}), {})
+        self.assertEqual(self.queue_task_ids(self.user_1), [tasks[3].id, tasks[1].id, tasks[2].id, tasks[0].id])
+
+    def test_user_task_queue_position_change_other_user(self):
+        tasks, entries = self.create_queue(self.user_1, 2)
+        self.client.force_login(self.user_2)
+
+        response = self.client.post(reverse("user_task_queue_position_change", kwargs={"pk": entries[1].pk}), {})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.queue_task_ids(self.user_1), [tasks[0].id, tasks[1].id])
+
+    def test_user_task_queue_position_change_rebalances(self):
+        tasks, entries = self.create_queue(self.user_1, 3)
+        UserTaskQueue.objects.filter(pk=entries[1].pk).update(priority=entries[0].priority - 1)
+        self.client.force_login(self.user_1)
+
+        self.client.post(
+            reverse("user_task_queue_position_change", kwargs={"pk": entries[2].pk}),
+            {"task_above_id": entries[0].pk},
+        )
+        self.assertEqual(self.queue_task_ids(self.user_1), [tasks[0].id, tasks[2].id, tasks[1].id])
+
+    def test_user_task_queue_order(self):
+        tasks, entries = self.create_queue(self.user_1, 3)
+        self.client.force_login(self.user_1)
+
+        response = self.client.post(
+            reverse("user_task_queue_order"), {"ids": [entries[2].pk, entries[0].pk]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.queue_task_ids(self.user_1), [tasks[2].id, tasks[0].id, tasks[1].id])
+
+    def test_user_task_queue_order_foreign_ids(self):
+        _, entries = self.create_queue(self.user_2, 1)
+        self.client.force_login(self.user_1)
+
+        response = self.client.post(reverse("user_task_queue_order"), {"ids": [entries[0].pk]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
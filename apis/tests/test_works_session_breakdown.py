@@ -1,10 +1,11 @@
 import datetime
+import json
 
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from core.models import Task, TaskWorkSession, User
+from core.models import Project, ProjectAccess, Task, TaskWorkSession, Team, User
 
 
 class WorkSessionBreakdownTests(APITestCase):
@@ -43,7 +44,6 @@ class WorkSessionBreakdownTests(APITestCase):
         )
 
     def test_work_session_breakdown(self):
-        # TODO: Add authorization - staff only?
         self.client.force_authenticate(user=self.user)
 
         r = self.client.post(
@@ -79,3 +79,80 @@ class WorkSessionBreakdownTests(APITestCase):
         )
 
         self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def breakdown(self, **data):
+        response = self.client.post(reverse("work_sessions_breakdown"), data=data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json.loads(b"".join(response.streaming_content))
+
+    def test_sessions_split_at_local_midnight(self):
+        started_at = datetime.datetime(2024, 2, 1, 22, 30, tzinfo=datetime.timezone.utc)
+        TaskWorkSession.objects.create(
+            started_at=started_at,
+            stopped_at=started_at + datetime.timedelta(hours=2, minutes=30),
+            task=self.task_1,
+            user=self.user,
+        )
+
+        self.client.force_authenticate(user=self.user)
+        data = self.breakdown(user_id=str(self.user.id), start_date="2024-02-01", end_date="2024-02-02")
+        self.assertEqual(data["sessions_by_day"], {"2024-02-01": "01:30", "2024-02-02": "01:00"})
+        self.assertEqual(data["tasks_total"], {"Task 1": "02:30"})
+
+        data = self.breakdown(
+            user_id=str(self.user.id), start_date="2024-02-01", end_date="2024-02-01", timezone="Europe/Warsaw"
+        )
+        self.assertEqual(data["sessions_by_day"], {"2024-02-01": "00:30"})
+        self.assertEqual(data["total_sum"], "00:30")
+        self.assertEqual(data["tasks_total"], {"Task 1": "00:30"})
+        self.assertEqual(
+            [(event["start"], event["end"]) for event in data["events"]], [("2024-02-01 23:30", "2024-02-02 02:00")]
+        )
+
+    def test_team_breakdown(self):
+        started_at = datetime.datetime(2024, 3, 1, 9, tzinfo=datetime.timezone.utc)
+        for user, task in ((self.user, self.task_1), (self.user_2, self.task_2)):
+            TaskWorkSession.objects.create(
+                started_at=started_at, stopped_at=started_at + datetime.timedelta(hours=1), task=task, user=user
+            )
+
+        team = Team.objects.create(name="Team")
+        self.user.teams.add(team)
+        self.user_2.teams.add(team)
+
+        self.client.force_authenticate(user=self.user)
+        data = self.breakdown(
+            user_ids=[str(self.user.id), str(self.user_2.id)], start_date="2024-03-01", end_date="2024-03-01"
+        )
+        self.assertEqual(data["total_sum"], "02:00")
+        self.assertEqual(data["tasks_total"], {"Task 1": "01:00", "Task 2": "01:00"})
+        self.assertEqual(data["users"][str(self.user_2.id)]["tasks_total"], {"Task 2": "01:00"})
+        self.assertEqual({event["user_id"] for event in data["events"]}, {str(self.user.id), str(self.user_2.id)})
+
+    def test_breakdown_of_unrelated_users(self):
+        data = {
+            "user_ids": [str(self.user.id), str(self.user_2.id)],
+            "start_date": "2024-03-01",
+            "end_date": "2024-03-01",
+        }
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(reverse("work_sessions_breakdown"), data=data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        # sharing a project is enough
+        project = Project.objects.create(title="Shared project", owner=self.user)
+        ProjectAccess.objects.create(project=project, user=self.user_2)
+        self.breakdown(**data)
+
+    def test_invalid_timezone(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(
+            reverse("work_sessions_breakdown"),
+            data={
+                "user_id": self.user.id,
+                "start_date": "2024-01-01",
+                "end_date": "2024-01-02",
+                "timezone": "Mars/Base",
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -7,6 +7,7 @@ urlpatterns = [
     path("user/<pk>", views.UserDetail.as_view(), name="user_detail"),
     path("projects", views.ProjectList.as_view(), name="project_list"),
     path("project/<pk>", views.ProjectDetail.as_view(), name="project_detail"),
+    path("project-hours/<pk>", views.ProjectHours.as_view(), name="project_hours"),
     path(
         "project-accesses",
         views.ProjectAccessList.as_view(),
@@ -38,6 +39,7 @@ urlpatterns = [
         views.TaskTotalTime.as_view(),
         name="task_total_time",
     ),
+    path("task-total-times", views.TaskTotalTimeList.as_view(), name="task_total_times"),
     path(
         "user-task-queue-position-change/<pk>",
         views.UserTaskQueuePositionChangeView.as_view(),
@@ -45,6 +47,7 @@ urlpatterns = [
     ),
     path("upload", views.UploadView.as_view(), name="upload"),
     path("task/<pk>", views.TaskDetail.as_view(), name="task_detail"),
+    path("task-subtree/<pk>", views.TaskSubtree.as_view(), name="task_subtree"),
     path(
         "task-block-list/<task>",
         views.TaskBlockListV2.as_view(),
@@ -65,6 +68,21 @@ urlpatterns = [
         views.TaskBlockDelete.as_view(),
         name="task_block_delete",
     ),
+    path(
+        "task-block-batch",
+        views.TaskBlockBatch.as_view(),
+        name="task_block_batch",
+    ),
+    path(
+        "task-block-revisions/<block>",
+        views.TaskBlockRevisionList.as_view(),
+        name="task_block_revisions",
+    ),
+    path(
+        "task-block-revision/<pk>",
+        views.TaskBlockRevisionDetail.as_view(),
+        name="task_block_revision",
+    ),
     path(
         "task-block-move",
         views.TaskBlockMove.as_view(),
@@ -93,12 +111,18 @@ urlpatterns = [
         views.TaskSessionList.as_view(),
         name="task_sessions_list",
     ),
+    path(
+        "task-sessions-export",
+        views.TimesheetExport.as_view(),
+        name="task_sessions_export",
+    ),
     path(
         "task-session/<pk>",
         views.TaskSessionDetail.as_view(),
         name="task_sessions_detail",
     ),
     path("comment/<pk>", views.CommentDetail.as_view(), name="comment_detail"),
+    path("tag-counts", views.TagCountList.as_view(), name="tag_counts"),
     path("notes", views.NoteList.as_view(), name="note_list"),
     path("note/<pk>", views.NoteDetail.as_view(), name="note_detail"),
     path(
@@ -134,6 +158,11 @@ urlpatterns = [
         views.UserTaskQueueView.as_view(),
         name="user_task_queue",
     ),
+    path(
+        "user-task-queue-order",
+        views.UserTaskQueueOrderView.as_view(),
+        name="user_task_queue_order",
+    ),
     path(
         "user-task-queue-manage/<pk>",
         views.UserTaskQueueManageView.as_view(),
@@ -191,6 +220,7 @@ urlpatterns = [
         name="board_detail",
     ),
     path("board/logs/<pk>", views.BoardLogList.as_view(), name="board_log_list"),
+    path("board-layout/<pk>", views.BoardLayout.as_view(), name="board_layout"),
     path(
         "board-users/<uuid:board_id>",
         views.BoardUserView.as_view(),
@@ -209,6 +239,7 @@ urlpatterns = [
         views.CardItemDetail.as_view(),
         name="card_item_detail",
     ),
+    path("card-items/<pk>", views.CardItemList.as_view(), name="card_item_list"),
     path("card-item-move", views.CardItemMove.as_view(), name="card_item_move"),
     path("sideapp/home", views.SideAppHomeView.as_view(), name="sideapp_home"),
 ]
@@ -1,26 +1,28 @@
 import json
 import mimetypes
 import pathlib
-import time
 import uuid
 from collections import defaultdict
 
+from django.conf import settings
 from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import transaction
-from django.db.models import F, Q, Sum
-from django.http import JsonResponse
+from django.db.models import Count, Exists, F, OuterRef, Prefetch, Q, Sum
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
 from django.utils.text import slugify
 from django.utils.timezone import now
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics, status
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.filters import OrderingFilter, SearchFilter
 from rest_framework.generics import ListAPIView, get_object_or_404
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from core.mixins import TaskAccessMixin
+from core.mixins import LogPeriodMixin, TaskAccessMixin
 from core.models import (
     Attachment,
     Beacon,
@@ -29,28 +31,49 @@ from core.models import (
     Card,
     CardItem,
     Comment,
+    DailyTimeRollup,
     Log,
     Note,
+    NoteTag,
     Notification,
     NotificationAck,
     Pin,
     PrivateNote,
     Project,
     ProjectAccess,
+    ProjectTag,
     Reminder,
+    Tag,
     Task,
     TaskAccess,
     TaskBlock,
+    TaskBlockRevision,
+    TaskSearchDocument,
+    TaskTag,
     TaskWorkSession,
     Team,
     User,
     UserTaskQueue,
 )
+from core.utils.block_batch import BlockBatch, BlockVersionConflict
+from core.utils.block_positions import position_at_index
+from core.utils.block_revisions import record_revisions, revision_content
+from core.utils.board_events import positions, send_board_event
+from core.utils.changes import changed_fields, describe_changes, snapshot_fields
 from core.utils.hashtags import extract_hashtags
+from core.utils.json_patch import JsonPatchConflict, JsonPatchError, apply_patch, make_patch
+from core.utils.log_buffer import write_log
 from core.utils.notifications import create_notification_from_comment
-from core.utils.permissions import user_can_see_task
-from core.utils.time_from_seconds import time_from_seconds
+from core.utils.permissions import user_can_see_task, visible_user_ids
+from core.utils.queue_priorities import apply_queue_order, bottom_priority, priority_below, top_priority
+from core.utils.ranks import rank_between
+from core.utils.task_tree import load_subtree
+from core.utils.time_from_seconds import format_duration, time_from_seconds
+from core.utils.timesheets import FORMATS as TIMESHEET_FORMATS
+from core.utils.timesheets import timesheet_chunks
 from core.utils.websockets import WebsocketHelper
+from core.utils.work_breakdown import breakdown, overlapping_sessions
+from core.utils.work_sessions import active_session, start_work, stop_work
 
 from .filters import (
     AttachmentFilter,
@@ -66,8 +89,9 @@ from .filters import (
     TaskAccessFilter,
     TaskFilter,
     TaskSessionFilter,
+    TimesheetFilter,
 )
-from .paginations import CustomPaginationPageSize1k
+from .paginations import CustomPaginationPageSize1k, LogCursorPagination, PositionCursorPagination
 from .permissions import (
     HasProjectAccess,
     HasTaskAccess,
@@ -80,9 +104,12 @@ from .permissions import (
 from .serializers import (
     AttachmentDetailSerializer,
     AttachmentListSerializer,
+    BoardLayoutSerializer,
     BoardReadonlySerializer,
     BoardSerializer,
+    BoardSummarySerializer,
     BoardUserSerializer,
+    CardItemReadOnlySerializer,
     CardItemSerializer,
     CardSerializer,
     CommentDetailSerializer,
@@ -98,14 +125,18 @@ from .serializers import (
     ProjectAccessSerializer,
     ProjectDetailReadOnlySerializer,
     ProjectDetailSerializer,
+    ProjectHoursInputSerializer,
     ProjectListReadOnlySerializer,
     ProjectListSerializer,
     ReminderReadOnlySerializer,
     ReminderSerializer,
+    TagCountSerializer,
     TaskAccessDetailSerializer,
     TaskAccessSerializer,
     TaskBlockCreateSerializer,
     TaskBlockListSerializer,
+    TaskBlockOperationSerializer,
+    TaskBlockRevisionSerializer,
     TaskBlockUpdateSerializer,
     TaskBlockWebsocketSerializer,
     TaskDetailSerializer,
@@ -113,6 +144,7 @@ from .serializers import (
     TaskReadOnlySerializer,
     TaskSessionDetailSerializer,
     TaskSessionListSerializer,
+    TaskSubtreeSerializer,
     TaskTotalTimeReadOnlySerializer,
     UserSerializer,
     UserTaskQueueSerializer,
@@ -164,7 +196,9 @@ class ProjectList(generics.ListCreateAPIView):
 
     def perform_create(self, serializer):
         project = serializer.save(owner=self.request.user)
-        Log.objects.create(project=project, user=self.request.user, message="Project created")
+        write_log(
+            event_type=Log.EventType.PROJECT_CREATED, project=project, user=self.request.user, message="Project created"
+        )
 
 
 class ProjectDetail(generics.RetrieveUpdateAPIView):
@@ -179,7 +213,40 @@ class ProjectDetail(generics.RetrieveUpdateAPIView):
 
     def perform_update(self, serializer):
         project = serializer.save()
-        Log.objects.create(project=project, user=self.request.user, message="Project updated")
+        write_log(
+            event_type=Log.EventType.PROJECT_UPDATED, project=project, user=self.request.user, message="Project updated"
+        )
+
+
+class ProjectHours(generics.GenericAPIView):
+    """
+    Seconds logged on tasks of the project from `start_date` to `end_date` (local days of TIME_ROLLUP_TIME_ZONE),
+    in total, per day and per user. Read from the daily rollup, sessions still running are not included.
+    """
+
+    permission_classes = (HasProjectAccess,)
+    queryset = Project.objects.all()
+
+    def get(self, request, *args, **kwargs):
+        project = self.get_object()
+        serializer = ProjectHoursInputSerializer(data=request.GET)
+        serializer.is_valid(raise_exception=True)
+
+        rows = DailyTimeRollup.objects.filter(
+            project=project,
+            date__range=(serializer.validated_data["start_date"], serializer.validated_data["end_date"]),
+        ).order_by()
+        days = rows.values("date").annotate(total=Sum("seconds")).filter(total__gt=0).order_by("date")
+        users = rows.values("user").annotate(total=Sum("seconds")).filter(total__gt=0)
+
+        days = {row["date"].isoformat(): row["total"] for row in days}
+        return Response(
+            {
+                "total_seconds": sum(days.values()),
+                "days": days,
+                "users": {str(row["user"]): row["total"] for row in users},
+            }
+        )
 
 
 class TaskList(generics.ListCreateAPIView):
@@ -204,7 +271,7 @@ class TaskList(generics.ListCreateAPIView):
                 Q(owner=user) | Q(permissions__user=user) | Q(project__owner=user) | Q(project__permissions__user=user)
             )
             .distinct()
-            .order_by("position")
+            .order_by("rank")
         )
 
         return tasks
@@ -220,28 +287,55 @@ class TaskList(generics.ListCreateAPIView):
 
         if add_to_user_queue:
             queue_position = self.request.data.get("queue_position", "top")
-            priority = 100
-            if queue_position == "top":
-                utq = UserTaskQueue.objects.filter(user=self.request.user).order_by("-priority").first()
-                if utq:
-                    priority = utq.priority + 10
-
             if queue_position == "bottom":
-                utq = UserTaskQueue.objects.filter(user=self.request.user).order_by("priority").first()
-                if utq:
-                    priority = utq.priority - 10
+                priority = bottom_priority(self.request.user)
+            else:
+                priority = top_priority(self.request.user)
 
             UserTaskQueue.objects.create(user=self.request.user, task=task, priority=priority)
 
         TaskAccess.objects.create(task=task, user=self.request.user)
 
-        Log.objects.create(task=task, user=self.request.user, message="Task created")
+        write_log(event_type=Log.EventType.TASK_CREATED, task=task, user=self.request.user, message="Task created")
+
+
+class TaskSubtree(generics.GenericAPIView):
+    """
+    The task and all its subtasks down to `depth` levels (TASK_SUBTREE_MAX_DEPTH at most), depth first,
+    with totals of every subtree. Nodes with subtasks beyond the limit have `has_more_children`.
+    """
+
+    serializer_class = TaskSubtreeSerializer
+    permission_classes = (HasTaskAccess,)
+    queryset = Task.objects.all()
+
+    def get(self, request, *args, **kwargs):
+        root = self.get_object()
+
+        depth = settings.TASK_SUBTREE_MAX_DEPTH
+        if request.GET.get("depth"):
+            try:
+                depth = min(max(int(request.GET["depth"]), 0), depth)
+            except ValueError:
+                return Response({"depth": "Has to be a number"}, status=status.HTTP_400_BAD_REQUEST)
+
+        nodes = load_subtree(root, request.user, depth)
+        return Response(self.get_serializer(nodes, many=True).data)
 
 
 class TaskDetail(generics.RetrieveUpdateAPIView):
     serializer_class = TaskDetailSerializer
     permission_classes = (HasTaskAccess,)
     queryset = Task.objects.all()
+    tracked_fields = [
+        "project",
+        "status",
+        "eta_date",
+        "estimated_work_hours",
+        "progress",
+        "is_urgent",
+        "responsible",
+    ]
 
     def get_serializer_class(self):
         if self.request.method == "GET":
@@ -249,44 +343,23 @@ class TaskDetail(generics.RetrieveUpdateAPIView):
         return TaskDetailSerializer
 
     def perform_update(self, serializer):
-        instance = self.get_object()
-        previous_data = Task.objects.get(pk=instance.pk)
+        previous_values = snapshot_fields(serializer.instance, self.tracked_fields)
         task = serializer.save()
 
-        fields_to_check = [
-            "project",
-            "status",
-            "eta_date",
-            "estimated_work_hours",
-            "progress",
-            "is_urgent",
-        ]
-
-        for field in fields_to_check:
-            new_value = getattr(task, field)
-            old_value = getattr(previous_data, field)
-            if new_value != old_value:
-                Log.objects.create(
-                    task=task,
-                    user=self.request.user,
-                    message=f"Task updated by {self.request.user.username}. "
-                    f"{field} changed from {old_value} to {new_value}",
-                )
-
-        if (
-            task.responsible != previous_data.responsible
-            and task.responsible is not None
-            and self.request.user != task.responsible
-        ):
-            Log.objects.create(
+        changes = changed_fields(task, previous_values)
+        if changes:
+            write_log(
+                event_type=Log.EventType.TASK_UPDATED,
                 task=task,
                 user=self.request.user,
-                message=f"Responsible person changed to {task.responsible}",
+                message=f"Task updated by {self.request.user.username}. {describe_changes(task, changes)}",
+                payload={"changes": changes},
             )
 
+        if "responsible" in changes and task.responsible is not None and self.request.user != task.responsible:
             utq = UserTaskQueue.objects.filter(user=task.responsible, task=task)
             if not utq:
-                UserTaskQueue.objects.create(user=task.responsible, task=task, priority=int(time.time()))
+                UserTaskQueue.objects.create(user=task.responsible, task=task, priority=top_priority(task.responsible))
 
             notification = Notification.objects.create(
                 task=task,
@@ -303,6 +376,28 @@ class TaskTotalTime(generics.RetrieveAPIView):
     queryset = Task.objects.all()
 
 
+class TaskTotalTimeList(generics.ListAPIView):
+    """Totals of tasks given as comma separated `ids` in one response, tasks the user can't see are left out"""
+
+    permission_classes = (IsAuthenticated,)
+    serializer_class = TaskTotalTimeReadOnlySerializer
+    pagination_class = None
+    max_ids = 500
+
+    def get_queryset(self):
+        ids = [task_id for task_id in self.request.GET.get("ids", "").split(",") if task_id][: self.max_ids]
+        try:
+            ids = [uuid.UUID(task_id) for task_id in ids]
+        except ValueError:
+            raise ValidationError({"ids": "Has to be a comma separated list of task ids"})
+
+        user = self.request.user
+        visible = Task.objects.filter(
+            Q(owner=user) | Q(permissions__user=user) | Q(project__owner=user) | Q(project__permissions__user=user)
+        )
+        return Task.objects.filter(id__in=visible.filter(id__in=ids).values("id")).only("id", "logged_seconds")
+
+
 class TaskBlockListV2(generics.ListAPIView):
     permission_classes = (IsAuthenticated,)
     serializer_class = TaskBlockListSerializer
@@ -325,39 +420,93 @@ class TaskBlockCreate(generics.CreateAPIView, TaskAccessMixin):
 
     def perform_create(self, serializer):
         task = self.get_task(self.request.data.get("task"))
-        new_block = serializer.save(task=task, created_by=self.request.user)
 
-        # Move all following blocks one level
-        blocks_to_move = task.blocks.exclude(id=new_block.id).filter(
-            is_archived=False, position__gte=new_block.position
-        )
-        blocks_to_move.update(position=F("position") + 1)
+        # `position` sent by the client is the index of the new block
+        with transaction.atomic():
+            position, changed_positions = position_at_index(
+                task.blocks.filter(is_archived=False), serializer.validated_data.get("position", 0)
+            )
+            new_block = serializer.save(task=task, created_by=self.request.user, position=position)
+            record_revisions([(new_block, None)], self.request.user)
+            TaskSearchDocument.refresh([task.id])
 
         WebsocketHelper.send(
             channel=f"{task.id}",
             event_name="block_created",
             data={
-                "changed_positions": {
-                    str(block.id): block.position for block in task.blocks.filter(id__in=blocks_to_move)
-                },
+                "changed_positions": changed_positions,
                 "created_block": TaskBlockWebsocketSerializer(new_block).data,
             },
         )
 
 
 class TaskBlockUpdate(generics.UpdateAPIView, TaskAccessMixin):
+    """
+    Update a block with full `content`, or with a JSON Patch (RFC 6902) of it sent as `patch`.
+    `version` of the block the client started from is checked before either update and required with `patch`.
+    """
+
     permission_classes = (IsAuthenticated,)
     serializer_class = TaskBlockUpdateSerializer
 
     def get_object(self):
-        return get_object_or_404(TaskBlock, pk=self.request.data.get("block"))
+        if not hasattr(self, "block"):
+            blocks = TaskBlock.objects.select_for_update().filter(task=self.task)
+            self.block = get_object_or_404(blocks, pk=self.request.data.get("block"))
+        return self.block
+
+    def update(self, request, *args, **kwargs):
+        # access is checked before anything about the block (even its version) is revealed
+        self.task = self.get_task(request.data.get("task"))
+        with transaction.atomic():
+            block = self.get_object()
+
+            version = request.data.get("version")
+            if "patch" in request.data and version is None:
+                return Response({"version": "Required with patch"}, status=status.HTTP_400_BAD_REQUEST)
+            if version is not None and str(version) != str(block.version):
+                return Response(
+                    {"detail": "Block was changed in the meantime", "version": block.version},
+                    status=status.HTTP_409_CONFLICT,
+                )
+
+            if "patch" in request.data:
+                return self.patch_content(block, request.data["patch"])
+
+            return super().update(request, *args, **kwargs)
+
+    def patch_content(self, block, patch):
+        previous_content = block.content
+        try:
+            block.content = apply_patch(block.content, patch)
+        except JsonPatchConflict as e:
+            return Response({"patch": str(e), "version": block.version}, status=status.HTTP_409_CONFLICT)
+        except JsonPatchError as e:
+            return Response({"patch": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        block.version += 1
+        # content edits are recorded as revisions, not as full history rows
+        block.skip_history_when_saving = True
+        block.save(update_fields=["content", "version", "updated_at"])
+        record_revisions([(block, previous_content)], self.request.user)
+        TaskSearchDocument.refresh([block.task_id])
+
+        WebsocketHelper.send(
+            channel=f"{self.task.id}",
+            event_name="block_patched",
+            data={"block": str(block.id), "patch": patch, "version": block.version},
+        )
+        return Response({"id": str(block.id), "version": block.version}, status=status.HTTP_200_OK)
 
     def perform_update(self, serializer):
-        task = self.get_task(self.request.data.get("task"))
-        block = serializer.save()
+        previous_content = serializer.instance.content
+        serializer.instance.skip_history_when_saving = True
+        block = serializer.save(version=serializer.instance.version + 1)
+        record_revisions([(block, previous_content)], self.request.user)
+        TaskSearchDocument.refresh([block.task_id])
 
         WebsocketHelper.send(
-            channel=f"{task.id}",
+            channel=f"{self.task.id}",
             event_name="block_updated",
             data={"updated_block": TaskBlockWebsocketSerializer(block).data},
         )
@@ -373,90 +522,188 @@ class TaskBlockDelete(generics.DestroyAPIView, TaskAccessMixin):
         task = self.get_task(self.request.data.get("task"))
         block.is_archived = True
         block.save()
+        TaskSearchDocument.refresh([block.task_id])
 
-        # Move all following blocks position back one level
-        blocks_to_move = task.blocks.filter(is_archived=False, position__gt=block.position)
-        blocks_to_move_ids = [block.id for block in blocks_to_move]
-
-        blocks_to_move.update(position=F("position") - 1)
-
+        # positions are sparse so the remaining blocks keep theirs
         WebsocketHelper.send(
             channel=f"{task.id}",
             event_name="block_archived",
             data={
                 "archived_block": str(block.id),
-                "changed_positions": {
-                    str(block.id): block.position for block in task.blocks.filter(id__in=blocks_to_move_ids)
-                },
+                "changed_positions": {},
             },
         )
 
 
+class TaskBlockBatch(APIView, TaskAccessMixin):
+    """
+    Apply ordered `operations` to blocks of one task in a single transaction and send one websocket event.
+    Each operation has `op` (create, update, move or delete) and the same fields as the single block endpoints
+    (update accepts `patch` too and requires `version` of blocks which existed before the batch),
+    `block` of a block created earlier in the batch can be referenced when create got an `id`.
+    """
+
+    permission_classes = (IsAuthenticated,)
+    max_operations = 1000
+
+    def apply_operation(self, batch, operation):
+        op = operation.get("op")
+        if op == "create":
+            serializer = TaskBlockOperationSerializer(data=operation)
+            serializer.is_valid(raise_exception=True)
+            fields = dict(serializer.validated_data)
+            if operation.get("id"):
+                fields["id"] = uuid.UUID(str(operation["id"]))
+                if fields["id"] in batch.created or TaskBlock.objects.filter(pk=fields["id"]).exists():
+                    raise ValidationError({"id": f"Block {fields['id']} already exists"})
+            return batch.create(fields.pop("position", len(batch.blocks)), **fields)
+
+        if op == "update":
+            block = batch.get_block(operation.get("block"))
+            if "version" not in operation and block.id not in batch.created:
+                raise ValidationError({"version": "Required for blocks which existed before the batch"})
+            batch.check_version(block, operation.get("version"))
+            serializer = TaskBlockOperationSerializer(block, data=operation, partial=True)
+            serializer.is_valid(raise_exception=True)
+            fields = dict(serializer.validated_data)
+            fields.pop("position", None)
+            if "patch" in operation:
+                try:
+                    fields["content"] = apply_patch(fields.get("content", block.content), operation["patch"])
+                except JsonPatchConflict as e:
+                    raise BlockVersionConflict(str(e), batch.initial_versions.get(block.id, block.version))
+            return batch.update(block.id, **fields)
+
+        if op == "move":
+            return batch.move(operation.get("block"), int(operation.get("position")))
+
+        if op == "delete":
+            return batch.delete(operation.get("block"))
+
+        raise ValidationError({"op": f"Unknown operation: {op}"})
+
+    def post(self, request, *args, **kwargs):
+        task = self.get_task(request.data.get("task"))
+        operations = request.data.get("operations")
+        if not isinstance(operations, list) or len(operations) > self.max_operations:
+            return Response(
+                {"operations": f"List of at most {self.max_operations} operations is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        with transaction.atomic():
+            batch = BlockBatch(task, request.user)
+            for index, operation in enumerate(operations):
+                try:
+                    self.apply_operation(batch, operation)
+                except ValidationError as e:
+                    return Response({"index": index, "errors": e.detail}, status=status.HTTP_400_BAD_REQUEST)
+                except BlockVersionConflict as e:
+                    return Response(
+                        {"index": index, "detail": str(e), "version": e.version}, status=status.HTTP_409_CONFLICT
+                    )
+                except (KeyError, TypeError, ValueError, AttributeError) as e:
+                    return Response({"index": index, "errors": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            batch.save()
+
+        data = {
+            "created_blocks": TaskBlockWebsocketSerializer(batch.created.values(), many=True).data,
+            "updated_blocks": TaskBlockWebsocketSerializer(batch.updated.values(), many=True).data,
+            "archived_blocks": [str(block_id) for block_id in batch.archived],
+            "changed_positions": batch.changed_positions(),
+        }
+        WebsocketHelper.send(channel=f"{task.id}", event_name="blocks_batch", data=data)
+
+        return Response(data, status=status.HTTP_200_OK)
+
+
 class TaskBlockMove(APIView, TaskAccessMixin):
     permission_classes = (IsAuthenticated,)
 
     def post(self, request, *args, **kwargs):
         task = self.get_task(self.request.data.get("task"))
         block = get_object_or_404(TaskBlock, pk=self.request.data.get("block"))
-        new_position = self.request.data.get("position")
+        new_index = self.request.data.get("position")
 
         try:
-            new_position = int(new_position)
-        except ValueError:
+            new_index = int(new_index)
+        except (TypeError, ValueError):
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
-        blocks_count = task.blocks.filter(is_archived=False).order_by("position").distinct().count()
-        if new_position > blocks_count:
-            new_position = blocks_count - 1
-
-        if new_position < 0:
-            new_position = 0
-
         with transaction.atomic():
-            old_position = block.position
-
-            block.position = new_position
+            block.position, changed_positions = position_at_index(
+                task.blocks.filter(is_archived=False).exclude(id=block.id), new_index
+            )
             block.save()
 
-            if old_position < new_position:
-                blocks_to_move = task.blocks.filter(
-                    is_archived=False,
-                    position__gt=old_position,
-                    position__lte=new_position,
-                )
-                blocks_to_move_ids = [block.id for block in blocks_to_move]
-                blocks_to_move.exclude(id=block.id).update(position=F("position") - 1)
-            else:
-                blocks_to_move = task.blocks.filter(
-                    is_archived=False,
-                    position__lt=old_position,
-                    position__gte=new_position,
-                )
-                blocks_to_move_ids = [block.id for block in blocks_to_move]
-                blocks_to_move.exclude(id=block.id).update(position=F("position") + 1)
-
-            WebsocketHelper.send(
-                channel=f"{task.id}",
-                event_name="block_moved",
-                data={
-                    "changed_positions": {
-                        str(block.id): block.position for block in task.blocks.filter(id__in=blocks_to_move_ids)
-                    },
-                },
-            )
+        changed_positions[str(block.id)] = block.position
+        WebsocketHelper.send(
+            channel=f"{task.id}",
+            event_name="block_moved",
+            data={"changed_positions": changed_positions},
+        )
 
         return Response(status=status.HTTP_200_OK)
 
 
-class LogList(generics.ListAPIView):
+class TaskBlockRevisionList(generics.ListAPIView):
+    permission_classes = (IsAuthenticated,)
+    serializer_class = TaskBlockRevisionSerializer
+
+    def get_queryset(self):
+        block = get_object_or_404(TaskBlock.objects.select_related("task"), pk=self.kwargs.get("block"))
+        if not HasTaskAccess().has_object_permission(self.request, self, block.task):
+            raise PermissionDenied()
+
+        return block.revisions.select_related("user").order_by("-number")
+
+
+class TaskBlockRevisionDetail(generics.RetrieveAPIView):
+    """Revision with its content and a JSON Patch from the previous revision, both rebuilt on request"""
+
+    permission_classes = (IsAuthenticated,)
+    serializer_class = TaskBlockRevisionSerializer
+    queryset = TaskBlockRevision.objects.select_related("block__task", "user")
+
+    def retrieve(self, request, *args, **kwargs):
+        revision = self.get_object()
+        if not HasTaskAccess().has_object_permission(request, self, revision.block.task):
+            raise PermissionDenied()
+
+        content = revision_content(revision.block_id, revision.number)
+        previous_content = revision_content(revision.block_id, revision.number - 1) if revision.number > 1 else {}
+
+        data = self.get_serializer(revision).data
+        data["content"] = content
+        data["diff"] = make_patch(previous_content, content)
+        return Response(data)
+
+
+class LogList(LogPeriodMixin, generics.ListAPIView):
+    """
+    Logs visible to the user. Pass `created_at_after` / `created_at_before` to read only matching partitions
+    and `cursor` (empty for the first page) to switch to keyset pagination instead of page numbers.
+    """
+
     permission_classes = (IsAuthenticated,)
     serializer_class = LogListSerializer
     filter_backends = [DjangoFilterBackend, OrderingFilter, SearchFilter]
     filterset_class = LogFilter
     search_fields = ["message"]
+    ordering_fields = ["created_at", "message", "event_type"]
 
-    def get_queryset(self):
-        return Log.objects.filter(
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            if LogCursorPagination.cursor_query_param in self.request.query_params:
+                self._paginator = LogCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def filter_visible(self, source):
+        return source.filter(
             Q(user=self.request.user)
             | Q(task__owner=self.request.user)
             | Q(task__permissions__user=self.request.user)
@@ -464,6 +711,26 @@ class LogList(generics.ListAPIView):
             | Q(project__permissions__user=self.request.user)
         )
 
+    def get_queryset(self):
+        return self.filter_visible(Log.objects.all())
+
+    def refine_log_source(self, source):
+        source = self.filter_visible(source)
+        filterset = LogFilter(self.request.query_params, queryset=source, request=self.request)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+
+        return SearchFilter().filter_queryset(self.request, filterset.qs, self)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_log_queryset(self.refine_log_source)
+        if not isinstance(self.paginator, LogCursorPagination):
+            queryset = OrderingFilter().filter_queryset(request, queryset, self)
+
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
 
 class TaskSessionDetail(generics.RetrieveUpdateAPIView):
     permission_classes = (IsAuthenticated,)
@@ -476,25 +743,18 @@ class TaskSessionDetail(generics.RetrieveUpdateAPIView):
         return queryset
 
     def perform_update(self, serializer):
-        instance = self.get_object()
-        previous_data = TaskWorkSession.objects.get(pk=instance.pk)
+        previous_values = snapshot_fields(serializer.instance, ["started_at", "stopped_at"])
         tws = serializer.save()
 
-        fields_to_check = [
-            "started_at",
-            "stopped_at",
-        ]
-
-        for field in fields_to_check:
-            new_value = getattr(tws, field)
-            old_value = getattr(previous_data, field)
-            if new_value != old_value:
-                Log.objects.create(
-                    task=instance.task,
-                    user=self.request.user,
-                    message=f"TaskWorkSession updated by {self.request.user.username}. "
-                    f"{field} changed from {old_value} to {new_value}",
-                )
+        changes = changed_fields(tws, previous_values)
+        if changes:
+            write_log(
+                event_type=Log.EventType.WORK_SESSION_UPDATED,
+                task=tws.task,
+                user=self.request.user,
+                message=f"TaskWorkSession updated by {self.request.user.username}. {describe_changes(tws, changes)}",
+                payload={"changes": changes, "session": tws.id},
+            )
 
 
 class TaskSessionList(generics.ListCreateAPIView):
@@ -517,6 +777,33 @@ class TaskSessionList(generics.ListCreateAPIView):
         return work_sessions
 
 
+class TimesheetExport(APIView):
+    """
+    Work sessions visible to the user with their user, task and project, streamed as CSV or XLSX (`file_format`).
+    Filtered like task sessions plus `project`, `start_date` and `end_date` (of started_at).
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        file_format = request.GET.get("file_format", "csv")
+        if file_format not in TIMESHEET_FORMATS:
+            raise ValidationError({"file_format": f"Has to be one of: {', '.join(TIMESHEET_FORMATS)}"})
+
+        user = request.user
+        shared = TaskAccess.objects.filter(task=OuterRef("task"), user=user)
+        sessions = TaskWorkSession.objects.filter(Q(user=user) | Q(task__owner=user) | Exists(shared))
+        filterset = TimesheetFilter(request.GET, queryset=sessions)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+
+        response = StreamingHttpResponse(
+            timesheet_chunks(filterset.qs, file_format), content_type=TIMESHEET_FORMATS[file_format]
+        )
+        response["Content-Disposition"] = f'attachment; filename="timesheet.{file_format}"'
+        return response
+
+
 class CommentList(generics.ListCreateAPIView):
     permission_classes = (IsAuthenticated,)
     serializer_class = CommentListSerializer
@@ -559,6 +846,35 @@ class CommentDetail(generics.RetrieveUpdateAPIView):
     queryset = Comment.objects.all()
 
 
+class TagCountList(generics.ListAPIView):
+    """
+    Tags linked to a task, project or note the user can see with their maintained counters, most used first,
+    `search` matches the start of the name
+    """
+
+    permission_classes = (IsAuthenticated,)
+    serializer_class = TagCountSerializer
+    filter_backends = [SearchFilter, OrderingFilter]
+    search_fields = ["^name"]
+    ordering_fields = ["name", "task_count", "project_count", "note_count"]
+
+    def get_queryset(self):
+        user = self.request.user
+        tasks = Task.objects.filter(
+            Q(owner=user) | Q(permissions__user=user) | Q(project__owner=user) | Q(project__permissions__user=user)
+        )
+        projects = Project.objects.filter(Q(owner=user) | Q(permissions__user=user))
+        return (
+            Tag.objects.filter(
+                Exists(TaskTag.objects.filter(tag=OuterRef("pk"), task__in=tasks.values("pk")))
+                | Exists(ProjectTag.objects.filter(tag=OuterRef("pk"), project__in=projects.values("pk")))
+                | Exists(NoteTag.objects.filter(tag=OuterRef("pk"), note__user=user))
+            )
+            .annotate(total_count=F("task_count") + F("project_count") + F("note_count"))
+            .order_by("-total_count", "name")
+        )
+
+
 class NoteList(generics.ListCreateAPIView):
     permission_classes = (IsAuthenticated,)
     serializer_class = NoteSerializer
@@ -632,7 +948,8 @@ class AttachmentList(generics.ListCreateAPIView):
 
     def perform_create(self, serializer):
         attachment = serializer.save(owner=self.request.user)
-        Log.objects.create(
+        write_log(
+            event_type=Log.EventType.ATTACHMENT_ADDED,
             task=attachment.task,
             user=self.request.user,
             message=f"New attachment ({attachment.name}) to the task by {attachment.user}",
@@ -709,7 +1026,8 @@ class TaskAccessList(generics.ListCreateAPIView):
         if self.request.user != serializer.validated_data["task"].owner:
             raise PermissionDenied()
         task_access = serializer.save()
-        Log.objects.create(
+        write_log(
+            event_type=Log.EventType.TASK_ACCESS_GRANTED,
             task=task_access.task,
             user=self.request.user,
             message=f"New user assigned to the task: {task_access.user}",
@@ -735,7 +1053,8 @@ class TaskAccessDetail(generics.RetrieveDestroyAPIView):
     queryset = TaskAccess.objects.all()
 
     def perform_destroy(self, instance):
-        Log.objects.create(
+        write_log(
+            event_type=Log.EventType.TASK_ACCESS_REVOKED,
             task=instance.task,
             user=self.request.user,
             message=f"User unassigned from the task: {instance.user}",
@@ -746,47 +1065,41 @@ class TaskAccessDetail(generics.RetrieveDestroyAPIView):
 
 
 class TaskPositionChangeView(APIView):
-    def post(self, request, pk):
-        # This might need rethinking since it requires quite a lot of updates.
-        # Position is absolute within ALL projects so when the system grows each change will take more time
-        # maybe it should work on 'previous/next' task logic - but that makes queries more difficult
-        # what can break here is when reordering positions inside a project how will it relate to all positions
-
-        # current solution takes task_above_id - if it's None it's going to be first ... but now what if
-        # that's inside a project... should I have a separate one for within the project ... it's going to be
-        # quite messy, also how this impacts if other users have other tasks - not visible to the current user
+    """
+    Move a task right below `task_above_id`, or to the top when it's empty.
+    With `project` the top means the top of that project, the rest of the tasks keep their place.
+    Only the moved task is updated, `rebalance_task_ranks` command shortens the keys once they get long.
+    """
 
-        # I already have a new model - UserTaskQueue which should sort that out per user so this is still confusing
+    def post(self, request, pk):
+        task = get_object_or_404(Task, pk=pk)
+        if not user_can_see_task(request.user, task):
+            raise PermissionDenied()
 
-        tasks = Task.objects.filter(is_closed=False).order_by("position")
-        task = Task.objects.get(pk=pk)
+        other_ranks = Task.objects.exclude(pk=task.pk).values_list("rank", flat=True)
         task_above_id = request.data.get("task_above_id")
-        print(f"Task above id found: {task_above_id}")
-
-        task_above = Task.objects.get(pk=task_above_id) if task_above_id else None
-
-        if not task_above:
-            task.position = 0
-            task.save()
+        if task_above_id:
+            rank_above = get_object_or_404(Task.objects.exclude(pk=task.pk), pk=task_above_id).rank
+            rank_below = other_ranks.filter(rank__gt=rank_above).order_by("rank").first()
+        else:
+            scope = other_ranks
+            if request.data.get("project"):
+                scope = scope.filter(project=request.data.get("project"))
 
-        position_counter = 1
-        for ta in tasks:
-            print(f"{ta.title} | {ta.position} | {ta.id}")
+            rank_below = scope.order_by("rank").first()
+            rank_above = other_ranks.filter(rank__lt=rank_below).order_by("-rank").first() if rank_below else None
 
-            if ta == task:
-                if not task_above:
-                    continue
-                else:
-                    ta.position = task_above.position + 1
-                    print("\t Setting position to one above ")
-            else:
-                position_counter += 2
-                ta.position = position_counter
-                print(f"\t Setting position to {ta.position}")
-            ta.save()
+        task.rank = rank_between(rank_above, rank_below)
+        Task.objects.filter(pk=task.pk).update(rank=task.rank)
 
-        # TODO: create log entry
-        return JsonResponse({"test": task_above_id})
+        write_log(
+            event_type=Log.EventType.TASK_UPDATED,
+            task=task,
+            user=request.user,
+            message=f"Task moved by {request.user.username}",
+            payload={"rank": task.rank, "task_above": task_above_id},
+        )
+        return JsonResponse({"id": str(task.id), "rank": task.rank})
 
 
 class TaskStartWorkView(APIView):
@@ -795,14 +1108,10 @@ class TaskStartWorkView(APIView):
         # TODO: add tests
 
         task = Task.objects.get(pk=pk)
+        twa = start_work(request.user, task)
 
-        for tws in TaskWorkSession.objects.filter(user=request.user, stopped_at__isnull=True):
-            tws.stopped_at = now()
-            tws.save()
-
-        twa = TaskWorkSession.objects.create(task=task, user=request.user, started_at=now())
-
-        Log.objects.create(
+        write_log(
+            event_type=Log.EventType.WORK_STARTED,
             task=task,
             user=request.user,
             message=f"User {request.user} started working on this task.",
@@ -825,7 +1134,7 @@ class TaskCloseView(APIView):
         if task.owner != request.user:
             raise Exception("Only task owner can close the task")
 
-        Log.objects.create(task=task, user=self.request.user, message="Task closed")
+        write_log(event_type=Log.EventType.TASK_CLOSED, task=task, user=self.request.user, message="Task closed")
         if request.data.get("closing_message"):
             comment = Comment.objects.create(
                 task=task,
@@ -849,7 +1158,7 @@ class TaskUnCloseView(APIView):
         if task.owner != request.user:
             raise Exception("Only task owner can close the task")
 
-        Log.objects.create(task=task, user=self.request.user, message="Task unclosed")
+        write_log(event_type=Log.EventType.TASK_UNCLOSED, task=task, user=self.request.user, message="Task unclosed")
         task.is_closed = False
         task.archived_at = None
         task.save()
@@ -862,12 +1171,10 @@ class TaskStopWorkView(APIView):
         # TODO: permissions check, add log
 
         task = Task.objects.get(pk=pk)
-        tws = TaskWorkSession.objects.filter(user=request.user, task=task, stopped_at__isnull=True).first()
+        tws = stop_work(request.user, task=task)
         if tws:
-            tws.stopped_at = now()
-            tws.save()
-
-            Log.objects.create(
+            write_log(
+                event_type=Log.EventType.WORK_STOPPED,
                 task=task,
                 user=request.user,
                 message=f"User {request.user} stopped working on this task.",
@@ -892,19 +1199,21 @@ class CurrentTaskView(APIView):
         if request.GET.get("user"):
             user = User.objects.get(pk=request.GET.get("user"))
 
-        task_work_session = TaskWorkSession.objects.filter(user=user, stopped_at__isnull=True).last()
+        active = active_session(user)
 
         response = {}
-        if not task_work_session:
+        if not active or not active[1]:
             return JsonResponse(response)
 
-        if not user_can_see_task(user, task_work_session.task):
+        # the cached session may point to a task deleted in the meantime
+        task = Task.objects.select_related("owner", "responsible", "project__owner").filter(pk=active[1]).first()
+        if not task or not user_can_see_task(user, task):
             return JsonResponse(response)
 
-        if not user_can_see_task(request.user, task_work_session.task):
+        if not user_can_see_task(request.user, task):
             return JsonResponse(response)
 
-        serializer = TaskReadOnlySerializer(task_work_session.task, context={"request": request})
+        serializer = TaskReadOnlySerializer(task, context={"request": request})
         response = serializer.data
         return JsonResponse(response)
 
@@ -1032,9 +1341,11 @@ class UserTaskQueueManageView(APIView):
         if request_user:
             user = User.objects.get(pk=request_user)
 
-        Log.objects.create(task=task, user=self.request.user, message="Task added to queue")
+        write_log(
+            event_type=Log.EventType.QUEUE_ADDED, task=task, user=self.request.user, message="Task added to queue"
+        )
 
-        UserTaskQueue.objects.get_or_create(task=task, user=user)
+        UserTaskQueue.objects.get_or_create(task=task, user=user, defaults={"priority": top_priority(user)})
         return JsonResponse({"status": "OK"})
 
     def delete(self, request, pk):
@@ -1059,7 +1370,8 @@ class UserTaskQueueManageView(APIView):
         if utq.exists():
             utq.delete()
 
-        Log.objects.create(
+        write_log(
+            event_type=Log.EventType.QUEUE_REMOVED,
             task=task,
             user=self.request.user,
             message="Task removed from queue",
@@ -1070,28 +1382,37 @@ class UserTaskQueueManageView(APIView):
 
 class UserTaskQueuePositionChangeView(APIView):
     def post(self, request, pk):
-        # TODO: permissions + logs
+        utq = get_object_or_404(UserTaskQueue, pk=pk, user=request.user)
+        user_task_above_id = request.data.get("task_above_id")
+        utq_above = None
+        if user_task_above_id:
+            utq_above = get_object_or_404(
+                UserTaskQueue.objects.exclude(pk=utq.pk), pk=user_task_above_id, user=utq.user
+            )
 
-        utq = UserTaskQueue.objects.get(pk=pk)
-        data = json.loads(request.body)
-        user_task_above_id = data.get("task_above_id")
-        sorted_tasks = []
+        utq.priority = priority_below(utq, utq_above)
+        UserTaskQueue.objects.filter(pk=utq.pk).update(priority=utq.priority)
 
-        if not user_task_above_id:
-            sorted_tasks.append(utq)
+        return JsonResponse({"status": "OK"})
 
-        user = utq.user
 
-        for ut in UserTaskQueue.objects.filter(user=user).exclude(id=utq.id).order_by("-priority"):
-            sorted_tasks.append(ut)
-            if user_task_above_id == ut.id:
-                sorted_tasks.append(utq)
+class UserTaskQueueOrderView(APIView):
+    """Set the whole order of user's queue at once, `ids` are UserTaskQueue ids, most important first"""
+
+    def post(self, request):
+        ids = request.data.get("ids")
+        if not isinstance(ids, list):
+            return Response({"ids": "List of queue ids is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        queue = {
+            str(utq.id): utq for utq in UserTaskQueue.objects.filter(user=request.user).order_by("-priority", "id")
+        }
+        if len(set(map(str, ids))) != len(ids) or not set(map(str, ids)) <= queue.keys():
+            return Response({"ids": "Unknown or duplicate queue ids"}, status=status.HTTP_400_BAD_REQUEST)
 
-        counter = len(sorted_tasks)
-        for st in sorted_tasks:
-            counter -= 1
-            st.priority = counter
-            st.save()
+        # rows missing in the list (e.g. closed tasks hidden from the queue view) stay below in their order
+        ordered = [queue.pop(str(utq_id)) for utq_id in ids]
+        apply_queue_order(ordered + list(queue.values()))
 
         return JsonResponse({"status": "OK"})
 
@@ -1113,7 +1434,8 @@ class ReminderListView(generics.ListCreateAPIView):
 
     def perform_create(self, serializer):
         reminder = serializer.save(created_by=self.request.user)
-        Log.objects.create(
+        write_log(
+            event_type=Log.EventType.REMINDER_CREATED,
             task=reminder.task,
             user=self.request.user,
             message=f"Reminder created for {self.request.user} on {reminder.reminder_date}",
@@ -1126,7 +1448,8 @@ class ReminderCloseView(APIView):
         reminder = Reminder.objects.get(pk=pk)
         reminder.closed_at = now()
         reminder.save()
-        Log.objects.create(
+        write_log(
+            event_type=Log.EventType.REMINDER_CLOSED,
             task=reminder.task,
             user=self.request.user,
             message=f"Reminder closed for {self.request.user}",
@@ -1149,7 +1472,12 @@ class ChangeTaskOwnerView(APIView):
         new_owner = User.objects.get(pk=new_owner_id)
         task.owner = new_owner
         task.save()
-        Log.objects.create(task=task, user=request.user, message="Owner of the task changed")
+        write_log(
+            event_type=Log.EventType.TASK_OWNER_CHANGED,
+            task=task,
+            user=request.user,
+            message="Owner of the task changed",
+        )
         return JsonResponse({"status": "OK"})
 
 
@@ -1167,7 +1495,8 @@ class ChangeProjectOwnerView(APIView):
         new_owner = User.objects.get(pk=new_owner_id)
         project.owner = new_owner
         project.save()
-        Log.objects.create(
+        write_log(
+            event_type=Log.EventType.PROJECT_OWNER_CHANGED,
             project=project,
             user=request.user,
             message="Owner of the project changed",
@@ -1280,59 +1609,59 @@ class PinBoardDetail(generics.GenericAPIView):
 
 
 class WorkSessionsBreakdownView(APIView):
-    permission_classes = (IsAuthenticated,)  # TODO: Are we sure about that?
+    """
+    Totals per day and per task of one or more users (`user_ids`, or `user_id`) for local days of `timezone`,
+    overall and per user, followed by the streamed list of sessions (`events`).
+    """
+
+    permission_classes = (IsAuthenticated,)
 
     def post(self, request):
         serializer = WorkSessionsBreakdownInputSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-
-        work_sessions = TaskWorkSession.objects.filter(
-            Q(started_at__date__gte=serializer.data.get("start_date"))
-            & Q(stopped_at__date__lte=serializer.data.get("end_date"))
-            & Q(user_id=serializer.data.get("user_id"))
+        user_ids, tz = serializer.validated_data["user_ids"], serializer.validated_data["timezone"]
+        start_date, end_date = serializer.validated_data["start_date"], serializer.validated_data["end_date"]
+
+        hidden = set(user_ids) - visible_user_ids(request.user, user_ids)
+        if hidden:
+            raise PermissionDenied(f"Not allowed to see work of users: {', '.join(sorted(map(str, hidden)))}")
+
+        totals = breakdown(user_ids, start_date, end_date, tz)
+        days, tasks = defaultdict(int), defaultdict(int)
+        for user_totals in totals.values():
+            for date, seconds in user_totals["days"].items():
+                days[date] += seconds
+            for task_name, seconds in user_totals["tasks"].items():
+                tasks[task_name] += seconds
+
+        summary = self.format_totals(days, tasks)
+        summary["users"] = {
+            str(user_id): self.format_totals(user_totals["days"], user_totals["tasks"])
+            for user_id, user_totals in totals.items()
+        }
+
+        events = (
+            overlapping_sessions(user_ids, start_date, end_date, tz).select_related("task").order_by("started_at", "id")
         )
-        s = WorkSessionsWSBSerializer(work_sessions, many=True)
-
-        work_sessions_annotated = work_sessions.annotate(
-            date=F("started_at__date"),
-            task_name=F("task__title"),
-        ).order_by("date")
-
-        # Create entries maps
-        sessions_by_day = defaultdict(list)  # date as key
-        tasks_total = defaultdict(int)  # task name as key
-
-        for session in work_sessions_annotated:
-            date_as_key = session.started_at.strftime("%Y-%m-%d")
-            sessions_by_day[date_as_key].append(session)
-            tasks_total[session.task_name] += session.total_time
-
-        # Calculate daily totals
-        sessions_by_day_total = defaultdict(lambda: {"total": 0})
-        for date, day_data in sessions_by_day.items():
-            day_total = sum([entry.total_time for entry in day_data])
-            day_total_h, day_total_m, _ = time_from_seconds(day_total)
-            sessions_by_day_total[date] = f"{day_total_h:02}:{day_total_m:02}"
-
-        # Format task totals
-        for task_name, task_total in tasks_total.items():
-            task_total_h, task_total_m, _ = time_from_seconds(task_total)
-            tasks_total[task_name] = f"{task_total_h:02}:{task_total_m:02}"
-
-        # Overall total across all tasks
-        total_time_sum = work_sessions.aggregate(time_sum=Sum("total_time")).get("time_sum")
-        total_hours, total_minutes, _ = time_from_seconds(total_time_sum)
-        total_time_sum_str = f"{total_hours:02}:{total_minutes:02}"
+        return StreamingHttpResponse(self.stream(summary, events, tz), content_type="application/json")
 
-        return Response(
-            data={
-                "events": s.data,
-                "total_sum": total_time_sum_str,
-                "sessions_by_day": sessions_by_day_total,
-                "tasks_total": tasks_total,
-            },
-            status=status.HTTP_200_OK,
-        )
+    @staticmethod
+    def format_totals(days, tasks):
+        return {
+            "total_sum": format_duration(sum(days.values())),
+            "sessions_by_day": {date: format_duration(seconds) for date, seconds in sorted(days.items())},
+            "tasks_total": {task_name: format_duration(seconds) for task_name, seconds in tasks.items()},
+        }
+
+    @staticmethod
+    def stream(summary, events, tz):
+        """The summary object with `events` as the last key, written one session at a time"""
+        yield json.dumps(summary)[:-1] + ', "events": ['
+        with timezone.override(tz):
+            for index, event in enumerate(events.iterator(chunk_size=500)):
+                event_data = WorkSessionsWSBSerializer(event).data
+                yield ("," if index else "") + json.dumps(event_data, cls=DjangoJSONEncoder)
+        yield "]}"
 
 
 class BoardList(generics.ListCreateAPIView):
@@ -1351,13 +1680,21 @@ class BoardList(generics.ListCreateAPIView):
 
     def perform_create(self, serializer):
         board = serializer.save()
-        Log.objects.create(
+        write_log(
+            event_type=Log.EventType.BOARD_CREATED,
             board=board,
             user=self.request.user,
             message=f"Board {board.name} created by {self.request.user}",
         )
 
 
+def card_items_for_serializer(items):
+    """`items` ordered by position with everything CardItemReadOnlySerializer reads joined"""
+    return items.order_by("position", "id").select_related(
+        "task__owner", "task__responsible", "task__project__owner", "project__owner", "board"
+    )
+
+
 class BoardDetail(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = (IsOwnerOrReadOnly,)
 
@@ -1365,8 +1702,30 @@ class BoardDetail(generics.RetrieveUpdateDestroyAPIView):
         boards = Board.objects.filter(
             Q(id=self.kwargs["pk"]) & (Q(owner=self.request.user) | Q(board_users__user=self.request.user))
         ).distinct()
+        if self.request.method == "GET" and self.is_summary():
+            cards = Card.objects.order_by("position", "id").annotate(item_count=Count("card_items"))
+            boards = boards.prefetch_related(Prefetch("cards", queryset=cards))
+        elif self.request.method == "GET":
+            # cards and items in two queries with everything the nested serializers read joined
+            cards = Card.objects.order_by("position", "id").prefetch_related(
+                Prefetch("card_items", queryset=card_items_for_serializer(CardItem.objects.all()))
+            )
+            boards = boards.prefetch_related(Prefetch("cards", queryset=cards))
         return boards
 
+    def is_summary(self):
+        """`summary=true` returns the cards with their number of items only"""
+        return self.request.query_params.get("summary", "").lower() in ("1", "true")
+
+    def retrieve(self, request, *args, **kwargs):
+        board = self.get_object()
+        context = self.get_serializer_context()
+        if self.is_summary():
+            return Response(BoardSummarySerializer(board, context=context).data)
+
+        context.update(BoardReadonlySerializer.bulk_context(board, request.user))
+        return Response(BoardReadonlySerializer(board, context=context).data)
+
     def get_serializer_class(self):
         if self.request.method == "GET":
             return BoardReadonlySerializer
@@ -1374,7 +1733,8 @@ class BoardDetail(generics.RetrieveUpdateDestroyAPIView):
 
     def perform_update(self, serializer):
         board = serializer.save()
-        Log.objects.create(
+        write_log(
+            event_type=Log.EventType.BOARD_UPDATED,
             board=serializer.instance,
             user=self.request.user,
             message=f"Board {board.name} updated by {self.request.user}",
@@ -1384,7 +1744,8 @@ class BoardDetail(generics.RetrieveUpdateDestroyAPIView):
         if CardItem.objects.filter(card__board=instance).exists():
             raise PermissionDenied("Cannot remove a board that contains items")
 
-        Log.objects.create(
+        write_log(
+            event_type=Log.EventType.BOARD_DELETED,
             board=instance,
             user=self.request.user,
             message=f"Board {instance.name} deleted by {self.request.user}",
@@ -1392,7 +1753,72 @@ class BoardDetail(generics.RetrieveUpdateDestroyAPIView):
         instance.delete()
 
 
-class BoardLogList(APIView):
+class BoardLayout(APIView):
+    """
+    Apply the order of cards and of items in cards (moves between cards included) from one drag and drop
+    session. Only rows whose card or position changed are written, with one log entry for all of them.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def put(self, request, pk, *args, **kwargs):
+        board = Board.objects.filter(Q(owner=request.user) | Q(board_users__user=request.user)).filter(id=pk).first()
+        if not board:
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        serializer = BoardLayoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        layout = serializer.validated_data["cards"]
+
+        with transaction.atomic():
+            cards = {card.id: card for card in Card.objects.select_for_update().filter(board=board)}
+            items = {item.id: item for item in CardItem.objects.select_for_update().filter(card__board=board)}
+            if set(cards) != {card["id"] for card in layout}:
+                raise ValidationError({"cards": "Has to list every card of the board"})
+            if set(items) != {item_id for card in layout for item_id in card["items"]}:
+                raise ValidationError({"cards": "Has to list every item of the board"})
+
+            changed_cards, changed_items = [], []
+            for card_position, card_layout in enumerate(layout):
+                card = cards[card_layout["id"]]
+                if card.position != card_position:
+                    card.position = card_position
+                    changed_cards.append(card)
+
+                for item_position, item_id in enumerate(card_layout["items"]):
+                    item = items[item_id]
+                    if item.card_id != card.id or item.position != item_position:
+                        item.card_id, item.position = card.id, item_position
+                        changed_items.append(item)
+
+            if not changed_cards and not changed_items:
+                return Response(status=status.HTTP_304_NOT_MODIFIED)
+
+            Card.objects.bulk_update(changed_cards, ["position"])
+            CardItem.objects.bulk_update(changed_items, ["card", "position"])
+
+        send_board_event(
+            board.id,
+            "board_layout_changed",
+            {
+                "cards": {str(card.id): card.position for card in changed_cards},
+                "card_items": {
+                    str(item.id): {"card": item.card_id, "position": item.position} for item in changed_items
+                },
+            },
+        )
+
+        write_log(
+            event_type=Log.EventType.BOARD_LAYOUT_CHANGED,
+            board=board,
+            user=request.user,
+            message=f"{len(changed_cards)} cards and {len(changed_items)} items moved by {request.user}",
+            payload={"cards": [card.id for card in changed_cards], "items": [item.id for item in changed_items]},
+        )
+        return Response({"cards": len(changed_cards), "items": len(changed_items)}, status=status.HTTP_200_OK)
+
+
+class BoardLogList(LogPeriodMixin, APIView):
     permission_classes = (IsAuthenticated,)
 
     def get(self, request, pk, *args, **kwargs):
@@ -1400,7 +1826,7 @@ class BoardLogList(APIView):
         if not board:
             return Response(status=status.HTTP_403_FORBIDDEN)
 
-        logs = Log.objects.filter(board=board).order_by("-created_at")
+        logs = self.get_log_queryset(lambda source: source.filter(board=board))
         serializer = LogListSerializer(logs, many=True)
         return JsonResponse({"results": serializer.data}, status=status.HTTP_200_OK)
 
@@ -1446,7 +1872,8 @@ class BoardUserView(APIView):
         serializer.is_valid(raise_exception=True)
         serializer.save()
 
-        Log.objects.create(
+        write_log(
+            event_type=Log.EventType.BOARD_USER_ADDED,
             board=board,
             user=self.request.user,
             message=f"{user} added to board by {self.request.user}",
@@ -1468,7 +1895,8 @@ class BoardUserView(APIView):
 
         BoardUser.objects.filter(Q(user=user) & Q(board_id=board_id)).delete()
 
-        Log.objects.create(
+        write_log(
+            event_type=Log.EventType.BOARD_USER_REMOVED,
             board=board,
             user=self.request.user,
             message=f"{user} removed from board by {self.request.user}",
@@ -1487,11 +1915,13 @@ class CardCreate(generics.CreateAPIView):
             raise PermissionDenied()
         card = serializer.save()
 
-        Log.objects.create(
+        write_log(
+            event_type=Log.EventType.CARD_CREATED,
             board=board,
             user=self.request.user,
             message=f"Card {card.name} created by {self.request.user}",
         )
+        send_board_event(board.id, "card_created", {"card": CardSerializer(card).data})
 
 
 class CardDetail(
@@ -1508,21 +1938,25 @@ class CardDetail(
 
     def perform_update(self, serializer):
         card = serializer.save()
-        Log.objects.create(
+        write_log(
+            event_type=Log.EventType.CARD_UPDATED,
             board=card.board,
             user=self.request.user,
             message=f"Card {card.name} created by {self.request.user}",
         )
+        send_board_event(card.board_id, "card_updated", {"card": CardSerializer(card).data})
 
     def perform_destroy(self, instance):
         if CardItem.objects.filter(card=instance).exists():
             raise PermissionDenied("Cannot remove a card that contains items")
 
-        Log.objects.create(
+        write_log(
+            event_type=Log.EventType.CARD_DELETED,
             board=instance.board,
             user=self.request.user,
             message=f"Card {instance.name} deleted by {self.request.user}",
         )
+        send_board_event(instance.board_id, "card_deleted", {"card": instance.id})
         instance.delete()
 
 
@@ -1562,7 +1996,13 @@ class CardMove(APIView):
             card.position = new_position
             card.save()
 
-        Log.objects.create(
+            moved = card.board.cards.filter(
+                position__gte=min(old_position, new_position), position__lte=max(old_position, new_position)
+            )
+            send_board_event(card.board_id, "card_moved", {"changed_positions": positions(moved)})
+
+        write_log(
+            event_type=Log.EventType.CARD_MOVED,
             board=card.board,
             user=self.request.user,
             message=f"Card {card.name} moved by {self.request.user}",
@@ -1580,11 +2020,13 @@ class CardItemCreate(generics.CreateAPIView):
         if not card.board.user_has_board_access(self.request.user):
             raise PermissionDenied()
         card_item = serializer.save()
-        Log.objects.create(
+        write_log(
+            event_type=Log.EventType.CARD_ITEM_CREATED,
             board=card.board,
             user=self.request.user,
             message=f"{card_item.get_log_label()} created by {self.request.user}",
         )
+        send_board_event(card.board_id, "card_item_created", {"card_item": CardItemSerializer(card_item).data})
 
 
 class CardItemDetail(
@@ -1601,21 +2043,52 @@ class CardItemDetail(
 
     def perform_update(self, serializer):
         card_item = serializer.save()
-        Log.objects.create(
+        write_log(
+            event_type=Log.EventType.CARD_ITEM_UPDATED,
             board=card_item.card.board,
             user=self.request.user,
             message=f"{card_item.get_log_label()} edited by {self.request.user}",
         )
+        send_board_event(
+            card_item.card.board_id, "card_item_updated", {"card_item": CardItemSerializer(card_item).data}
+        )
 
     def perform_destroy(self, instance):
-        Log.objects.create(
+        write_log(
+            event_type=Log.EventType.CARD_ITEM_DELETED,
             board=instance.card.board,
             user=self.request.user,
             message=f"{instance.get_log_label()} deleted by {self.request.user}",
         )
+        send_board_event(
+            instance.card.board_id, "card_item_deleted", {"card_item": instance.id, "card": instance.card_id}
+        )
         instance.delete()
 
 
+class CardItemList(generics.ListAPIView):
+    """Items of a card a page at a time, `cursor` of the next page is in `next`"""
+
+    permission_classes = (IsAuthenticated,)
+    serializer_class = CardItemReadOnlySerializer
+    pagination_class = PositionCursorPagination
+
+    def list(self, request, *args, **kwargs):
+        card = (
+            Card.objects.filter(Q(board__owner=request.user) | Q(board__board_users__user=request.user))
+            .filter(id=self.kwargs["pk"])
+            .first()
+        )
+        if not card:
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        items = card_items_for_serializer(card.card_items.all())
+        page = self.paginate_queryset(items)
+        context = self.get_serializer_context()
+        context.update(CardItemReadOnlySerializer.bulk_context(page, request.user))
+        return self.get_paginated_response(CardItemReadOnlySerializer(page, many=True, context=context).data)
+
+
 class CardItemMove(APIView):  # Change Item position (or card)
     def put(self, request, *args, **kwargs):
         card_item_id = request.data.get("item")
@@ -1658,7 +2131,21 @@ class CardItemMove(APIView):  # Change Item position (or card)
                 card_item.position = new_position
                 card_item.save()
 
-                Log.objects.create(
+                send_board_event(
+                    new_card.board_id,
+                    "card_item_moved",
+                    {
+                        "card_item": card_item.id,
+                        "card": new_card.id,
+                        "changed_positions": {
+                            str(old_card.id): positions(old_card.card_items.filter(position__gte=new_position)),
+                            str(new_card.id): positions(new_card.card_items.filter(position__gte=new_position)),
+                        },
+                    },
+                )
+
+                write_log(
+                    event_type=Log.EventType.CARD_ITEM_MOVED,
                     board=old_card.board,
                     user=self.request.user,
                     message="{} moved to new card ({}) by {}".format(
@@ -1688,7 +2175,21 @@ class CardItemMove(APIView):  # Change Item position (or card)
                 card_item.position = new_position
                 card_item.save()
 
-                Log.objects.create(
+                moved = card_item.card.card_items.filter(
+                    position__gte=min(old_position, new_position), position__lte=max(old_position, new_position)
+                )
+                send_board_event(
+                    card_item.card.board_id,
+                    "card_item_moved",
+                    {
+                        "card_item": card_item.id,
+                        "card": card_item.card_id,
+                        "changed_positions": {str(card_item.card_id): positions(moved)},
+                    },
+                )
+
+                write_log(
+                    event_type=Log.EventType.CARD_ITEM_MOVED,
                     board=card_item.card.board,
                     user=self.request.user,
                     message=f"{card_item.get_log_label()} moved by {self.request.user}",
@@ -1703,9 +2204,9 @@ class SideAppHomeView(APIView):
             data = json.loads(request.body)
         except json.decoder.JSONDecodeError:
             _msg = "Invalid POST request (not JSON)"
-            # Log.objects.create(user=request.user, message=_msg)
+            # write_log(user=request.user, message=_msg)
             return JsonResponse({"error": _msg}, status=400)
-        # Log.objects.create(user=request.user, message=f"Debug {data}")
+        # write_log(user=request.user, message=f"Debug {data}")
 
         beacon_id = data.get("beacon", data.get("beacon_id"))
 
@@ -1725,7 +2226,7 @@ class SideAppHomeView(APIView):
 
         if quick_action:
             try:
-                Log.objects.create(user=request.user, message=f"Debug {quick_action}")
+                write_log(user=request.user, message=f"Debug {quick_action}")
             except Exception as ex:
                 return JsonResponse({"error": f"{ex}"})
 
@@ -1751,12 +2252,12 @@ class SideAppHomeView(APIView):
 
         response = {"instant_actions": buttons, "currently_working_on": None}
 
-        task_work_session = TaskWorkSession.objects.filter(user=user, stopped_at__isnull=True).last()
-        if task_work_session:
-            response["currently_working_on"] = {
-                "id": f"{task_work_session.task.id}",
-                "title": task_work_session.task.title,
-            }
+        active = active_session(user)
+        if active and active[1]:
+            # the cached session may point to a task deleted in the meantime
+            title = Task.objects.filter(pk=active[1]).values_list("title", flat=True).first()
+            if title is not None:
+                response["currently_working_on"] = {"id": f"{active[1]}", "title": title}
 
         beacon = Beacon.objects.filter(user=user, confirmed_at__isnull=True).first()
         if beacon:
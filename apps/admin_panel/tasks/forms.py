@@ -18,7 +18,6 @@ class TaskForm(forms.ModelForm):
             "description",
             "project",
             "tag",
-            "position",
             "parent_task",
             "owner",
             "responsible",
@@ -36,7 +35,6 @@ class TaskForm(forms.ModelForm):
             "title": forms.TextInput(attrs={"class": "form-control"}),
             "description": forms.Textarea(attrs={"class": "form-control"}),
             "tag": forms.TextInput(attrs={"class": "form-control"}),
-            "position": forms.NumberInput(attrs={"class": "form-control"}),
             "progress": forms.NumberInput(attrs={"class": "form-control", "min": "0", "max": "100"}),
             "eta_date": forms.DateInput(attrs={"class": "form-control", "type": "date"}),
             "estimated_work_hours": forms.NumberInput(attrs={"class": "form-control", "step": "0.1"}),
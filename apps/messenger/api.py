@@ -1,7 +1,6 @@
-from collections import defaultdict
 from datetime import datetime, timezone
 
-from django.db.models import DateTimeField, OuterRef, Q, Subquery
+from django.db.models import Count, DateTimeField, F, FilteredRelation, Max, OuterRef, Q, Subquery
 from django.db.models.functions import Coalesce
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
@@ -17,7 +16,7 @@ from core.models import ProjectAccess, TaskAccess, User
 from core.utils.websockets import WebsocketHelper
 
 from .filters import MessageFilter
-from .models import Message, Thread, ThreadAck
+from .models import Message, Thread, ThreadReadState
 from .serializers import (
     MessageSerializer,
     MessengerProjectSerializer,
@@ -28,6 +27,9 @@ from .serializers import (
     UserThreadsSerializer,
 )
 
+# messages of a thread annotated with the `read_state` of a user that were sent since the user last saw the thread
+UNREAD_MESSAGES = Q(read_state__seen_at__isnull=True) | Q(messages__created_at__gte=F("read_state__seen_at"))
+
 
 class PaginatedResponseMixin:
     def paginate_queryset(self, queryset):
@@ -57,6 +59,19 @@ class UserThreadsMixin:
 
         return Thread.objects.filter(Q(project_id__in=accessible_project_ids) | Q(task_id__in=accessible_task_ids))
 
+    @staticmethod
+    def _with_unread(threads, user):
+        """
+        Annotate `unread_count` and `last_unread_message_date` of messages of others the user did not see yet, joining
+        the read state of the user instead of looking it up per thread
+        """
+        threads = threads.annotate(read_state=FilteredRelation("read_states", condition=Q(read_states__user=user)))
+        unread = UNREAD_MESSAGES & ~Q(messages__sender=user)
+        return threads.annotate(
+            unread_count=Count("messages", filter=unread),
+            last_unread_message_date=Max("messages__created_at", filter=unread),
+        )
+
 
 class UserThreadsView(APIView, UserThreadsMixin, PaginatedResponseMixin):
     permission_classes = [IsAuthenticated]
@@ -89,45 +104,32 @@ class UserThreadsView(APIView, UserThreadsMixin, PaginatedResponseMixin):
         if query:
             chat_users = chat_users.filter(username__icontains=query)
 
-        min_utc_aware = datetime.min.replace(tzinfo=timezone.utc)
-        response_data = defaultdict(
-            lambda: {"unread_count": 0, "last_unread_message_date": datetime.min.replace(tzinfo=timezone.utc)},
-        )
-        chat_users_threads = self._get_threads_for_users(list(chat_users))
-
-        for thread in chat_users_threads.prefetch_related("messages").all():
-            thread_ack = ThreadAck.objects.filter(thread=thread.id, user=user).order_by("-created_at").first()
-            seen_at = thread_ack.seen_at if thread_ack else min_utc_aware
-            for message in thread.messages.all():
-                if message.sender not in chat_users:
-                    continue
-
-                if message.created_at >= seen_at:
-                    response_data[message.sender]["unread_count"] += 1
-                    response_data[message.sender]["last_unread_message_date"] = max(
-                        response_data[message.sender]["last_unread_message_date"],
-                        message.created_at,
-                    )
-                else:
-                    response_data[message.sender]["unread_count"] += 0
+        chat_users = list(chat_users)
+        chat_users_threads = self._get_threads_for_users(chat_users)
+
+        # messages since the requester last saw their thread are unread (all of them when never seen)
+        seen_at = ThreadReadState.objects.filter(thread=OuterRef("thread"), user=user).values("seen_at")
+        unread_by_sender = {
+            row["sender"]: row
+            for row in Message.objects.filter(thread__in=chat_users_threads, sender__in=chat_users)
+            .annotate(seen_at=Subquery(seen_at, output_field=DateTimeField()))
+            .filter(Q(seen_at__isnull=True) | Q(created_at__gte=F("seen_at")))
+            .order_by()
+            .values("sender")
+            .annotate(unread_count=Count("id"), last_unread_message_date=Max("created_at"))
+        }
 
+        response_data = []
         for chat_user in chat_users:
-            if chat_user not in response_data:
-                response_data[chat_user] = {"unread_count": 0, "last_unread_message_date": None}
-
-        response_data.pop(user, None)
-        response_data = dict(response_data)
-        sorted_response_data = dict(
-            sorted(response_data.items(), key=lambda item: item[1]["unread_count"], reverse=True)
-        )
-        response_data = [
-            {
-                "user": MessengerUserSerializer(user).data,
-                "unread_count": data["unread_count"],
-                "last_unread_message_date": data["last_unread_message_date"] if data["unread_count"] > 0 else None,
-            }
-            for user, data in sorted_response_data.items()
-        ]
+            unread = unread_by_sender.get(chat_user.id, {"unread_count": 0, "last_unread_message_date": None})
+            response_data.append(
+                {
+                    "user": MessengerUserSerializer(chat_user).data,
+                    "unread_count": unread["unread_count"],
+                    "last_unread_message_date": unread["last_unread_message_date"],
+                }
+            )
+        response_data.sort(key=lambda item: item["unread_count"], reverse=True)
         return Response(response_data)
 
 
@@ -141,9 +143,8 @@ class AllThreadsView(APIView, UserThreadsMixin, PaginatedResponseMixin):
         )
 
         return (
-            super()
-            ._get_threads_for_user(user)
-            .prefetch_related("messages")
+            self._with_unread(super()._get_threads_for_user(user), user)
+            .select_related("project", "task__project")
             .annotate(
                 latest_message_created_at=Coalesce(
                     Subquery(latest_message_date, output_field=DateTimeField()),
@@ -161,19 +162,15 @@ class AllThreadsView(APIView, UserThreadsMixin, PaginatedResponseMixin):
         min_utc_aware = datetime.min.replace(tzinfo=timezone.utc)
         response_data = []
         for thread in paginated_threads:
-            thread_ack = ThreadAck.objects.filter(thread=thread.id, user=user).order_by("-created_at").first()
-            seen_at = thread_ack.seen_at if thread_ack else min_utc_aware
-            messages = thread.messages.filter(created_at__gte=seen_at).exclude(sender=user).order_by("-created_at")
-            recent_message = messages.first()
             thread_other_participants = [u for u in thread.participants if u != user]
             response_data.append(
                 {
-                    "unread_count": messages.count(),
+                    "unread_count": thread.unread_count,
                     "project": MessengerProjectSerializer(thread.project or thread.task.project).data,
                     "task": MessengerTaskSerializer(thread.task).data if thread.task else None,
                     "type": "project" if thread.project else "task",
                     "name": thread.project.title if thread.project else thread.task.title,
-                    "last_unread_message_date": recent_message and recent_message.created_at,
+                    "last_unread_message_date": thread.last_unread_message_date,
                     "thread": str(thread.id),
                     "participants": MessengerUserSerializer(thread_other_participants, many=True).data,
                 }
@@ -191,32 +188,28 @@ class UnreadThreadsView(APIView, UserThreadsMixin):
 
     def get(self, request, *args, **kwargs):
         user = request.user
-        # Get all threads and direct threads of the user
-        min_utc_aware = datetime.min.replace(tzinfo=timezone.utc)
         response_data = []
 
-        threads = self._get_threads_for_user(user)
-        for thread in threads.prefetch_related("messages").all():
-            thread_ack = ThreadAck.objects.filter(thread=thread.id, user=user).order_by("-created_at").first()
-            seen_at = thread_ack.seen_at if thread_ack else min_utc_aware
-            messages = thread.messages.filter(created_at__gte=seen_at).exclude(sender=user).order_by("-created_at")
-            if not messages.exists():
-                continue
-
+        threads = (
+            self._with_unread(self._get_threads_for_user(user), user)
+            .filter(unread_count__gt=0)
+            .select_related("project", "task__project")
+            .order_by("-last_unread_message_date")
+        )
+        for thread in threads:
             response_data.append(
                 {
-                    "unread_count": messages.count(),
+                    "unread_count": thread.unread_count,
                     "project": MessengerProjectSerializer(thread.project or thread.task.project).data,
                     "task": MessengerTaskSerializer(thread.task).data if thread.task else None,
                     "type": "project" if thread.project else "task",
                     "name": thread.project.title if thread.project else thread.task.title,
-                    "last_unread_message_date": messages.first().created_at,
+                    "last_unread_message_date": thread.last_unread_message_date,
                     "thread": str(thread.id),
                 }
             )
 
-        sorted_response_data = sorted(response_data, key=lambda item: item["last_unread_message_date"], reverse=True)
-        return Response(sorted_response_data, status=status.HTTP_200_OK)
+        return Response(response_data, status=status.HTTP_200_OK)
 
 
 class ThreadViewByUser(APIView, UserThreadsMixin):
@@ -231,16 +224,19 @@ class ThreadViewByUser(APIView, UserThreadsMixin):
 
         requester_threads_qs = self._get_threads_for_user(requester)
         user_threads_qs = self._get_threads_for_user(thread_user)
-        common_threads_qs = requester_threads_qs & user_threads_qs
-        min_utc_aware = datetime.min.replace(tzinfo=timezone.utc)
+        common_threads_qs = (
+            (requester_threads_qs & user_threads_qs)
+            .annotate(
+                read_state=FilteredRelation("read_states", condition=Q(read_states__user=requester)),
+                unread_count=Count("messages", filter=UNREAD_MESSAGES),
+            )
+            .select_related("project", "task__project")
+        )
         response_data = []
-        for thread in common_threads_qs.iterator():
-            thread_ack = ThreadAck.objects.filter(thread=thread.id, user=requester).order_by("-created_at").first()
-            seen_at = thread_ack.seen_at if thread_ack else min_utc_aware
-            messages = thread.messages.filter(created_at__gte=seen_at)
+        for thread in common_threads_qs:
             response_data.append(
                 {
-                    "unread_count": messages.count(),
+                    "unread_count": thread.unread_count,
                     "project": MessengerProjectSerializer(thread.project or thread.task.project).data,
                     "task": MessengerTaskSerializer(thread.task).data if thread.task else None,
                     "type": "project" if thread.project else "task",
@@ -270,6 +266,7 @@ class ThreadView(APIView, UserThreadsMixin, PaginatedResponseMixin):
     def get(self, request, thread_id, *args, **kwargs):
         thread = self._get_thread(thread_id)
         messages = Message.objects.filter(thread=thread)
+        ThreadReadState.mark_seen(thread.id, request.user.id, datetime.now(timezone.utc))
 
         paginated_messages, paginator = self.paginate_queryset(messages)
         serializer = self.serializer_class(paginated_messages, many=True)
@@ -286,7 +283,7 @@ class ThreadView(APIView, UserThreadsMixin, PaginatedResponseMixin):
         if serializer.is_valid():
             message = serializer.save(sender=user)
             self._send_message_to_channel(message, thread)
-            self._create_thread_ack(thread, user)
+            ThreadReadState.mark_seen(thread.id, user.id, datetime.now(timezone.utc))
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -299,9 +296,6 @@ class ThreadView(APIView, UserThreadsMixin, PaginatedResponseMixin):
             data={"content": f"{message.content}", "sender": f"{message.sender.id}"},
         )
 
-    def _create_thread_ack(self, thread, user):
-        ThreadAck.objects.create(thread=thread, user=user, seen_at=datetime.now(timezone.utc))
-
 
 class MessageSearchView(APIView, UserThreadsMixin, PaginatedResponseMixin):
     permission_classes = [IsAuthenticated]
@@ -0,0 +1,62 @@
+# Generated by Django 5.1.7 on 2026-10-19 01:03
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_read_states(apps, schema_editor):
+    ThreadAck = apps.get_model("messenger", "ThreadAck")
+    ThreadReadState = apps.get_model("messenger", "ThreadReadState")
+
+    # the latest ack of a thread and user is its read state
+    seen_at = {}
+    acks = ThreadAck.objects.order_by("created_at").values_list("thread", "user", "seen_at")
+    for thread_id, user_id, ack_seen_at in acks.iterator():
+        seen_at[thread_id, user_id] = ack_seen_at
+    ThreadReadState.objects.bulk_create(
+        [
+            ThreadReadState(thread_id=thread_id, user_id=user_id, seen_at=ack_seen_at)
+            for (thread_id, user_id), ack_seen_at in seen_at.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("messenger", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ThreadReadState",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("seen_at", models.DateTimeField()),
+                (
+                    "thread",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="read_states", to="messenger.thread"
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="+", to=settings.AUTH_USER_MODEL
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(fields=("thread", "user"), name="messenger_threadreadstate_uniq")
+                ],
+            },
+        ),
+        migrations.RunPython(fill_read_states, migrations.RunPython.noop),
+    ]
@@ -60,6 +60,31 @@ class ThreadAck(BaseModel):
     class Meta:
         ordering = ["-created_at"]
 
+    def save(self, *args, **kwargs):
+        # acks are kept as history, unread counts are read from the read state of the thread
+        super().save(*args, **kwargs)
+        ThreadReadState.mark_seen(self.thread_id, self.user_id, self.seen_at)
+
+
+class ThreadReadState(BaseModel):
+    """When a user last saw a thread, one row per thread and user updated in place"""
+
+    thread = models.ForeignKey(Thread, on_delete=models.CASCADE, related_name="read_states")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    seen_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["thread", "user"], name="messenger_threadreadstate_uniq")]
+
+    @classmethod
+    def mark_seen(cls, thread_id, user_id, seen_at):
+        cls.objects.bulk_create(
+            [cls(thread_id=thread_id, user_id=user_id, seen_at=seen_at)],
+            update_conflicts=True,
+            unique_fields=["thread", "user"],
+            update_fields=["seen_at", "updated_at"],
+        )
+
 
 class DirectThread(BaseModel):
     users = models.ManyToManyField(User, related_name="threads")
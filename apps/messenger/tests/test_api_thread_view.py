@@ -4,7 +4,7 @@ import pytest
 from django.urls import reverse
 from rest_framework import status
 
-from apps.messenger.models import Message
+from apps.messenger.models import Message, ThreadAck, ThreadReadState
 
 
 @pytest.mark.django_db
@@ -46,6 +46,26 @@ def test_thread_view_post_message(make_auth_client, make_user, make_project, mak
     assert Message.objects.filter(thread=thread, content="New message").exists()
 
 
+@pytest.mark.django_db
+def test_thread_view_updates_read_state(make_auth_client, make_user, make_project, make_task, make_thread):
+    user = make_user()
+    auth_client = make_auth_client(user=user)
+    project = make_project(owner=user)
+    task = make_task(project=project, members=[user])
+    thread = make_thread(task=task)
+    url = reverse("thread", kwargs={"thread_id": thread.id})
+
+    auth_client.get(url)
+    seen_at = ThreadReadState.objects.get(thread=thread, user=user).seen_at
+    auth_client.post(url, data={"content": "First"})
+    auth_client.post(url, data={"content": "Second"})
+
+    read_state = ThreadReadState.objects.get(thread=thread, user=user)
+    assert read_state.seen_at > seen_at
+    assert read_state.seen_at >= Message.objects.get(content="Second").created_at
+    assert not ThreadAck.objects.exists()
+
+
 @pytest.mark.django_db
 def test_thread_view_permission_denied(make_auth_client, make_user, make_project, make_task, make_thread):
     user = make_user()
@@ -1,4 +1,6 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 
@@ -60,3 +62,34 @@ def test_unread_threads_view_with_task(
     assert response_data[0]["type"] == "task"
     assert response_data[0]["name"] == task.title
     assert response_data[0]["last_unread_message_date"] == message.created_at.isoformat().replace("+00:00", "Z")
+
+
+@pytest.mark.django_db
+def test_unread_threads_view_queries_do_not_grow_with_threads(
+    make_auth_client, make_user, make_project, make_task, make_thread, make_message, make_thread_ack
+):
+    user = make_user()
+    other_user = make_user()
+    auth_client = make_auth_client(user=user)
+    project = make_project(owner=user, members=[other_user])
+
+    def get_unread_threads():
+        with CaptureQueriesContext(connection) as queries:
+            response = auth_client.get(reverse("unread-threads"))
+        assert response.status_code == status.HTTP_200_OK
+        return len([query for query in queries if "silk_" not in query["sql"]]), response.json()
+
+    make_message(thread=make_thread(project=project), sender=other_user)
+    queries, _ = get_unread_threads()
+
+    for _ in range(3):
+        thread = make_thread(task=make_task(project=project, owner=user))
+        make_message(thread=thread, sender=other_user)
+        make_thread_ack(thread=thread, user=user)
+        make_thread_ack(thread=thread, user=user)
+        make_message(thread=thread, sender=other_user)
+        make_message(thread=thread, sender=user)
+
+    more_queries, response_data = get_unread_threads()
+    assert more_queries == queries
+    assert sorted(item["unread_count"] for item in response_data) == [1, 1, 1, 1]
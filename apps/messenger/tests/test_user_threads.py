@@ -1,6 +1,8 @@
 from time import sleep
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from freezegun import freeze_time
 from rest_framework import status
@@ -147,3 +149,43 @@ def test_user_threads_with_query_filter(
     response_data = response.json()
     assert len(response_data) == 1
     assert response_data[0]["user"]["username"] == "bob_jones"
+
+
+@pytest.mark.django_db
+def test_user_threads_queries_do_not_grow_with_threads(
+    make_auth_client,
+    make_user,
+    make_thread,
+    make_message,
+    make_project,
+    make_task,
+    make_thread_ack,
+):
+    user = make_user()
+    thread_user1 = make_user()
+    thread_user2 = make_user()
+    auth_client = make_auth_client(user=user)
+
+    def count_queries():
+        with CaptureQueriesContext(connection) as queries:
+            response = auth_client.get(reverse("users"))
+        assert response.status_code == status.HTTP_200_OK
+        return len([query for query in queries if "silk_" not in query["sql"]]), response.json()
+
+    project = make_project(owner=user, members=[thread_user1, thread_user2])
+    make_message(thread=make_thread(project=project), sender=thread_user1)
+    queries, _ = count_queries()
+
+    for _ in range(3):
+        thread = make_thread(task=make_task(owner=user, project=project, members=[thread_user1, thread_user2]))
+        make_message(thread=thread, sender=thread_user1)
+        make_thread_ack(thread=thread, user=user)
+        make_message(thread=thread, sender=thread_user2)
+        make_message(thread=thread, sender=user)
+
+    more_queries, response_data = count_queries()
+    assert more_queries == queries
+    assert [(item["user"]["id"], item["unread_count"]) for item in response_data] == [
+        (str(thread_user2.id), 3),
+        (str(thread_user1.id), 1),
+    ]
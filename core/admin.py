@@ -3,6 +3,8 @@ from django.contrib.auth.admin import UserAdmin as DjangoUserAdmin
 from django.contrib.auth.models import Group
 from simple_history.admin import SimpleHistoryAdmin
 
+from core.utils.block_revisions import record_revisions
+
 from .models import (
     Attachment,
     Beacon,
@@ -12,6 +14,7 @@ from .models import (
     CardItem,
     Comment,
     Log,
+    LogArchive,
     Note,
     Notification,
     NotificationAck,
@@ -19,10 +22,13 @@ from .models import (
     Project,
     ProjectAccess,
     Reminder,
+    Tag,
     Task,
     TaskAccess,
     TaskBlock,
+    TaskBlockRevision,
     TaskChecklistItem,
+    TaskSearchDocument,
     TaskWorkSession,
     Team,
     User,
@@ -97,6 +103,7 @@ class LogAdmin(admin.ModelAdmin):
         "project",
         "comment",
         "action",
+        "event_type",
         "created_at",
         "archived_at",
     )
@@ -106,9 +113,18 @@ class LogAdmin(admin.ModelAdmin):
         "project",
         "comment",
         "action",
+        "event_type",
         "created_at",
         "archived_at",
     )
+    date_hierarchy = "created_at"
+    # counting a whole partitioned table on every changelist page is the slowest part of it
+    show_full_result_count = False
+
+
+@admin.register(LogArchive)
+class LogArchiveAdmin(LogAdmin):
+    pass
 
 
 @admin.register(Project)
@@ -184,6 +200,39 @@ class TaskBlockAdmin(SimpleHistoryAdmin):
     )
     list_filter = ("task", "block_type", "created_by")
 
+    def save_model(self, request, obj, form, change):
+        previous_content = TaskBlock.objects.get(pk=obj.pk).content if change else None
+        super().save_model(request, obj, form, change)
+        if previous_content != obj.content:
+            record_revisions([(obj, previous_content)], request.user)
+        TaskSearchDocument.refresh([obj.task_id])
+
+
+@admin.register(TaskBlockRevision)
+class TaskBlockRevisionAdmin(admin.ModelAdmin):
+    list_display = (
+        "block",
+        "number",
+        "version",
+        "user",
+        "is_keyframe",
+        "created_at",
+        "updated_at",
+    )
+    list_filter = ("is_keyframe", "user")
+
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = (
+        "name",
+        "task_count",
+        "project_count",
+        "note_count",
+    )
+    search_fields = ("name",)
+    readonly_fields = ("task_count", "project_count", "note_count")
+
 
 @admin.register(TaskAccess)
 class TaskAccessAdmin(admin.ModelAdmin):
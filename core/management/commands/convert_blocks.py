@@ -3,7 +3,8 @@ import json
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
-from core.models import Log, Task, TaskBlock, User
+from core.models import Log, Task, TaskBlock, TaskSearchDocument, User
+from core.utils.block_positions import BLOCK_POSITION_GAP
 
 
 class Command(BaseCommand):
@@ -30,7 +31,7 @@ class Command(BaseCommand):
                                 task=task,
                                 block_type=TaskBlock.BlockTypeChoices.MARKDOWN,
                                 content={"markdown": block_data.get("content")},
-                                position=i,
+                                position=(i + 1) * BLOCK_POSITION_GAP,
                                 created_by=task.owner,
                             )
                         elif block_type == "image":
@@ -38,7 +39,7 @@ class Command(BaseCommand):
                                 task=task,
                                 block_type=TaskBlock.BlockTypeChoices.IMAGE,
                                 content={"path": block_data.get("path")},
-                                position=i,
+                                position=(i + 1) * BLOCK_POSITION_GAP,
                                 created_by=task.owner,
                             )
                         elif block_type == "checklist":
@@ -49,7 +50,7 @@ class Command(BaseCommand):
                                     "title": block_data.get("title"),
                                     "elements": block_data.get("elements"),
                                 },
-                                position=i,
+                                position=(i + 1) * BLOCK_POSITION_GAP,
                                 created_by=task.owner,
                             )
                         else:
@@ -61,6 +62,7 @@ class Command(BaseCommand):
 
                     with transaction.atomic():
                         TaskBlock.objects.bulk_create(blocks)
+                        TaskSearchDocument.refresh([task.id])
                         self.stdout.write(
                             self.style.SUCCESS(f"Successfully converted {len(blocks)} blocks for task {task.id}")
                         )
@@ -1,53 +1,56 @@
+import logging
 import random
-from datetime import timedelta
+import sched
+import time
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
-from django.utils import timezone
+from django.db import close_old_connections
 
-from core.models import Beacon, Log, TaskWorkSession, User
+from core.utils.beacons import create_beacons, expire_beacons
+
+logger = logging.getLogger(__name__)
 
 
 class Command(BaseCommand):
+    help = "Creates beacons for users working on tasks and stops work of users not confirming them in time"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--daemon", action="store_true", help="Keep running and repeat every --interval seconds")
+        parser.add_argument("--interval", type=int, default=60, help="Seconds between runs in daemon mode")
+
     def handle(self, *args, **options):
-        """This command would run via cron or periodic task every minute or so,
-        but Beacons are to be created randomly for user"""
-        beacon_time_cutoff = random.randint(
-            settings.CREATE_BEACONS_INTERVAL_TIME_MIN, settings.CREATE_BEACONS_INTERVAL_TIME_MAX
-        )
-
-        cutoff_time = timezone.now() - timedelta(minutes=beacon_time_cutoff)
-        for tws in TaskWorkSession.objects.filter(
-            stopped_at__isnull=True, started_at__lte=cutoff_time, user__use_beacons=True
-        ):
-            if Beacon.objects.filter(user=tws.user, confirmed_at__isnull=True).exists():
-                continue
-
-            last_beacon = Beacon.objects.filter(user=tws.user).order_by("-created_at").first()
-
-            if (
-                last_beacon
-                and last_beacon.confirmed_at
-                and last_beacon.confirmed_at >= timezone.now() - timedelta(minutes=beacon_time_cutoff)
-            ):
-                continue
-
-            beacon = Beacon.objects.create(user=tws.user)
-            print(f"Beacon {beacon.id} created for {tws.user}")
-
-        # find active Beacons if older than 10 mins - stop working on task
-        cutoff_time = timezone.now() - timedelta(minutes=settings.CREATE_BEACONS_ALLOWED_CLICK_TIME)
-        for beacon in Beacon.objects.filter(confirmed_at__isnull=True, created_at__lte=cutoff_time):
-            Beacon.close_for_user(beacon.user)
-
-            tws = TaskWorkSession.objects.filter(user=beacon.user, stopped_at__isnull=True).first()
-            if tws:
-                tws.stopped_at = timezone.now()
-                tws.save()
-
-                _msg = f"Beacon not confirmed in time. Stopping work on task [{tws.task}] [{beacon.user}]"
-                Log.objects.create(
-                    task=tws.task,
-                    user=beacon.user,
-                    message=_msg,
-                )
+        """Runs once (from cron every minute or so) or, with --daemon, keeps running on its own schedule"""
+        if not options["daemon"]:
+            self.run()
+            return
+
+        scheduler = sched.scheduler(time.monotonic, time.sleep)
+
+        def tick(run_at):
+            try:
+                self.run()
+            except Exception as ex:
+                logger.exception(f"Creating beacons failed: {ex}")
+            finally:
+                close_old_connections()
+
+            # fixed cadence, a slow run delays the next one instead of shifting every later one
+            next_run = max(run_at + options["interval"], time.monotonic())
+            scheduler.enterabs(next_run, 1, tick, (next_run,))
+
+        scheduler.enterabs(time.monotonic(), 1, tick, (time.monotonic(),))
+        try:
+            scheduler.run()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped")
+
+    def run(self):
+        # beacons are created after a random interval of work
+        interval = random.randint(settings.CREATE_BEACONS_INTERVAL_TIME_MIN, settings.CREATE_BEACONS_INTERVAL_TIME_MAX)
+        created = create_beacons(interval)
+        if created:
+            self.stdout.write(f"Created {created} beacons")
+
+        for session in expire_beacons(settings.CREATE_BEACONS_ALLOWED_CLICK_TIME):
+            self.stdout.write(f"Beacon not confirmed in time, stopped work of {session.user} on [{session.task}]")
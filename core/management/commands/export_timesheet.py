@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.management.commands.send_user_report import valid_date
+from core.models import TaskWorkSession
+from core.utils.timesheets import FORMATS, timesheet_chunks
+
+
+class Command(BaseCommand):
+    help = "Exports work sessions with their user, task and project as CSV or XLSX"
+
+    def add_arguments(self, parser):
+        parser.add_argument("-s", "--start_date", help="Start date in format YYYY-MM-DD", type=valid_date)
+        parser.add_argument("-e", "--end_date", help="End date in format YYYY-MM-DD", type=valid_date)
+        parser.add_argument("-u", "--user", action="append", dest="usernames", help="Only sessions of this username")
+        parser.add_argument("-p", "--project", help="Only sessions on tasks of this project id")
+        parser.add_argument("-f", "--format", choices=FORMATS, default="csv", dest="file_format")
+        parser.add_argument("-o", "--output", help="File to write, standard output when not given (CSV only)")
+
+    def handle(self, *args, **options):
+        sessions = TaskWorkSession.objects.all()
+        if options["start_date"]:
+            sessions = sessions.filter(started_at__date__gte=options["start_date"].date())
+        if options["end_date"]:
+            sessions = sessions.filter(started_at__date__lte=options["end_date"].date())
+        if options["usernames"]:
+            sessions = sessions.filter(user__username__in=options["usernames"])
+        if options["project"]:
+            sessions = sessions.filter(task__project=options["project"])
+
+        chunks = timesheet_chunks(sessions, options["file_format"])
+        if options["output"] is None:
+            if options["file_format"] != "csv":
+                raise CommandError("--output is required for XLSX exports")
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+
+        with open(options["output"], "wb") as output:
+            for chunk in chunks:
+                output.write(chunk.encode() if isinstance(chunk, str) else chunk)
+
+        self.stderr.write(f"Exported timesheet to {options['output']}")
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.utils.log_partitions import (
+    add_months,
+    archive_horizon,
+    archive_logs,
+    create_partitions,
+    month_start,
+    uses_native_partitions,
+)
+
+
+class Command(BaseCommand):
+    help = "Creates upcoming monthly Log partitions (PostgreSQL) or moves old logs to the archive table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=3,
+            help="How many months after the current one should already have a partition",
+        )
+
+    def handle(self, *args, **options):
+        """Meant to run daily via cron, both branches are idempotent"""
+        if uses_native_partitions():
+            current_month = month_start(timezone.now())
+            partitions = create_partitions(current_month, add_months(current_month, options["months_ahead"]))
+            self.stdout.write(f"Log partitions ensured: {', '.join(partitions)}")
+            return
+
+        moved = archive_logs(archive_horizon())
+        self.stdout.write(f"Archived {moved} logs")
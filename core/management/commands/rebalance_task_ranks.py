@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models.functions import Length
+
+from core.models import Task
+from core.utils.ranks import evenly_spaced_ranks
+
+
+class Command(BaseCommand):
+    help = "Rewrites Task ranks to short evenly spaced keys when some of them got too long"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Rebalance even if no rank is too long")
+
+    def handle(self, *args, **options):
+        """Meant to run periodically, it doesn't touch anything until moves made some key too long"""
+        too_long = Task.objects.annotate(rank_length=Length("rank")).filter(
+            rank_length__gt=settings.TASK_RANK_MAX_LENGTH
+        )
+        if not options["force"] and not too_long.exists():
+            self.stdout.write("Task ranks are fine")
+            return
+
+        with transaction.atomic():
+            tasks = list(Task.objects.select_for_update().order_by("rank", "created_at").only("id", "rank"))
+            for task, rank in zip(tasks, evenly_spaced_ranks(len(tasks))):
+                task.rank = rank
+
+            Task.objects.bulk_update(tasks, ["rank"], batch_size=1000)
+
+        self.stdout.write(f"Rebalanced ranks of {len(tasks)} tasks")
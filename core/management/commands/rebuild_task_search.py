@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Task, TaskSearchDocument
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = "Rebuilds full-text search documents of all tasks, e.g. after tasks were changed with bulk updates"
+
+    def handle(self, *args, **options):
+        task_ids = list(Task.objects.order_by("id").values_list("id", flat=True))
+        for start in range(0, len(task_ids), BATCH_SIZE):
+            batch_end = start + BATCH_SIZE
+            TaskSearchDocument.refresh(task_ids[start:batch_end])
+
+        self.stdout.write(f"Rebuilt search documents of {len(task_ids)} tasks")
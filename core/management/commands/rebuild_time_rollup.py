@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import DailyTimeRollup
+
+
+class Command(BaseCommand):
+    help = "Recomputes logged work per user, task and day from the work sessions"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", action="append", dest="user_ids", help="Only rebuild rows of this user id")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rows = DailyTimeRollup.rebuild(user_ids=options["user_ids"])
+
+        self.stdout.write(f"Rebuilt {rows} daily time rollup rows")
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.utils.logged_time import reconcile_logged_seconds
+
+
+class Command(BaseCommand):
+    help = "Recomputes logged time totals of tasks and projects which drifted from their work sessions"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report drifted totals")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            tasks, projects = reconcile_logged_seconds(dry_run=options["dry_run"])
+
+        action = "Found" if options["dry_run"] else "Fixed"
+        self.stdout.write(f"{action} drifted totals of {tasks} tasks and {projects} projects")
@@ -2,20 +2,28 @@ import datetime
 import logging
 import uuid
 from argparse import ArgumentTypeError
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 from django.core.exceptions import ValidationError
-from django.core.mail import send_mail
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.core.management.base import BaseCommand, CommandError
 from django.core.validators import validate_email
-from django.db.models import F, Q, Sum
-from django.template.loader import render_to_string
+from django.db.models import Q
 
-from core.models import TaskWorkSession, User
+from core.models import Team, User
+from core.utils.user_reports import render_report, report_days
 
 logger = logging.getLogger(__name__)
 
 
+def is_uuid(s: str):
+    try:
+        uuid.UUID(s)
+        return True
+    except ValueError:
+        return False
+
+
 def valid_uuid4(s: str):
     try:
         return uuid.UUID(s, version=4)
@@ -38,7 +46,13 @@ def valid_email(s: str):
         raise ArgumentTypeError(f"Invalid recipient email: {s}")
 
 
+def valid_user_list(s: str):
+    return [value.strip() for value in s.split(",") if value.strip()]
+
+
 class Command(BaseCommand):
+    help = "Sends activity reports of one user, a list of users, a team or all users"
+
     def add_arguments(self, parser):
         group = parser.add_mutually_exclusive_group(required=True)
         group.add_argument(
@@ -55,6 +69,24 @@ class Command(BaseCommand):
             type=valid_uuid4,
         )
 
+        group.add_argument(
+            "--users",
+            help="Comma separated usernames or IDs of users.",
+            type=valid_user_list,
+        )
+
+        group.add_argument(
+            "--team",
+            help="Name or ID of a team, reports of its active users are sent.",
+            type=str,
+        )
+
+        group.add_argument(
+            "--all",
+            help="Send reports of all active users.",
+            action="store_true",
+        )
+
         parser.add_argument(
             "-s",
             "--start_date",
@@ -74,65 +106,107 @@ class Command(BaseCommand):
         parser.add_argument(
             "-r",
             "--recipient",
-            help="Recipient of the report email",
-            required=True,
+            help="Recipient of the report emails, each user gets their own report when not given",
             type=valid_email,
         )
 
-    def handle(self, *args, **options):
-        try:
-            if options.get("user_id"):
-                user = User.objects.get(id=options["user_id"])
-            else:
-                user = User.objects.get(username=options["username"])
-        except User.DoesNotExist:
-            raise CommandError("User does not exist for given " + "user_id" if options.get("user_id") else "uuid4")
-        except User.MultipleObjectsReturned:
-            raise CommandError("Multiple users exist for given " + "user_id" if options.get("user_id") else "uuid4")
-
-        work_sessions = TaskWorkSession.objects.filter(
-            Q(started_at__date__gte=options["start_date"]) & Q(stopped_at__date__lte=options["end_date"]) & Q(user=user)
+        parser.add_argument(
+            "-w",
+            "--workers",
+            help="Number of threads rendering reports",
+            type=int,
+            default=4,
         )
 
-        total_time_sum = work_sessions.aggregate(time_sum=Sum("total_time")).get("time_sum")
-
-        work_sessions = work_sessions.annotate(
-            date=F("started_at__date"),
-            task_name=F("task__title"),
-            project_name=F("task__project__title"),
-        ).order_by("date")
-
-        # Create date -> entries map
-        sessions_by_day = defaultdict(lambda: {"entries": [], "total": 0})
-        for session in work_sessions:
-            sessions_by_day[session.date]["entries"].append(session)
-
-        # Calculate daily totals
-        for date, day_data in sessions_by_day.items():
-            sessions_by_day[date]["total"] = sum([entry.total_time for entry in day_data["entries"]])
-
-        sessions_by_day = dict(sessions_by_day)  # Convert to dict for DTL .items call
-
-        message_content_html = render_to_string(
-            "user_report.html",
-            {
-                "total_time_sum": total_time_sum,
-                "user": user,
-                "start_date": options["start_date"],
-                "end_date": options["end_date"],
-                "sessions_by_day": sessions_by_day,
-            },
+        parser.add_argument(
+            "--dry-run",
+            help="Render the reports without sending them",
+            action="store_true",
         )
 
-        send_mail(
-            f"User report: {user.username}:{options['start_date'].date()}-{options['end_date'].date()}",
-            message_content_html,
-            None,
-            [
-                options["recipient"],
-            ],
-            fail_silently=False,
-            html_message=message_content_html,
-        )
+    def get_users(self, options):
+        if options.get("user_id") or options.get("username"):
+            try:
+                if options.get("user_id"):
+                    return [User.objects.get(id=options["user_id"])]
+                return [User.objects.get(username=options["username"])]
+            except User.DoesNotExist:
+                raise CommandError(
+                    "User does not exist for given " + ("user_id" if options.get("user_id") else "username")
+                )
+            except User.MultipleObjectsReturned:
+                raise CommandError(
+                    "Multiple users exist for given " + ("user_id" if options.get("user_id") else "username")
+                )
+
+        if options.get("users"):
+            ids = [value for value in options["users"] if is_uuid(value)]
+            users = list(User.objects.filter(Q(id__in=ids) | Q(username__in=options["users"])))
+            found = {str(user.id) for user in users} | {user.username for user in users}
+            missing = [value for value in options["users"] if value not in found]
+            if missing:
+                raise CommandError(f"Users do not exist: {', '.join(missing)}")
+            return users
+
+        users = User.objects.filter(is_active=True, archived_at__isnull=True)
+        if options.get("team"):
+            team_filter = Q(name=options["team"])
+            if is_uuid(options["team"]):
+                team_filter |= Q(id=options["team"])
+            team = Team.objects.filter(team_filter).first()
+            if team is None:
+                raise CommandError(f"Team does not exist: {options['team']}")
+            users = users.filter(teams=team)
+        return list(users)
 
-        logger.debug(message_content_html)
+    def handle(self, *args, **options):
+        users = self.get_users(options)
+        start_date, end_date = options["start_date"].date(), options["end_date"].date()
+        days = report_days([user.id for user in users], start_date, end_date)
+
+        failures = []
+        messages = []
+        with ThreadPoolExecutor(max_workers=max(options["workers"], 1)) as executor:
+            reports = executor.map(lambda user: render_report(user, start_date, end_date, days[user.id]), users)
+            for user, (subject, message_content_html) in zip(users, reports):
+                logger.debug(message_content_html)
+                recipient = options.get("recipient") or user.email
+                if not recipient:
+                    failures.append((user, "no recipient email"))
+                    continue
+
+                message = EmailMultiAlternatives(subject, message_content_html, None, [recipient])
+                message.attach_alternative(message_content_html, "text/html")
+                messages.append((user, message))
+
+        sent = 0
+        if options["dry_run"]:
+            for user, message in messages:
+                self.stdout.write(f"Would send {message.subject} to {', '.join(message.to)}")
+        else:
+            sent = self.send(messages, failures)
+
+        for user, error in failures:
+            self.stderr.write(f"Report of {user.username} failed: {error}")
+
+        self.stdout.write(f"Sent {sent} of {len(users)} reports")
+        if failures:
+            raise CommandError(f"{len(failures)} reports failed")
+
+    @staticmethod
+    def send(messages, failures):
+        """Send `messages` over one SMTP connection, collect failures per user and return the number sent"""
+        sent = 0
+        connection = get_connection(fail_silently=False)
+        connection.open()
+        try:
+            for user, message in messages:
+                message.connection = connection
+                try:
+                    message.send()
+                    sent += 1
+                except Exception as e:
+                    failures.append((user, e))
+        finally:
+            connection.close()
+        return sent
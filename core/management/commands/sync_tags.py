@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Note, NoteTag, Project, ProjectTag, Tag, Task, TaskTag
+from core.utils.hashtags import parse_tags
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = "Rebuilds tag links and counters of tasks, projects and notes from their `tag` fields"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            for model, link_model in ((Task, TaskTag), (Project, ProjectTag), (Note, NoteTag)):
+                items = model.objects.exclude(tag__isnull=True).exclude(tag="").values_list("id", "tag")
+                parsed = [(item_id, parse_tags(tag)) for item_id, tag in items.iterator()]
+
+                names = {name for _, tag_names in parsed for name in tag_names}
+                Tag.objects.bulk_create(
+                    [Tag(name=name) for name in names], ignore_conflicts=True, batch_size=BATCH_SIZE
+                )
+                tag_ids = dict(Tag.objects.filter(name__in=names).values_list("name", "id"))
+
+                link_model.objects.all().delete()
+                link_model.objects.bulk_create(
+                    [
+                        link_model(**{f"{link_model.ITEM}_id": item_id, "tag_id": tag_ids[name]})
+                        for item_id, tag_names in parsed
+                        for name in tag_names
+                    ],
+                    batch_size=BATCH_SIZE,
+                )
+                Tag.recount(link_model)
+
+                self.stdout.write(f"Linked {len(parsed)} {model._meta.verbose_name_plural} to {len(names)} tags")
@@ -0,0 +1,12 @@
+from core.utils.log_buffer import buffered_logs
+
+
+class LogBufferMiddleware:
+    """Collect all Log entries written while handling a request and store them in one query at the end"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with buffered_logs():
+            return self.get_response(request)
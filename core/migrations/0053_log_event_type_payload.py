@@ -0,0 +1,73 @@
+# Generated by Django 5.1.7 on 2026-10-18 23:25
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0052_user_use_beacons"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="log",
+            name="event_type",
+            field=models.CharField(
+                choices=[
+                    ("MESSAGE", "Message"),
+                    ("PROJECT_CREATED", "Project created"),
+                    ("PROJECT_UPDATED", "Project updated"),
+                    ("PROJECT_OWNER_CHANGED", "Project owner changed"),
+                    ("TASK_CREATED", "Task created"),
+                    ("TASK_UPDATED", "Task updated"),
+                    ("TASK_CLOSED", "Task closed"),
+                    ("TASK_UNCLOSED", "Task unclosed"),
+                    ("TASK_OWNER_CHANGED", "Task owner changed"),
+                    ("TASK_ACCESS_GRANTED", "Task access granted"),
+                    ("TASK_ACCESS_REVOKED", "Task access revoked"),
+                    ("ATTACHMENT_ADDED", "Attachment added"),
+                    ("WORK_STARTED", "Work started"),
+                    ("WORK_STOPPED", "Work stopped"),
+                    ("WORK_SESSION_UPDATED", "Work session updated"),
+                    ("QUEUE_ADDED", "Added to queue"),
+                    ("QUEUE_REMOVED", "Removed from queue"),
+                    ("REMINDER_CREATED", "Reminder created"),
+                    ("REMINDER_CLOSED", "Reminder closed"),
+                    ("BOARD_CREATED", "Board created"),
+                    ("BOARD_UPDATED", "Board updated"),
+                    ("BOARD_DELETED", "Board deleted"),
+                    ("BOARD_USER_ADDED", "Board user added"),
+                    ("BOARD_USER_REMOVED", "Board user removed"),
+                    ("CARD_CREATED", "Card created"),
+                    ("CARD_UPDATED", "Card updated"),
+                    ("CARD_DELETED", "Card deleted"),
+                    ("CARD_MOVED", "Card moved"),
+                    ("CARD_ITEM_CREATED", "Card item created"),
+                    ("CARD_ITEM_UPDATED", "Card item updated"),
+                    ("CARD_ITEM_DELETED", "Card item deleted"),
+                    ("CARD_ITEM_MOVED", "Card item moved"),
+                ],
+                default="MESSAGE",
+                max_length=30,
+            ),
+        ),
+        migrations.AddField(
+            model_name="log",
+            name="payload",
+            field=models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder),
+        ),
+        migrations.AddIndex(
+            model_name="log",
+            index=models.Index(fields=["task", "created_at"], name="core_log_task_created_at_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="log",
+            index=models.Index(fields=["project", "created_at"], name="core_log_project_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="log",
+            index=models.Index(fields=["event_type", "created_at"], name="core_log_event_created_idx"),
+        ),
+    ]
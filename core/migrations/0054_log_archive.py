@@ -0,0 +1,123 @@
+# Generated by Django 5.1.7 on 2026-10-18 23:27
+
+import django.core.serializers.json
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0053_log_event_type_payload"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LogArchive",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("message", models.TextField()),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[("CREATED", "Created"), ("EDITED", "Edited"), ("DELETED", "Deleted")], max_length=7
+                    ),
+                ),
+                ("created_at", models.DateTimeField()),
+                ("archived_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "event_type",
+                    models.CharField(
+                        choices=[
+                            ("MESSAGE", "Message"),
+                            ("PROJECT_CREATED", "Project created"),
+                            ("PROJECT_UPDATED", "Project updated"),
+                            ("PROJECT_OWNER_CHANGED", "Project owner changed"),
+                            ("TASK_CREATED", "Task created"),
+                            ("TASK_UPDATED", "Task updated"),
+                            ("TASK_CLOSED", "Task closed"),
+                            ("TASK_UNCLOSED", "Task unclosed"),
+                            ("TASK_OWNER_CHANGED", "Task owner changed"),
+                            ("TASK_ACCESS_GRANTED", "Task access granted"),
+                            ("TASK_ACCESS_REVOKED", "Task access revoked"),
+                            ("ATTACHMENT_ADDED", "Attachment added"),
+                            ("WORK_STARTED", "Work started"),
+                            ("WORK_STOPPED", "Work stopped"),
+                            ("WORK_SESSION_UPDATED", "Work session updated"),
+                            ("QUEUE_ADDED", "Added to queue"),
+                            ("QUEUE_REMOVED", "Removed from queue"),
+                            ("REMINDER_CREATED", "Reminder created"),
+                            ("REMINDER_CLOSED", "Reminder closed"),
+                            ("BOARD_CREATED", "Board created"),
+                            ("BOARD_UPDATED", "Board updated"),
+                            ("BOARD_DELETED", "Board deleted"),
+                            ("BOARD_USER_ADDED", "Board user added"),
+                            ("BOARD_USER_REMOVED", "Board user removed"),
+                            ("CARD_CREATED", "Card created"),
+                            ("CARD_UPDATED", "Card updated"),
+                            ("CARD_DELETED", "Card deleted"),
+                            ("CARD_MOVED", "Card moved"),
+                            ("CARD_ITEM_CREATED", "Card item created"),
+                            ("CARD_ITEM_UPDATED", "Card item updated"),
+                            ("CARD_ITEM_DELETED", "Card item deleted"),
+                            ("CARD_ITEM_MOVED", "Card item moved"),
+                        ],
+                        default="MESSAGE",
+                        max_length=30,
+                    ),
+                ),
+                (
+                    "payload",
+                    models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="log",
+            index=models.Index(fields=["created_at", "id"], name="core_log_created_at_id_idx"),
+        ),
+        migrations.AddField(
+            model_name="logarchive",
+            name="board",
+            field=models.ForeignKey(
+                blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name="+", to="core.board"
+            ),
+        ),
+        migrations.AddField(
+            model_name="logarchive",
+            name="comment",
+            field=models.ForeignKey(
+                blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name="+", to="core.comment"
+            ),
+        ),
+        migrations.AddField(
+            model_name="logarchive",
+            name="project",
+            field=models.ForeignKey(
+                blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name="+", to="core.project"
+            ),
+        ),
+        migrations.AddField(
+            model_name="logarchive",
+            name="task",
+            field=models.ForeignKey(
+                blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name="+", to="core.task"
+            ),
+        ),
+        migrations.AddField(
+            model_name="logarchive",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, related_name="+", to=settings.AUTH_USER_MODEL
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="logarchive",
+            index=models.Index(fields=["created_at"], name="core_logarchive_created_idx"),
+        ),
+    ]
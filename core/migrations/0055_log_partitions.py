@@ -0,0 +1,85 @@
+import datetime
+
+from django.db import migrations
+from django.utils import timezone
+
+LOG_FOREIGN_KEYS = [
+    ("user_id", "core_user"),
+    ("task_id", "core_task"),
+    ("project_id", "core_project"),
+    ("comment_id", "core_comment"),
+    ("board_id", "core_board"),
+]
+
+LOG_INDEXES = [
+    ("core_log_task_created_at_idx", "task_id, created_at"),
+    ("core_log_project_created_idx", "project_id, created_at"),
+    ("core_log_event_created_idx", "event_type, created_at"),
+    ("core_log_created_at_id_idx", "created_at, id"),
+]
+
+
+def month_start(value):
+    value = value.astimezone(datetime.timezone.utc)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(month):
+    if month.month == 12:
+        return month.replace(year=month.year + 1, month=1)
+    return month.replace(month=month.month + 1)
+
+
+def partition_log_table(apps, schema_editor):
+    """Turn core_log into a table partitioned by month of created_at (PostgreSQL only)"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT MIN(created_at) FROM core_log")
+        oldest = cursor.fetchone()[0] or timezone.now()
+
+        cursor.execute("ALTER TABLE core_log RENAME TO core_log_unpartitioned")
+        # frees the name of the primary key, PostgreSQL would otherwise name the new one core_log_pkey1
+        cursor.execute(
+            "ALTER TABLE core_log_unpartitioned RENAME CONSTRAINT core_log_pkey TO core_log_unpartitioned_pkey"
+        )
+        cursor.execute(
+            "CREATE TABLE core_log (LIKE core_log_unpartitioned INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)"
+        )
+        # Partition key has to be a part of the primary key
+        cursor.execute("ALTER TABLE core_log ADD CONSTRAINT core_log_pkey PRIMARY KEY (id, created_at)")
+
+        month = month_start(oldest)
+        last_month = month_start(timezone.now() + datetime.timedelta(days=93))
+        while month <= last_month:
+            cursor.execute(
+                f"CREATE TABLE core_log_p{month:%Y%m} PARTITION OF core_log FOR VALUES FROM (%s) TO (%s)",
+                [month, next_month(month)],
+            )
+            month = next_month(month)
+        cursor.execute("CREATE TABLE core_log_default PARTITION OF core_log DEFAULT")
+
+        cursor.execute("INSERT INTO core_log SELECT * FROM core_log_unpartitioned")
+        cursor.execute("DROP TABLE core_log_unpartitioned")
+
+        for column, table in LOG_FOREIGN_KEYS:
+            cursor.execute(
+                f"ALTER TABLE core_log ADD CONSTRAINT core_log_{column}_fk FOREIGN KEY ({column}) "
+                f"REFERENCES {table} (id) DEFERRABLE INITIALLY DEFERRED"
+            )
+            cursor.execute(f"CREATE INDEX core_log_{column}_idx ON core_log ({column})")
+
+        for name, columns in LOG_INDEXES:
+            cursor.execute(f"CREATE INDEX {name} ON core_log ({columns})")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0054_log_archive"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_log_table, migrations.RunPython.noop),
+    ]
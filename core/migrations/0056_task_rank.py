@@ -0,0 +1,69 @@
+# Generated by Django 5.1.7 on 2026-10-18 23:32
+
+from django.db import migrations, models
+from django.db.models import F
+
+# copy of core.utils.ranks.evenly_spaced_ranks as it was when this migration was written
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+
+
+def evenly_spaced_ranks(count):
+    width = 2
+    while BASE**width < (count + 1) * BASE:
+        width += 1
+
+    step = BASE**width // (count + 1)
+    ranks = []
+    for index in range(1, count + 1):
+        value = index * step
+        if value % BASE == 0:
+            value += 1
+
+        digits = ""
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits = DIGITS[digit] + digits
+        ranks.append(digits)
+
+    return ranks
+
+
+def positions_to_ranks(apps, schema_editor):
+    Task = apps.get_model("core", "Task")
+
+    tasks = list(Task.objects.order_by(F("position").asc(nulls_last=True), "created_at").only("id"))
+    for task, rank in zip(tasks, evenly_spaced_ranks(len(tasks))):
+        task.rank = rank
+
+    Task.objects.bulk_update(tasks, ["rank"], batch_size=1000)
+
+
+def ranks_to_positions(apps, schema_editor):
+    Task = apps.get_model("core", "Task")
+
+    tasks = list(Task.objects.order_by("rank").only("id"))
+    for position, task in enumerate(tasks):
+        task.position = position
+
+    Task.objects.bulk_update(tasks, ["position"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0055_log_partitions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="rank",
+            field=models.CharField(blank=True, db_index=True, max_length=255),
+        ),
+        migrations.RunPython(positions_to_ranks, ranks_to_positions),
+        migrations.RemoveField(
+            model_name="task",
+            name="position",
+        ),
+    ]
@@ -0,0 +1,32 @@
+from itertools import groupby
+from operator import attrgetter
+
+from django.db import migrations
+
+PRIORITY_GAP = 1024
+
+
+def spread_priorities(apps, schema_editor):
+    """Renumber every queue with even gaps, old rows used timestamps and steps of 10 or 1"""
+    UserTaskQueue = apps.get_model("core", "UserTaskQueue")
+
+    entries = []
+    queues = UserTaskQueue.objects.order_by("user_id", "-priority", "id").only("id", "user_id", "priority")
+    for _, queue in groupby(queues, key=attrgetter("user_id")):
+        queue = list(queue)
+        for index, entry in enumerate(queue):
+            entry.priority = (len(queue) - index) * PRIORITY_GAP
+        entries.extend(queue)
+
+    UserTaskQueue.objects.bulk_update(entries, ["priority"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0056_task_rank"),
+    ]
+
+    operations = [
+        migrations.RunPython(spread_priorities, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.7 on 2026-10-18 23:37
+
+from itertools import groupby
+from operator import attrgetter
+
+from django.db import migrations, models
+
+BLOCK_POSITION_GAP = 1024
+
+
+def spread_positions(apps, schema_editor):
+    TaskBlock = apps.get_model("core", "TaskBlock")
+
+    blocks = []
+    ordered = TaskBlock.objects.order_by("task_id", "position", "created_at").only("id", "task_id", "position")
+    for _, task_blocks in groupby(ordered, key=attrgetter("task_id")):
+        for index, block in enumerate(task_blocks):
+            block.position = (index + 1) * BLOCK_POSITION_GAP
+            blocks.append(block)
+
+    TaskBlock.objects.bulk_update(blocks, ["position"], batch_size=1000)
+
+
+def pack_positions(apps, schema_editor):
+    TaskBlock = apps.get_model("core", "TaskBlock")
+
+    blocks = []
+    ordered = TaskBlock.objects.order_by("task_id", "position").only("id", "task_id", "position")
+    for _, task_blocks in groupby(ordered, key=attrgetter("task_id")):
+        for index, block in enumerate(task_blocks):
+            block.position = index
+            blocks.append(block)
+
+    TaskBlock.objects.bulk_update(blocks, ["position"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0057_user_task_queue_priority_gaps"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="historicaltaskblock",
+            name="position",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="taskblock",
+            name="position",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(spread_positions, pack_positions),
+    ]
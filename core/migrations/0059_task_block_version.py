@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 23:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0058_task_block_sparse_positions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="historicaltaskblock",
+            name="version",
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name="taskblock",
+            name="version",
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,193 @@
+# Generated by Django 5.1.7 on 2026-10-18 23:47
+
+import json
+import uuid
+from itertools import groupby
+from operator import attrgetter
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+KEYFRAME_INTERVAL = 20
+SPLICE_MIN_LENGTH = 80
+
+# copies of core.utils.json_patch.make_patch and core.utils.block_revisions.diff_content as they were
+# when this migration was written
+
+
+def json_equal(first, second):
+    if isinstance(first, bool) or isinstance(second, bool):
+        return type(first) is type(second) and first == second
+    if isinstance(first, dict) and isinstance(second, dict):
+        return first.keys() == second.keys() and all(json_equal(first[key], second[key]) for key in first)
+    if isinstance(first, list) and isinstance(second, list):
+        return len(first) == len(second) and all(json_equal(a, b) for a, b in zip(first, second))
+    return first == second
+
+
+def escape_token(token):
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def splice_edit(old, new):
+    start = 0
+    while start < min(len(old), len(new)) and old[start] == new[start]:
+        start += 1
+
+    end = 0
+    while end < min(len(old), len(new)) - start and old[-end - 1] == new[-end - 1]:
+        end += 1
+
+    new_end = len(new) - end
+    return [start, len(old) - end, new[start:new_end]]
+
+
+def diff_content(old, new, path=""):
+    if json_equal(old, new):
+        return []
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        delta = []
+        for key in old:
+            if key not in new:
+                delta.append({"op": "remove", "path": f"{path}/{escape_token(key)}"})
+        for key, value in new.items():
+            if key in old:
+                delta.extend(diff_content(old[key], value, f"{path}/{escape_token(key)}"))
+            else:
+                delta.append({"op": "add", "path": f"{path}/{escape_token(key)}", "value": value})
+        return delta
+
+    if isinstance(old, list) and isinstance(new, list):
+        delta = []
+        for index, (old_item, new_item) in enumerate(zip(old, new)):
+            delta.extend(diff_content(old_item, new_item, f"{path}/{index}"))
+        for index in range(len(old) - 1, len(new) - 1, -1):
+            delta.append({"op": "remove", "path": f"{path}/{index}"})
+        for index in range(len(old), len(new)):
+            delta.append({"op": "add", "path": f"{path}/-", "value": new[index]})
+        return delta
+
+    if isinstance(old, str) and isinstance(new, str) and len(old) >= SPLICE_MIN_LENGTH:
+        return [{"op": "splice", "path": path, "edits": [splice_edit(old, new)]}]
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def is_larger(delta, content):
+    return len(json.dumps(delta)) >= len(json.dumps(content))
+
+
+def history_to_revisions(apps, schema_editor):
+    """Keep content of every historical TaskBlock record as a revision, the history stops storing content"""
+    TaskBlock = apps.get_model("core", "TaskBlock")
+    HistoricalTaskBlock = apps.get_model("core", "HistoricalTaskBlock")
+    TaskBlockRevision = apps.get_model("core", "TaskBlockRevision")
+
+    revisions = []
+    records = HistoricalTaskBlock.objects.order_by("id", "history_date").iterator()
+    blocks_with_history = set()
+    for block_id, block_records in groupby(records, key=attrgetter("id")):
+        blocks_with_history.add(block_id)
+        previous = None
+        for record in block_records:
+            if previous is not None and record.content == previous.full_content:
+                continue
+
+            revision = TaskBlockRevision(
+                block_id=block_id,
+                number=previous.number + 1 if previous else 1,
+                user_id=record.history_user_id,
+                version=record.version,
+                block_type=record.block_type,
+                keyframe_distance=previous.keyframe_distance + 1 if previous else 0,
+            )
+            if previous is not None:
+                revision.delta = diff_content(previous.full_content, record.content)
+            if (
+                revision.delta is None
+                or revision.keyframe_distance >= KEYFRAME_INTERVAL
+                or is_larger(revision.delta, record.content)
+            ):
+                revision.is_keyframe, revision.keyframe_distance, revision.delta = True, 0, None
+                revision.content = record.content
+
+            # next delta is computed against full content of this one
+            revision.full_content = record.content
+            revision.history_date = record.history_date
+            previous = revision
+            revisions.append(revision)
+
+    for block in TaskBlock.objects.exclude(id__in=blocks_with_history).iterator():
+        revisions.append(
+            TaskBlockRevision(
+                block_id=block.id,
+                number=1,
+                user_id=block.created_by_id,
+                version=block.version,
+                block_type=block.block_type,
+                is_keyframe=True,
+                content=block.content,
+            )
+        )
+
+    TaskBlockRevision.objects.bulk_create(revisions, batch_size=500)
+
+    # auto_now fields were overwritten on insert
+    dated_revisions = [revision for revision in revisions if hasattr(revision, "history_date")]
+    for revision in dated_revisions:
+        revision.created_at = revision.updated_at = revision.history_date
+    TaskBlockRevision.objects.bulk_update(dated_revisions, ["created_at", "updated_at"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0059_task_block_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskBlockRevision",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("number", models.PositiveIntegerField()),
+                ("version", models.PositiveIntegerField(default=1)),
+                (
+                    "block_type",
+                    models.CharField(
+                        choices=[("MARKDOWN", "Markdown"), ("IMAGE", "Image"), ("CHECKLIST", "Checklist")],
+                        max_length=150,
+                    ),
+                ),
+                ("is_keyframe", models.BooleanField(default=False)),
+                ("keyframe_distance", models.PositiveSmallIntegerField(default=0)),
+                ("content", models.JSONField(blank=True, null=True)),
+                ("delta", models.JSONField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "block",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="revisions", to="core.taskblock"
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(fields=("block", "number"), name="core_taskblockrevision_number_uniq")
+                ],
+            },
+        ),
+        migrations.RunPython(history_to_revisions, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="historicaltaskblock",
+            name="content",
+        ),
+    ]
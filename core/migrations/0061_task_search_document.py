@@ -0,0 +1,118 @@
+# Generated by Django 5.1.7 on 2026-10-18 23:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+# copies of core.utils.task_search.SEARCH_BLOCK_TYPES and block_text as they were when this migration was written
+SEARCH_BLOCK_TYPES = ("MARKDOWN", "CHECKLIST")
+
+
+def block_text(block_type, content):
+    if not isinstance(content, dict):
+        return ""
+
+    if block_type == "MARKDOWN":
+        return content.get("markdown") or ""
+
+    if block_type == "CHECKLIST":
+        parts = [content.get("title") or ""]
+        for element in content.get("elements") or []:
+            if isinstance(element, dict):
+                parts.extend(value for value in element.values() if isinstance(value, str))
+            elif isinstance(element, str):
+                parts.append(element)
+        return "\n".join(part for part in parts if part)
+
+    return ""
+
+
+SQLITE_INDEX = [
+    "CREATE VIRTUAL TABLE core_tasksearchdocument_fts USING fts5(task_id UNINDEXED, title, body)",
+    """CREATE TRIGGER core_tasksearchdocument_fts_insert AFTER INSERT ON core_tasksearchdocument BEGIN
+        INSERT INTO core_tasksearchdocument_fts (task_id, title, body) VALUES (new.task_id, new.title, new.body);
+    END""",
+    """CREATE TRIGGER core_tasksearchdocument_fts_update AFTER UPDATE ON core_tasksearchdocument BEGIN
+        DELETE FROM core_tasksearchdocument_fts WHERE task_id = old.task_id;
+        INSERT INTO core_tasksearchdocument_fts (task_id, title, body) VALUES (new.task_id, new.title, new.body);
+    END""",
+    """CREATE TRIGGER core_tasksearchdocument_fts_delete AFTER DELETE ON core_tasksearchdocument BEGIN
+        DELETE FROM core_tasksearchdocument_fts WHERE task_id = old.task_id;
+    END""",
+]
+
+POSTGRESQL_INDEX = [
+    """ALTER TABLE core_tasksearchdocument ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', title), 'A') || setweight(to_tsvector('simple', body), 'B')
+    ) STORED""",
+    "CREATE INDEX core_tasksearchdocument_vector_idx ON core_tasksearchdocument USING gin (search_vector)",
+]
+
+
+def create_search_index(apps, schema_editor):
+    """Index the documents outside of Django models, the way the database supports it"""
+    vendor = schema_editor.connection.vendor
+    statements = {"postgresql": POSTGRESQL_INDEX, "sqlite": SQLITE_INDEX}.get(vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS core_tasksearchdocument_fts")
+
+
+def build_documents(apps, schema_editor):
+    Task = apps.get_model("core", "Task")
+    TaskBlock = apps.get_model("core", "TaskBlock")
+    TaskSearchDocument = apps.get_model("core", "TaskSearchDocument")
+
+    tasks = Task.objects.order_by("id").values_list("id", "title", "tag", "description")
+    for start in range(0, tasks.count(), BATCH_SIZE):
+        batch_end = start + BATCH_SIZE
+        batch = list(tasks[start:batch_end])
+        bodies = {task_id: [description] for task_id, _, _, description in batch}
+
+        blocks = TaskBlock.objects.filter(task__in=bodies, is_archived=False, block_type__in=SEARCH_BLOCK_TYPES)
+        for task_id, block_type, content in blocks.order_by("position").values_list("task", "block_type", "content"):
+            bodies[task_id].append(block_text(block_type, content))
+
+        TaskSearchDocument.objects.bulk_create(
+            TaskSearchDocument(
+                task_id=task_id,
+                title=f"{title} {tag}".strip(),
+                body="\n".join(part for part in bodies[task_id] if part),
+            )
+            for task_id, title, tag, _ in batch
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0060_task_block_revisions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskSearchDocument",
+            fields=[
+                (
+                    "task",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search_document",
+                        serialize=False,
+                        to="core.task",
+                    ),
+                ),
+                ("title", models.TextField(blank=True)),
+                ("body", models.TextField(blank=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(build_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 5.1.7 on 2026-10-19 00:00
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0061_task_search_document"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tag",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("name", models.CharField(max_length=150, unique=True)),
+                ("task_count", models.PositiveIntegerField(default=0)),
+                ("project_count", models.PositiveIntegerField(default=0)),
+                ("note_count", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ProjectTag",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="tag_links", to="core.project"
+                    ),
+                ),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="project_links",
+                        to="core.tag",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [models.Index(fields=["tag", "project"], name="core_projecttag_tag_idx")],
+                "constraints": [models.UniqueConstraint(fields=("project", "tag"), name="core_projecttag_uniq")],
+            },
+        ),
+        migrations.CreateModel(
+            name="NoteTag",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "note",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="tag_links", to="core.note"
+                    ),
+                ),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="note_links",
+                        to="core.tag",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [models.Index(fields=["tag", "note"], name="core_notetag_tag_idx")],
+                "constraints": [models.UniqueConstraint(fields=("note", "tag"), name="core_notetag_uniq")],
+            },
+        ),
+        migrations.CreateModel(
+            name="TaskTag",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="task_links",
+                        to="core.tag",
+                    ),
+                ),
+                (
+                    "task",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="tag_links", to="core.task"
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [models.Index(fields=["tag", "task"], name="core_tasktag_tag_idx")],
+                "constraints": [models.UniqueConstraint(fields=("task", "tag"), name="core_tasktag_uniq")],
+            },
+        ),
+    ]
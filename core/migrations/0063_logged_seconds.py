@@ -0,0 +1,37 @@
+# Generated by Django 5.1.7 on 2026-10-19 00:08
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def set_logged_seconds(apps, schema_editor):
+    Project = apps.get_model("core", "Project")
+    Task = apps.get_model("core", "Task")
+    TaskWorkSession = apps.get_model("core", "TaskWorkSession")
+
+    for model, lookup in ((Task, "task"), (Project, "task__project")):
+        sessions = TaskWorkSession.objects.filter(**{lookup: OuterRef("pk")}).order_by().values(lookup)
+        totals = Subquery(sessions.annotate(total=Sum("total_time")).values("total"))
+        model.objects.update(logged_seconds=Coalesce(totals, 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0062_tags"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="logged_seconds",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="logged_seconds",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(set_logged_seconds, migrations.RunPython.noop),
+    ]
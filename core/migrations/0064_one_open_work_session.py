@@ -0,0 +1,46 @@
+# Generated by Django 5.1.7 on 2026-10-19 00:12
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def stop_extra_open_sessions(apps, schema_editor):
+    """Keep only the latest open session of every user, older ones stop when the next one started"""
+    Project = apps.get_model("core", "Project")
+    Task = apps.get_model("core", "Task")
+    TaskWorkSession = apps.get_model("core", "TaskWorkSession")
+
+    open_sessions = TaskWorkSession.objects.filter(stopped_at__isnull=True).order_by("user", "-started_at")
+    latest_started_at = {}
+    for session in open_sessions.iterator():
+        if session.user_id not in latest_started_at:
+            latest_started_at[session.user_id] = session.started_at
+            continue
+
+        session.stopped_at = latest_started_at[session.user_id]
+        seconds = int((session.stopped_at - session.started_at).total_seconds()) if session.started_at else 0
+        TaskWorkSession.objects.filter(pk=session.pk).update(stopped_at=session.stopped_at, total_time=seconds)
+        if session.task_id:
+            added = seconds - session.total_time
+            Task.objects.filter(pk=session.task_id).update(logged_seconds=F("logged_seconds") + added)
+            Project.objects.filter(tasks=session.task_id).update(logged_seconds=F("logged_seconds") + added)
+        latest_started_at[session.user_id] = session.started_at
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0063_logged_seconds"),
+    ]
+
+    operations = [
+        migrations.RunPython(stop_extra_open_sessions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="taskworksession",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("stopped_at__isnull", True)),
+                fields=("user",),
+                name="core_taskworksession_one_open_uniq",
+            ),
+        ),
+    ]
@@ -0,0 +1,124 @@
+# Generated by Django 5.1.7 on 2026-10-19 00:22
+
+import datetime
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# days are filled for the default TIME_ROLLUP_TIME_ZONE (TIME_ZONE), installations with another one run
+# the rebuild_time_rollup command afterwards
+ROLLUP_TIME_ZONE = datetime.timezone.utc
+
+
+# copies of core.utils.time_rollup.split_by_day and daily_totals as they were when this migration was written
+
+
+def split_by_day(started_at, stopped_at, tz):
+    if started_at is None or stopped_at is None:
+        return []
+
+    started_at, stopped_at = (
+        value if value.tzinfo is not None else value.replace(tzinfo=datetime.timezone.utc)
+        for value in (started_at, stopped_at)
+    )
+    if stopped_at <= started_at:
+        return []
+
+    start_date, end_date = started_at.astimezone(tz).date(), stopped_at.astimezone(tz).date()
+    bounds = [
+        datetime.datetime.combine(start_date + datetime.timedelta(days=day), datetime.time(), tzinfo=tz)
+        for day in range((end_date - start_date).days + 2)
+    ]
+    parts = []
+    for start, end in zip(bounds, bounds[1:]):
+        seconds = int((min(stopped_at, end) - max(started_at, start)).total_seconds())
+        if seconds > 0:
+            parts.append((start.date(), seconds))
+    return parts
+
+
+def daily_totals(sessions, tz):
+    totals = defaultdict(int)
+    for user_id, task_id, started_at, stopped_at in sessions:
+        for date, seconds in split_by_day(started_at, stopped_at, tz):
+            totals[user_id, task_id, date] += seconds
+    return totals
+
+
+def fill_rollup(apps, schema_editor):
+    DailyTimeRollup = apps.get_model("core", "DailyTimeRollup")
+    Task = apps.get_model("core", "Task")
+    TaskWorkSession = apps.get_model("core", "TaskWorkSession")
+
+    sessions = TaskWorkSession.objects.filter(stopped_at__isnull=False)
+    totals = daily_totals(sessions.values_list("user", "task", "started_at", "stopped_at").iterator(), ROLLUP_TIME_ZONE)
+    projects = dict(Task.objects.filter(pk__in={task_id for _, task_id, _ in totals}).values_list("id", "project"))
+    DailyTimeRollup.objects.bulk_create(
+        [
+            DailyTimeRollup(
+                user_id=user_id, task_id=task_id, project_id=projects.get(task_id), date=date, seconds=seconds
+            )
+            for (user_id, task_id, date), seconds in totals.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0064_one_open_work_session"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyTimeRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField()),
+                ("seconds", models.BigIntegerField(default=0)),
+                (
+                    "project",
+                    models.ForeignKey(
+                        blank=True,
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.project",
+                    ),
+                ),
+                (
+                    "task",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="time_rollups",
+                        to="core.task",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="time_rollups",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["user", "date"], name="core_dailytimerollup_user_idx"),
+                    models.Index(fields=["project", "date"], name="core_dailytimerollup_proj_idx"),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(fields=("user", "task", "date"), name="core_dailytimerollup_uniq")
+                ],
+            },
+        ),
+        migrations.RunPython(fill_rollup, migrations.RunPython.noop),
+    ]
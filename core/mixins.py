@@ -1,7 +1,13 @@
+import datetime
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework.exceptions import PermissionDenied
 
+from apis.paginations import LogCursorPagination
 from apis.permissions import HasTaskAccess
 from core.models import Task
+from core.utils.log_partitions import combine_sources, log_sources
 
 
 class TaskAccessMixin:
@@ -18,3 +24,53 @@ class TaskAccessMixin:
         if not has_task_access:
             raise PermissionDenied(f"Not allowed to access the task (id: {task_id})")
         return task
+
+
+class LogPeriodMixin:
+    """
+    Read Log rows only from the partitions (or archive table) matching the requested period.
+    The period comes from `created_at_after` / `created_at_before` params and from the keyset cursor.
+    """
+
+    @staticmethod
+    def _parse_date_param(value):
+        try:
+            return parse_date(value or "")
+        except ValueError:
+            return None
+
+    def get_log_period(self):
+        params = self.request.query_params
+        start = end = None
+
+        created_after = self._parse_date_param(params.get("created_at_after"))
+        if created_after:
+            start = timezone.make_aware(datetime.datetime.combine(created_after, datetime.time.min))
+
+        created_before = self._parse_date_param(params.get("created_at_before"))
+        if created_before:
+            end = timezone.make_aware(datetime.datetime.combine(created_before, datetime.time.min))
+            end += datetime.timedelta(days=1)
+
+        position = LogCursorPagination.decode_cursor(self.request)
+        if position:
+            cursor_end = position[0] + datetime.timedelta(microseconds=1)
+            end = min(end, cursor_end) if end else cursor_end
+
+        return start, end
+
+    def get_log_queryset(self, refine):
+        """
+        Call `refine` on every log source of the period (to filter it), then merge them.
+        The result is ordered newest first and can only be ordered or sliced further.
+        """
+        position = LogCursorPagination.decode_cursor(self.request)
+
+        sources = []
+        for source in log_sources(*self.get_log_period()):
+            source = refine(source)
+            if position:
+                source = source.filter(LogCursorPagination.cursor_filter(position))
+            sources.append(source)
+
+        return combine_sources(sources).order_by("-created_at", "-id")
@@ -2,19 +2,38 @@ import logging
 import uuid
 
 from django.contrib.auth.models import AbstractUser
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
-from django.db.models import Q
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.utils.timezone import now
 from simple_history.models import HistoricalRecords
 
+from core.utils.hashtags import parse_tags
 from core.utils.notify import notify_user
+from core.utils.ranks import rank_between
+from core.utils.task_search import SEARCH_BLOCK_TYPES, block_text
+from core.utils.time_rollup import daily_totals, rollup_time_zone, split_by_day
 from core.utils.websockets import WebsocketHelper
 
 logger = logging.getLogger(__name__)
 
 
+def fields_to_save(instance, excluded):
+    """`update_fields` for saving every loaded field of `instance` except `excluded`"""
+    deferred = instance.get_deferred_fields()
+    return [
+        field.name
+        for field in instance._meta.concrete_fields
+        if not field.primary_key and field.attname not in deferred and field.name not in excluded
+    ]
+
+
 class Team(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=150, unique=True)
@@ -49,10 +68,32 @@ class Project(models.Model):
     progress = models.IntegerField(default=0)
     is_closed = models.BooleanField(default=False)
     tag = models.CharField(max_length=100, null=True, blank=True)
+    # total_time of work sessions of all tasks, see TaskWorkSession.save
+    logged_seconds = models.BigIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if not self._state.adding and update_fields is None:
+            # changed only by F() updates, saving a stale value would drop logged work
+            kwargs["update_fields"] = fields_to_save(self, ["logged_seconds"])
+
+        super().save(*args, **kwargs)
+
+        if update_fields is None or "tag" in update_fields:
+            Tag.sync(ProjectTag, self)
+
+    def delete(self, *args, **kwargs):
+        tag_ids = list(self.tag_links.values_list("tag", flat=True))
+        # tasks of the project are deleted with it
+        task_tag_ids = list(TaskTag.objects.filter(task__project=self).values_list("tag", flat=True).distinct())
+        result = super().delete(*args, **kwargs)
+        Tag.recount(ProjectTag, tag_ids)
+        Tag.recount(TaskTag, task_tag_ids)
+        return result
+
 
 class ProjectAccess(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -112,7 +153,8 @@ class Task(models.Model):
         blank=True,
     )
     tag = models.CharField(max_length=150, blank=True)
-    position = models.IntegerField(default=100, null=True, blank=True)
+    # lexicographic key (see core.utils.ranks), new tasks are appended at the end
+    rank = models.CharField(max_length=255, blank=True, db_index=True)
     parent_task = models.ForeignKey(
         "self",
         on_delete=models.CASCADE,
@@ -144,10 +186,57 @@ class Task(models.Model):
     )
     archived_at = models.DateTimeField(null=True, blank=True)
     follow_up = models.DateTimeField(null=True, blank=True)
+    # total_time of all work sessions, see TaskWorkSession.save
+    logged_seconds = models.BigIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        if not self.rank:
+            last_rank = Task.objects.order_by("-rank").values_list("rank", flat=True).first()
+            self.rank = rank_between(last_rank or None, None)
+
+        update_fields = kwargs.get("update_fields")
+        previous = None
+        if not self._state.adding:
+            if update_fields is None:
+                # changed only by F() updates, saving a stale value would drop logged work
+                kwargs["update_fields"] = fields_to_save(self, ["logged_seconds"])
+            if update_fields is None or "project" in update_fields:
+                previous = Task.objects.filter(pk=self.pk).values_list("project", "logged_seconds").first()
+
+        super().save(*args, **kwargs)
+
+        if previous and previous[0] != self.project_id:
+            # logged time moves with the task to its new project
+            if previous[1]:
+                Project.objects.filter(pk=previous[0]).update(logged_seconds=F("logged_seconds") - previous[1])
+                Project.objects.filter(pk=self.project_id).update(logged_seconds=F("logged_seconds") + previous[1])
+            DailyTimeRollup.objects.filter(task=self).update(project=self.project_id)
+
+        if update_fields is None or {"title", "tag", "description"} & set(update_fields):
+            TaskSearchDocument.refresh([self.id])
+        if update_fields is None or "tag" in update_fields:
+            Tag.sync(TaskTag, self)
+
+    def delete(self, *args, **kwargs):
+        tag_ids = list(self.tag_links.values_list("tag", flat=True))
+        # taken off the project by the post_delete receiver, changed only by F() updates so this instance may be stale
+        self.logged_seconds = Task.objects.filter(pk=self.pk).values_list("logged_seconds", flat=True).first() or 0
+        result = super().delete(*args, **kwargs)
+        Tag.recount(TaskTag, tag_ids)
+        return result
+
+
+@receiver(post_delete, sender=Task)
+def remove_deleted_task_time(sender, instance, **kwargs):
+    # also sent for tasks removed by a cascade (subtasks, tasks of a deleted user), which skip Task.delete
+    if instance.logged_seconds and instance.project_id:
+        Project.objects.filter(pk=instance.project_id).update(
+            logged_seconds=F("logged_seconds") - instance.logged_seconds
+        )
+
 
 class TaskBlock(models.Model):
     class BlockTypeChoices(models.TextChoices):
@@ -158,15 +247,83 @@ class TaskBlock(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="blocks")
     block_type = models.CharField(max_length=150, choices=BlockTypeChoices.choices)
-    position = models.PositiveSmallIntegerField(default=0)
+    # sparse, see core.utils.block_positions
+    position = models.IntegerField(default=0)
     content = models.JSONField(default=dict, blank=True)
+    # bumped on every content change, clients send it back as a precondition of their next update
+    version = models.PositiveIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
 
     is_archived = models.BooleanField(default=False)
 
-    history = HistoricalRecords()
+    # content changes are kept in TaskBlockRevision
+    history = HistoricalRecords(excluded_fields=["content"])
+
+
+class TaskBlockRevision(models.Model):
+    """
+    Content of a TaskBlock after an edit, consecutive edits of one user are merged into one revision.
+    Keyframes keep full `content`, others keep `delta` from the previous revision (see core.utils.block_revisions).
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    block = models.ForeignKey(TaskBlock, on_delete=models.CASCADE, related_name="revisions")
+    number = models.PositiveIntegerField()
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    version = models.PositiveIntegerField(default=1)
+    block_type = models.CharField(max_length=150, choices=TaskBlock.BlockTypeChoices.choices)
+    is_keyframe = models.BooleanField(default=False)
+    # revisions since the last keyframe, 0 for keyframes
+    keyframe_distance = models.PositiveSmallIntegerField(default=0)
+    content = models.JSONField(null=True, blank=True)
+    delta = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["block", "number"], name="core_taskblockrevision_number_uniq")]
+
+    def __str__(self):
+        return f"{self.block_id} #{self.number}"
+
+
+class TaskSearchDocument(models.Model):
+    """
+    Text of a task for full-text search (see core.utils.task_search), rebuilt by `refresh` whenever the task or
+    its blocks change. The index itself lives in the database: a tsvector column on PostgreSQL, FTS5 on SQLite.
+    """
+
+    task = models.OneToOneField(Task, on_delete=models.CASCADE, primary_key=True, related_name="search_document")
+    # title and tag
+    title = models.TextField(blank=True)
+    # description and text of active blocks
+    body = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def refresh(cls, task_ids):
+        """Rebuild documents of `task_ids` with two reads and one upsert"""
+        task_ids = set(task_ids)
+        if not task_ids:
+            return
+
+        tasks = list(Task.objects.filter(id__in=task_ids).values_list("id", "title", "tag", "description"))
+        titles = {task_id: f"{title} {tag}".strip() for task_id, title, tag, _ in tasks}
+        bodies = {task_id: [description] for task_id, _, _, description in tasks}
+
+        blocks = TaskBlock.objects.filter(task__in=bodies, is_archived=False, block_type__in=SEARCH_BLOCK_TYPES)
+        for task_id, block_type, content in blocks.order_by("position").values_list("task", "block_type", "content"):
+            bodies[task_id].append(block_text(block_type, content))
+
+        documents = [
+            cls(task_id=task_id, title=titles[task_id], body="\n".join(part for part in parts if part))
+            for task_id, parts in bodies.items()
+        ]
+        cls.objects.bulk_create(
+            documents, update_conflicts=True, unique_fields=["task"], update_fields=["title", "body", "updated_at"]
+        )
 
 
 class Pin(models.Model):
@@ -366,6 +523,101 @@ class Note(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "tag" in update_fields:
+            Tag.sync(NoteTag, self)
+
+    def delete(self, *args, **kwargs):
+        tag_ids = list(self.tag_links.values_list("tag", flat=True))
+        result = super().delete(*args, **kwargs)
+        Tag.recount(NoteTag, tag_ids)
+        return result
+
+
+class Tag(models.Model):
+    """
+    A tag used in `tag` fields of tasks, projects and notes, linked to them through TaskTag, ProjectTag and NoteTag.
+    Counters of a tag are recounted whenever its links change.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=150, unique=True)
+    task_count = models.PositiveIntegerField(default=0)
+    project_count = models.PositiveIntegerField(default=0)
+    note_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def sync(cls, link_model, item):
+        """Link `item` (a task, project or note) to the tags parsed from its `tag` field"""
+        names = parse_tags(item.tag)
+        linked = dict(link_model.objects.filter(**{link_model.ITEM: item}).values_list("tag__name", "tag"))
+        removed = [tag_id for name, tag_id in linked.items() if name not in names]
+        added = [name for name in names if name not in linked]
+        if not removed and not added:
+            return
+
+        added_ids = []
+        if added:
+            cls.objects.bulk_create([cls(name=name) for name in added], ignore_conflicts=True)
+            added_ids = list(cls.objects.filter(name__in=added).values_list("id", flat=True))
+            link_model.objects.bulk_create(
+                [link_model(**{link_model.ITEM: item, "tag_id": tag_id}) for tag_id in added_ids], ignore_conflicts=True
+            )
+        if removed:
+            link_model.objects.filter(**{link_model.ITEM: item}, tag__in=removed).delete()
+
+        cls.recount(link_model, removed + added_ids)
+
+    @classmethod
+    def recount(cls, link_model, tag_ids=None):
+        """Recount the `link_model` counter of `tag_ids` (of all tags when None) with one UPDATE"""
+        counts = link_model.objects.filter(tag=OuterRef("pk")).values("tag").annotate(count=Count("*")).values("count")
+        tags = cls.objects.all() if tag_ids is None else cls.objects.filter(id__in=tag_ids)
+        tags.update(**{link_model.COUNTER: Coalesce(Subquery(counts), 0)})
+
+
+class TaskTag(models.Model):
+    ITEM = "task"
+    COUNTER = "task_count"
+
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="tag_links")
+    # covered by the (tag, task) index
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="task_links", db_index=False)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["task", "tag"], name="core_tasktag_uniq")]
+        indexes = [models.Index(fields=["tag", "task"], name="core_tasktag_tag_idx")]
+
+
+class ProjectTag(models.Model):
+    ITEM = "project"
+    COUNTER = "project_count"
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="tag_links")
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="project_links", db_index=False)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["project", "tag"], name="core_projecttag_uniq")]
+        indexes = [models.Index(fields=["tag", "project"], name="core_projecttag_tag_idx")]
+
+
+class NoteTag(models.Model):
+    ITEM = "note"
+    COUNTER = "note_count"
+
+    note = models.ForeignKey(Note, on_delete=models.CASCADE, related_name="tag_links")
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="note_links", db_index=False)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["note", "tag"], name="core_notetag_uniq")]
+        indexes = [models.Index(fields=["tag", "note"], name="core_notetag_tag_idx")]
+
 
 class PrivateNote(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -386,6 +638,41 @@ class Log(models.Model):
         EDITED = "EDITED", "Edited"
         DELETED = "DELETED", "Deleted"
 
+    class EventType(models.TextChoices):
+        MESSAGE = "MESSAGE", "Message"
+        PROJECT_CREATED = "PROJECT_CREATED", "Project created"
+        PROJECT_UPDATED = "PROJECT_UPDATED", "Project updated"
+        PROJECT_OWNER_CHANGED = "PROJECT_OWNER_CHANGED", "Project owner changed"
+        TASK_CREATED = "TASK_CREATED", "Task created"
+        TASK_UPDATED = "TASK_UPDATED", "Task updated"
+        TASK_CLOSED = "TASK_CLOSED", "Task closed"
+        TASK_UNCLOSED = "TASK_UNCLOSED", "Task unclosed"
+        TASK_OWNER_CHANGED = "TASK_OWNER_CHANGED", "Task owner changed"
+        TASK_ACCESS_GRANTED = "TASK_ACCESS_GRANTED", "Task access granted"
+        TASK_ACCESS_REVOKED = "TASK_ACCESS_REVOKED", "Task access revoked"
+        ATTACHMENT_ADDED = "ATTACHMENT_ADDED", "Attachment added"
+        WORK_STARTED = "WORK_STARTED", "Work started"
+        WORK_STOPPED = "WORK_STOPPED", "Work stopped"
+        WORK_SESSION_UPDATED = "WORK_SESSION_UPDATED", "Work session updated"
+        QUEUE_ADDED = "QUEUE_ADDED", "Added to queue"
+        QUEUE_REMOVED = "QUEUE_REMOVED", "Removed from queue"
+        REMINDER_CREATED = "REMINDER_CREATED", "Reminder created"
+        REMINDER_CLOSED = "REMINDER_CLOSED", "Reminder closed"
+        BOARD_CREATED = "BOARD_CREATED", "Board created"
+        BOARD_UPDATED = "BOARD_UPDATED", "Board updated"
+        BOARD_DELETED = "BOARD_DELETED", "Board deleted"
+        BOARD_USER_ADDED = "BOARD_USER_ADDED", "Board user added"
+        BOARD_USER_REMOVED = "BOARD_USER_REMOVED", "Board user removed"
+        BOARD_LAYOUT_CHANGED = "BOARD_LAYOUT_CHANGED", "Board layout changed"
+        CARD_CREATED = "CARD_CREATED", "Card created"
+        CARD_UPDATED = "CARD_UPDATED", "Card updated"
+        CARD_DELETED = "CARD_DELETED", "Card deleted"
+        CARD_MOVED = "CARD_MOVED", "Card moved"
+        CARD_ITEM_CREATED = "CARD_ITEM_CREATED", "Card item created"
+        CARD_ITEM_UPDATED = "CARD_ITEM_UPDATED", "Card item updated"
+        CARD_ITEM_DELETED = "CARD_ITEM_DELETED", "Card item deleted"
+        CARD_ITEM_MOVED = "CARD_ITEM_MOVED", "Card item moved"
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="logs")
     message = models.TextField()
@@ -420,9 +707,43 @@ class Log(models.Model):
     action = models.CharField(max_length=7, choices=ActionType.choices)
     created_at = models.DateTimeField(auto_now_add=True)
     archived_at = models.DateTimeField(null=True, blank=True)
+    event_type = models.CharField(max_length=30, choices=EventType.choices, default=EventType.MESSAGE)
+    payload = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["task", "created_at"], name="core_log_task_created_at_idx"),
+            models.Index(fields=["project", "created_at"], name="core_log_project_created_idx"),
+            models.Index(fields=["event_type", "created_at"], name="core_log_event_created_idx"),
+            models.Index(fields=["created_at", "id"], name="core_log_created_at_id_idx"),
+        ]
+
+
+class LogArchive(models.Model):
+    """
+    Cold storage for Log rows on databases without native partitioning (see core.utils.log_partitions).
+    Columns mirror Log in the same order so both tables can be read with one UNION.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    message = models.TextField()
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="+", null=True, blank=True)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="+", null=True, blank=True)
+    comment = models.ForeignKey(Comment, on_delete=models.CASCADE, related_name="+", null=True, blank=True)
+    board = models.ForeignKey("core.Board", on_delete=models.CASCADE, related_name="+", null=True, blank=True)
+    action = models.CharField(max_length=7, choices=Log.ActionType.choices)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(null=True, blank=True)
+    event_type = models.CharField(max_length=30, choices=Log.EventType.choices, default=Log.EventType.MESSAGE)
+    payload = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["created_at"], name="core_logarchive_created_idx"),
+        ]
 
 
 class TaskWorkSession(models.Model):
@@ -442,6 +763,16 @@ class TaskWorkSession(models.Model):
         blank=True,
     )
 
+    # the open session of a user, see core.utils.work_sessions
+    ACTIVE_CACHE_KEY = "active_work_session:{}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user"], condition=Q(stopped_at__isnull=True), name="core_taskworksession_one_open_uniq"
+            )
+        ]
+
     def save(self, *args, **kwargs):
         if not self.started_at:
             self.started_at = now()
@@ -452,7 +783,125 @@ class TaskWorkSession(models.Model):
         if self.stopped_at and self.started_at:
             self.total_time = (self.stopped_at - self.started_at).total_seconds()
 
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                previous = TaskWorkSession.objects.select_for_update().filter(pk=self.pk)
+                previous = previous.values_list("task", "total_time", "user", "started_at", "stopped_at").first()
+
+            super().save(*args, **kwargs)
+
+            previous_task, previous_time = previous[:2] if previous else (None, 0)
+            if previous_task == self.task_id:
+                TaskWorkSession.add_logged_seconds(self.task_id, int(self.total_time) - previous_time)
+            else:
+                TaskWorkSession.add_logged_seconds(previous_task, -previous_time)
+                TaskWorkSession.add_logged_seconds(self.task_id, int(self.total_time))
+
+            current = (self.task_id, self.user_id, self.started_at, self.stopped_at)
+            if previous is None or (previous[0],) + previous[2:] != current:
+                if previous:
+                    DailyTimeRollup.add_session(previous[2], previous[0], previous[3], previous[4], sign=-1)
+                DailyTimeRollup.add_session(self.user_id, self.task_id, self.started_at, self.stopped_at)
+
+        TaskWorkSession.forget_active(self.user_id)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            previous = TaskWorkSession.objects.select_for_update().filter(pk=self.pk)
+            previous = previous.values_list("task", "total_time", "user", "started_at", "stopped_at").first()
+            result = super().delete(*args, **kwargs)
+            if previous:
+                TaskWorkSession.add_logged_seconds(previous[0], -previous[1])
+                DailyTimeRollup.add_session(previous[2], previous[0], previous[3], previous[4], sign=-1)
+
+        return result
+
+    @staticmethod
+    def forget_active(user_id):
+        """Drop the cached open session of the user, again after commit so a concurrent read can't keep a stale one"""
+        key = TaskWorkSession.ACTIVE_CACHE_KEY.format(user_id)
+        cache.delete(key)
+        transaction.on_commit(lambda: cache.delete(key))
+
+    @staticmethod
+    def add_logged_seconds(task_id, seconds):
+        """Add `seconds` to the totals of the task and its project"""
+        if task_id is None or not seconds:
+            return
+
+        Task.objects.filter(pk=task_id).update(logged_seconds=F("logged_seconds") + seconds)
+        Project.objects.filter(tasks=task_id).update(logged_seconds=F("logged_seconds") + seconds)
+
+
+@receiver(post_delete, sender=TaskWorkSession)
+def forget_deleted_work_session(sender, instance, **kwargs):
+    # also sent for sessions removed by a cascade (deleted task or user), which skip TaskWorkSession.delete
+    TaskWorkSession.forget_active(instance.user_id)
+
+
+class DailyTimeRollup(models.Model):
+    """Seconds of stopped work sessions of a user on a task per local day, see core.utils.time_rollup"""
+
+    # user and project are indexed together with the date below
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="time_rollups", db_index=False)
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="time_rollups", null=True, blank=True)
+    # project of the task, kept in sync by Task.save
+    project = models.ForeignKey(
+        Project, on_delete=models.CASCADE, related_name="+", null=True, blank=True, db_index=False
+    )
+    date = models.DateField()
+    seconds = models.BigIntegerField(default=0)
+
+    BATCH_SIZE = 1000
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["user", "task", "date"], name="core_dailytimerollup_uniq")]
+        indexes = [
+            models.Index(fields=["user", "date"], name="core_dailytimerollup_user_idx"),
+            models.Index(fields=["project", "date"], name="core_dailytimerollup_proj_idx"),
+        ]
+
+    @classmethod
+    def add_session(cls, user_id, task_id, started_at, stopped_at, sign=1):
+        """Add (or subtract with `sign=-1`) a stopped session to the days it overlaps"""
+        for date, seconds in split_by_day(started_at, stopped_at, rollup_time_zone()):
+            rows = cls.objects.filter(user_id=user_id, task_id=task_id, date=date)
+            if rows.update(seconds=F("seconds") + sign * seconds):
+                continue
+
+            project_id = Task.objects.filter(pk=task_id).values_list("project", flat=True).first()
+            try:
+                with transaction.atomic():
+                    cls.objects.create(
+                        user_id=user_id, task_id=task_id, project_id=project_id, date=date, seconds=sign * seconds
+                    )
+            except IntegrityError:
+                # created by a concurrent session in the meantime
+                rows.update(seconds=F("seconds") + sign * seconds)
+
+    @classmethod
+    def rebuild(cls, user_ids=None):
+        """Recompute the rows (of `user_ids`) from the sessions, return the number of rows"""
+        sessions = TaskWorkSession.objects.filter(stopped_at__isnull=False)
+        rows = cls.objects.all()
+        if user_ids is not None:
+            sessions, rows = sessions.filter(user__in=user_ids), rows.filter(user__in=user_ids)
+
+        totals = daily_totals(
+            sessions.values_list("user", "task", "started_at", "stopped_at").iterator(), rollup_time_zone()
+        )
+        projects = dict(Task.objects.filter(pk__in={task_id for _, task_id, _ in totals}).values_list("id", "project"))
+
+        rows.delete()
+        cls.objects.bulk_create(
+            [
+                cls(user_id=user_id, task_id=task_id, project_id=projects.get(task_id), date=date, seconds=seconds)
+                for (user_id, task_id, date), seconds in totals.items()
+            ],
+            batch_size=cls.BATCH_SIZE,
+        )
+        return len(totals)
 
 
 class Notification(models.Model):
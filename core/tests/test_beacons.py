@@ -0,0 +1,72 @@
+import datetime
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+
+from core.management.commands.create_beacons import Command
+from core.models import Beacon, Log, Project, Task, TaskWorkSession, User
+from core.utils.beacons import create_beacons, expire_beacons
+
+
+@override_settings(CREATE_BEACONS_INTERVAL_TIME_MIN=30, CREATE_BEACONS_INTERVAL_TIME_MAX=30)
+class BeaconsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create(username=f"user{index}", use_beacons=True) for index in range(4)]
+        cls.project = Project.objects.create(title="Project", owner=cls.users[0])
+        cls.task = Task.objects.create(title="Task", owner=cls.users[0], project=cls.project)
+        cls.other_user = User.objects.create(username="other")
+        for user in cls.users + [cls.other_user]:
+            TaskWorkSession.objects.create(task=cls.task, user=user, started_at=now() - datetime.timedelta(hours=1))
+
+    def test_create_beacons(self):
+        waiting_user, confirmed_user, new_user, old_confirmed_user = self.users
+        Beacon.objects.create(user=waiting_user)
+        Beacon.objects.create(user=confirmed_user, confirmed_at=now() - datetime.timedelta(minutes=5))
+        Beacon.objects.create(user=old_confirmed_user, confirmed_at=now() - datetime.timedelta(minutes=50))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(create_beacons(30), 2)
+        # eligible users and one insert, leaving out queries silk adds when it profiled a request of an earlier test
+        queries = [query for query in queries if "silk_" not in query["sql"] and not query["sql"].startswith("EXPLAIN")]
+        self.assertEqual(len(queries), 2)
+
+        self.assertEqual(
+            set(Beacon.objects.filter(confirmed_at__isnull=True).values_list("user", flat=True)),
+            {waiting_user.id, new_user.id, old_confirmed_user.id},
+        )
+
+    def test_expire_beacons(self):
+        expired_user, waiting_user = self.users[:2]
+        Beacon.objects.create(user=expired_user)
+        Beacon.objects.create(user=waiting_user)
+        Beacon.objects.filter(user=expired_user).update(created_at=now() - datetime.timedelta(minutes=61))
+
+        sessions = expire_beacons(60)
+
+        self.assertEqual([session.user for session in sessions], [expired_user])
+        self.assertFalse(Beacon.objects.filter(user=expired_user, confirmed_at__isnull=True).exists())
+        self.assertTrue(Beacon.objects.filter(user=waiting_user, confirmed_at__isnull=True).exists())
+        self.assertFalse(TaskWorkSession.objects.filter(user=expired_user, stopped_at__isnull=True).exists())
+        self.assertTrue(Log.objects.filter(user=expired_user, event_type=Log.EventType.WORK_STOPPED).exists())
+
+        total_time = sessions[0].total_time
+        self.assertGreaterEqual(total_time, 3600)
+        self.assertEqual(Task.objects.get(pk=self.task.pk).logged_seconds, total_time)
+        self.assertEqual(Project.objects.get(pk=self.project.pk).logged_seconds, total_time)
+
+    def test_command(self):
+        out = StringIO()
+        call_command("create_beacons", stdout=out)
+        self.assertIn("Created 4 beacons", out.getvalue())
+
+    def test_daemon(self):
+        with mock.patch.object(Command, "run", side_effect=[None, KeyboardInterrupt]) as run:
+            call_command("create_beacons", "--daemon", "--interval", "0", stdout=StringIO())
+
+        self.assertEqual(run.call_count, 2)
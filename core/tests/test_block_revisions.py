@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+
+from core.models import Task, TaskBlock, TaskBlockRevision, User
+from core.utils.block_revisions import apply_delta, diff_content, record_revisions, revision_content
+
+
+class BlockRevisionsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="user1")
+        cls.user_2 = User.objects.create(username="user2")
+        cls.task = Task.objects.create(owner=cls.user, title="Task")
+
+    def setUp(self):
+        self.block = TaskBlock.objects.create(
+            task=self.task,
+            block_type=TaskBlock.BlockTypeChoices.MARKDOWN,
+            content={"markdown": "x" * 1000},
+            created_by=self.user,
+        )
+        record_revisions([(self.block, None)], self.user)
+
+    def edit(self, content, user):
+        previous_content, self.block.content = self.block.content, content
+        self.block.version += 1
+        self.block.save()
+        record_revisions([(self.block, previous_content)], user)
+
+    def test_long_strings_are_spliced(self):
+        old = {"markdown": "a" * 100, "tags": ["x"]}
+        new = {"markdown": "a" * 50 + "b" + "a" * 50, "tags": ["x", "y"]}
+
+        delta = diff_content(old, new)
+        self.assertEqual(
+            delta,
+            [
+                {"op": "splice", "path": "/markdown", "edits": [[50, 50, "b"]]},
+                {"op": "add", "path": "/tags/-", "value": "y"},
+            ],
+        )
+        self.assertEqual(apply_delta(old, delta), new)
+
+    def test_edits_of_same_user_are_coalesced(self):
+        self.edit({"markdown": "x" * 1000 + "1"}, self.user)
+        self.edit({"markdown": "x" * 1000 + "12"}, self.user)
+
+        self.assertEqual(self.block.revisions.count(), 1)
+        self.assertEqual(revision_content(self.block.id, 1), {"markdown": "x" * 1000 + "12"})
+
+    def test_edits_after_window_or_by_other_user_are_new_revisions(self):
+        TaskBlockRevision.objects.filter(block=self.block).update(updated_at=self.block.created_at - timedelta(hours=1))
+        self.edit({"markdown": "x" * 1000 + "1"}, self.user)
+        self.edit({"markdown": "x" * 1000 + "12"}, self.user_2)
+        self.edit({"markdown": "x" * 1000 + "123"}, self.user_2)
+
+        revisions = list(self.block.revisions.order_by("number"))
+        self.assertEqual([revision.is_keyframe for revision in revisions], [True, False, False])
+        self.assertEqual(revisions[1].delta, [{"op": "splice", "path": "/markdown", "edits": [[1000, 1000, "1"]]}])
+        self.assertEqual(revision_content(self.block.id, 1), {"markdown": "x" * 1000})
+        self.assertEqual(revision_content(self.block.id, 2), {"markdown": "x" * 1000 + "1"})
+        self.assertEqual(revision_content(self.block.id, 3), {"markdown": "x" * 1000 + "123"})
+
+    @override_settings(TASK_BLOCK_REVISION_WINDOW=0, TASK_BLOCK_KEYFRAME_INTERVAL=3)
+    def test_keyframes(self):
+        for i in range(6):
+            self.edit({"markdown": "x" * 1000 + str(i)}, self.user)
+
+        revisions = list(self.block.revisions.order_by("number"))
+        self.assertEqual([revision.keyframe_distance for revision in revisions], [0, 1, 2, 0, 1, 2, 0])
+        self.assertEqual(revision_content(self.block.id, 6), {"markdown": "x" * 1000 + "4"})
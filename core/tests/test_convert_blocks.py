@@ -5,6 +5,7 @@ from django.core.management import call_command
 from django.test import TestCase
 
 from core.models import Project, Task, TaskBlock, User
+from core.utils.block_positions import BLOCK_POSITION_GAP
 
 
 class ConvertBlocksTest(TestCase):
@@ -66,17 +67,17 @@ class ConvertBlocksTest(TestCase):
 
         self.assertEqual(TaskBlock.objects.count(), created_blocks.count())
         self.assertEqual(created_blocks[0].block_type, TaskBlock.BlockTypeChoices.MARKDOWN)
-        self.assertEqual(created_blocks[0].position, 0)
+        self.assertEqual(created_blocks[0].position, BLOCK_POSITION_GAP)
         self.assertEqual(
             created_blocks[0].content,
             {"markdown": "mkd down\nwith\n\n**different**\n*stuff in it*\n##### test"},
         )
 
         self.assertEqual(created_blocks[1].block_type, TaskBlock.BlockTypeChoices.IMAGE)
-        self.assertEqual(created_blocks[1].position, 1)
+        self.assertEqual(created_blocks[1].position, 2 * BLOCK_POSITION_GAP)
         self.assertEqual(created_blocks[1].content, {"path": "some/path/here"})
         self.assertEqual(created_blocks[2].block_type, TaskBlock.BlockTypeChoices.CHECKLIST)
-        self.assertEqual(created_blocks[2].position, 2)
+        self.assertEqual(created_blocks[2].position, 3 * BLOCK_POSITION_GAP)
         self.assertEqual(
             created_blocks[2].content,
             {
@@ -88,7 +89,7 @@ class ConvertBlocksTest(TestCase):
             },
         )
         self.assertEqual(created_blocks[3].block_type, TaskBlock.BlockTypeChoices.CHECKLIST)
-        self.assertEqual(created_blocks[3].position, 3)
+        self.assertEqual(created_blocks[3].position, 4 * BLOCK_POSITION_GAP)
         self.assertEqual(
             created_blocks[3].content,
             {"title": "empty checklist", "elements": []},
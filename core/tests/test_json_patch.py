@@ -0,0 +1,45 @@
+from django.test import SimpleTestCase
+
+from core.utils.json_patch import JsonPatchConflict, JsonPatchError, apply_patch
+
+
+class JsonPatchTest(SimpleTestCase):
+    def test_operations(self):
+        document = {"foo": ["bar", "baz"], "nested": {"a/b": 1, "m~n": 2}}
+        patched = apply_patch(
+            document,
+            [
+                {"op": "add", "path": "/foo/1", "value": "qux"},
+                {"op": "add", "path": "/foo/-", "value": "end"},
+                {"op": "remove", "path": "/nested/a~1b"},
+                {"op": "replace", "path": "/nested/m~0n", "value": 3},
+                {"op": "copy", "from": "/foo/0", "path": "/first"},
+                {"op": "move", "from": "/foo/3", "path": "/last"},
+                {"op": "test", "path": "/foo", "value": ["bar", "qux", "baz"]},
+            ],
+        )
+
+        self.assertEqual(patched, {"foo": ["bar", "qux", "baz"], "nested": {"m~n": 3}, "first": "bar", "last": "end"})
+        # original document is left untouched
+        self.assertEqual(document, {"foo": ["bar", "baz"], "nested": {"a/b": 1, "m~n": 2}})
+
+    def test_whole_document(self):
+        self.assertEqual(apply_patch({"a": 1}, [{"op": "replace", "path": "", "value": [1]}]), [1])
+
+    def test_errors(self):
+        invalid_patches = [
+            {"op": "add", "path": "/foo/01", "value": 1},
+            [{"op": "add", "path": "/missing/key", "value": 1}],
+            [{"op": "remove", "path": "/foo/5"}],
+            [{"op": "replace", "path": "/missing", "value": 1}],
+            [{"op": "move", "from": "/nested", "path": "/nested/inner"}],
+            [{"op": "unknown", "path": "/foo"}],
+            [{"op": "add", "path": "foo", "value": 1}],
+        ]
+        for patch in invalid_patches:
+            with self.subTest(patch=patch), self.assertRaises(JsonPatchError):
+                apply_patch({"foo": [1], "nested": {}}, patch)
+
+    def test_failed_test_is_conflict(self):
+        with self.assertRaises(JsonPatchConflict):
+            apply_patch({"checked": True}, [{"op": "test", "path": "/checked", "value": 1}])
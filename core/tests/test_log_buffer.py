@@ -0,0 +1,89 @@
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from core.models import Log, Project, User
+from core.utils.log_buffer import buffered_logs, log_writer, write_log
+
+
+class LogBufferTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="user1")
+
+    def test_write_log_without_buffer_writes_immediately(self):
+        write_log(user=self.user, message="direct")
+        self.assertTrue(Log.objects.filter(message="direct").exists())
+
+    def test_buffered_entries_written_in_one_query_on_exit(self):
+        # the test runs in a transaction, entries are written after it commits
+        with self.captureOnCommitCallbacks() as callbacks:
+            with buffered_logs(use_async=False) as buffer:
+                write_log(user=self.user, message="first")
+                write_log(user=self.user, message="second")
+                self.assertEqual(len(buffer.uncommitted), 2)
+
+        self.assertFalse(Log.objects.filter(message__in=["first", "second"]).exists())
+        with self.assertNumQueries(1):
+            for callback in callbacks:
+                callback()
+
+        self.assertEqual(Log.objects.filter(message__in=["first", "second"]).count(), 2)
+
+    def test_buffer_dropped_when_block_raises(self):
+        with self.assertRaises(ValueError):
+            with buffered_logs(use_async=False):
+                write_log(user=self.user, message="before error")
+                raise ValueError()
+
+        self.assertFalse(Log.objects.filter(message="before error").exists())
+
+    def test_entries_rolled_back_with_their_transaction(self):
+        with self.captureOnCommitCallbacks(execute=True), buffered_logs(use_async=False):
+            with self.assertRaises(ValueError), transaction.atomic():
+                write_log(user=self.user, message="rolled back")
+                raise ValueError()
+
+            with transaction.atomic():
+                write_log(user=self.user, message="kept")
+
+        self.assertEqual(list(Log.objects.filter(user=self.user).values_list("message", flat=True)), ["kept"])
+
+
+class LogBufferAsyncTest(TransactionTestCase):
+    def test_async_buffer_written_by_background_writer(self):
+        user = User.objects.create(username="user1")
+        with buffered_logs(use_async=True):
+            write_log(user=user, message="async entry")
+
+        log_writer.join()
+        self.assertTrue(Log.objects.filter(message="async entry").exists())
+
+
+class LogBufferTransactionTest(TransactionTestCase):
+    def test_entries_written_once_committed(self):
+        user = User.objects.create(username="user1")
+        with buffered_logs(use_async=False) as buffer:
+            with transaction.atomic():
+                write_log(user=user, message="committed")
+                self.assertEqual(buffer.entries, [])
+            self.assertEqual(len(buffer.entries), 1)
+
+            with self.assertRaises(ValueError), transaction.atomic():
+                write_log(user=user, message="rolled back")
+                raise ValueError()
+
+        self.assertEqual(list(Log.objects.values_list("message", flat=True)), ["committed"])
+
+
+class LogBufferMiddlewareTest(APITestCase):
+    def test_request_logs_are_flushed(self):
+        user = User.objects.create(username="user1")
+        self.client.force_authenticate(user=user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("project_list"), {"title": "Buffered project"})
+        self.assertEqual(response.status_code, 201)
+
+        project = Project.objects.get(title="Buffered project")
+        self.assertTrue(Log.objects.filter(project=project, message="Project created").exists())
@@ -0,0 +1,40 @@
+import datetime
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import Log, LogArchive, User
+from core.utils.log_partitions import (
+    add_months,
+    archive_logs,
+    iter_months,
+    log_sources,
+    partition_name,
+)
+
+
+class LogPartitionsTest(TestCase):
+    def test_months(self):
+        start = datetime.datetime(2024, 11, 15, 10, tzinfo=datetime.timezone.utc)
+        months = list(iter_months(start, add_months(start, 3)))
+
+        self.assertEqual([month.strftime("%Y-%m-%d %H:%M") for month in months][0], "2024-11-01 00:00")
+        self.assertEqual(
+            [partition_name(month) for month in months][1:],
+            ["core_log_p202412", "core_log_p202501", "core_log_p202502"],
+        )
+
+    def test_archive_logs(self):
+        user = User.objects.create(username="user1")
+        old_log = Log.objects.create(user=user, message="old")
+        new_log = Log.objects.create(user=user, message="new")
+        Log.objects.filter(pk=old_log.pk).update(created_at=timezone.now() - datetime.timedelta(days=400))
+
+        self.assertEqual(archive_logs(timezone.now() - datetime.timedelta(days=200)), 1)
+        self.assertEqual(list(Log.objects.values_list("id", flat=True)), [new_log.id])
+        self.assertEqual(LogArchive.objects.get().message, "old")
+
+        # only the hot table is needed for recent periods
+        recent_sources = log_sources(timezone.now() - datetime.timedelta(days=10))
+        self.assertEqual([source.model for source in recent_sources], [Log])
+        self.assertEqual([source.model for source in log_sources()], [Log, LogArchive])
@@ -0,0 +1,60 @@
+import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import Project, Task, TaskWorkSession, User
+
+
+class LoggedTimeTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="user1")
+        cls.project = Project.objects.create(title="Project", owner=cls.user)
+        cls.task = Task.objects.create(owner=cls.user, title="Task", project=cls.project)
+        started_at = datetime.datetime(2024, 1, 1, 10, tzinfo=datetime.timezone.utc)
+        cls.session = TaskWorkSession.objects.create(
+            task=cls.task, user=cls.user, started_at=started_at, stopped_at=started_at + datetime.timedelta(hours=2)
+        )
+
+    def test_session_delete(self):
+        self.session.delete()
+        self.assertEqual(Task.objects.get(pk=self.task.pk).logged_seconds, 0)
+        self.assertEqual(Project.objects.get(pk=self.project.pk).logged_seconds, 0)
+
+    def test_cascaded_task_delete(self):
+        subtask = Task.objects.create(owner=self.user, title="Subtask", project=self.project, parent_task=self.task)
+        started_at = datetime.datetime(2024, 1, 2, 10, tzinfo=datetime.timezone.utc)
+        TaskWorkSession.objects.create(
+            task=subtask, user=self.user, started_at=started_at, stopped_at=started_at + datetime.timedelta(hours=1)
+        )
+        other_user = User.objects.create(username="user2")
+        other_task = Task.objects.create(owner=other_user, title="Other", project=self.project)
+        TaskWorkSession.objects.create(
+            task=other_task, user=self.user, started_at=started_at, stopped_at=started_at + datetime.timedelta(hours=3)
+        )
+        self.assertEqual(Project.objects.get(pk=self.project.pk).logged_seconds, 6 * 3600)
+
+        # the subtask goes by the parent_task cascade, the other task with its owner
+        Task.objects.get(pk=self.task.pk).delete()
+        self.assertEqual(Project.objects.get(pk=self.project.pk).logged_seconds, 3 * 3600)
+        other_user.delete()
+        self.assertEqual(Project.objects.get(pk=self.project.pk).logged_seconds, 0)
+
+    def test_reconcile_command(self):
+        TaskWorkSession.objects.filter(pk=self.session.pk).update(total_time=600)
+        Project.objects.filter(pk=self.project.pk).update(logged_seconds=1)
+
+        out = StringIO()
+        call_command("reconcile_logged_time", "--dry-run", stdout=out)
+        self.assertIn("Found drifted totals of 1 tasks and 1 projects", out.getvalue())
+        self.assertEqual(Task.objects.get(pk=self.task.pk).logged_seconds, 7200)
+
+        call_command("reconcile_logged_time", stdout=out)
+        self.assertIn("Fixed drifted totals of 1 tasks and 1 projects", out.getvalue())
+        self.assertEqual(Task.objects.get(pk=self.task.pk).logged_seconds, 600)
+        self.assertEqual(Project.objects.get(pk=self.project.pk).logged_seconds, 600)
+
+        call_command("reconcile_logged_time", stdout=out)
+        self.assertIn("Fixed drifted totals of 0 tasks and 0 projects", out.getvalue())
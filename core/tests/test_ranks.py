@@ -0,0 +1,78 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.models import Task, User
+from core.utils.ranks import evenly_spaced_ranks, rank_between
+
+
+class RanksTest(TestCase):
+    def test_rank_between(self):
+        self.assertEqual(rank_between(), "i")
+        self.assertEqual(rank_between("i"), "j")
+        self.assertEqual(rank_between(None, "i"), "h")
+        self.assertEqual(rank_between("a", "b"), "ai")
+        self.assertEqual(rank_between("a", "ab"), "aa")
+        self.assertEqual(rank_between("az"), "b1")
+        self.assertEqual(rank_between("zz"), "zz01")
+        self.assertEqual(rank_between(None, "b1"), "az")
+        self.assertEqual(rank_between(None, "01"), "00zz")
+
+        with self.assertRaises(ValueError):
+            rank_between("b", "a")
+
+    def test_repeated_bisection(self):
+        before, after = "a", "b"
+        for _ in range(100):
+            rank = rank_between(before, after)
+            self.assertTrue(before < rank < after)
+            self.assertNotEqual(rank[-1], "0")
+            after = rank
+
+    def test_repeated_append_and_prepend(self):
+        first = last = rank_between()
+        for _ in range(1000):
+            rank = rank_between(last)
+            self.assertLess(last, rank)
+            self.assertNotEqual(rank[-1], "0")
+            last = rank
+
+            rank = rank_between(None, first)
+            self.assertLess(rank, first)
+            self.assertNotEqual(rank[-1], "0")
+            first = rank
+
+        self.assertLessEqual(len(last), 4)
+        self.assertLessEqual(len(first), 4)
+
+    def test_appended_task_ranks_stay_short(self):
+        user = User.objects.create(username="user1")
+        Task.objects.bulk_create([Task(owner=user, title="first", rank="zzy")])
+        tasks = [Task.objects.create(owner=user, title=f"Task {index}") for index in range(50)]
+
+        self.assertEqual([task.rank for task in tasks], sorted(task.rank for task in tasks))
+        self.assertLessEqual(max(len(task.rank) for task in tasks), 6)
+
+    def test_evenly_spaced_ranks(self):
+        ranks = evenly_spaced_ranks(1000)
+        self.assertEqual(ranks, sorted(set(ranks)))
+        self.assertEqual({len(rank) for rank in ranks}, {3})
+
+    @override_settings(TASK_RANK_MAX_LENGTH=4)
+    def test_rebalance_task_ranks_command(self):
+        user = User.objects.create(username="user1")
+        first = Task.objects.create(owner=user, title="first")
+        second = Task.objects.create(owner=user, title="second", rank="jzzzzzzi")
+        third = Task.objects.create(owner=user, title="third", rank="k")
+
+        call_command("rebalance_task_ranks", stdout=StringIO())
+
+        tasks = list(Task.objects.order_by("rank"))
+        self.assertEqual(tasks, [first, second, third])
+        self.assertTrue(all(len(task.rank) <= 4 for task in tasks))
+
+    def test_rebalance_task_ranks_command_noop(self):
+        out = StringIO()
+        call_command("rebalance_task_ranks", stdout=out)
+        self.assertIn("fine", out.getvalue())
@@ -0,0 +1,53 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import Task, TaskBlock, TaskSearchDocument, User
+from core.utils.task_search import block_text, search_tasks
+
+
+class TaskSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="user1")
+        cls.task = Task.objects.create(owner=cls.user, title="Release", tag="#backend", description="Deploy on Friday")
+
+    def test_block_text(self):
+        self.assertEqual(block_text("MARKDOWN", {"markdown": "# Notes"}), "# Notes")
+        self.assertEqual(
+            block_text("CHECKLIST", {"title": "Todo", "elements": [{"label": "one", "checked": True}, "two"]}),
+            "Todo\none\ntwo",
+        )
+        self.assertEqual(block_text("IMAGE", {"path": "image.png"}), "")
+        self.assertEqual(block_text("MARKDOWN", "not a dict"), "")
+
+    def test_document_follows_task(self):
+        document = TaskSearchDocument.objects.get(task=self.task)
+        self.assertEqual(document.title, "Release #backend")
+        self.assertEqual(document.body, "Deploy on Friday")
+
+        self.task.description = "Deploy on Monday"
+        self.task.save(update_fields=["description"])
+        self.assertEqual(list(search_tasks(Task.objects.all(), "monday")), [self.task])
+        self.assertEqual(list(search_tasks(Task.objects.all(), "friday")), [])
+
+    def test_search_every_word(self):
+        tasks = Task.objects.all()
+        self.assertEqual(list(search_tasks(tasks, "backend rel")), [self.task])
+        self.assertEqual(list(search_tasks(tasks, "backend frontend")), [])
+        self.assertEqual(list(search_tasks(tasks, '"*')), [])
+
+    def test_rebuild_command(self):
+        TaskBlock.objects.create(
+            task=self.task,
+            block_type=TaskBlock.BlockTypeChoices.MARKDOWN,
+            content={"markdown": "Changelog"},
+            created_by=self.user,
+        )
+        self.assertEqual(list(search_tasks(Task.objects.all(), "changelog")), [])
+
+        out = StringIO()
+        call_command("rebuild_task_search", stdout=out)
+        self.assertIn("Rebuilt search documents of 1 tasks", out.getvalue())
+        self.assertEqual(list(search_tasks(Task.objects.all(), "changelog")), [self.task])
@@ -0,0 +1,107 @@
+import datetime
+import zoneinfo
+from io import StringIO
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.models import DailyTimeRollup, Project, Task, TaskWorkSession, User
+from core.utils.time_rollup import split_by_day
+from core.utils.work_sessions import start_work, stop_work
+
+UTC = datetime.timezone.utc
+
+
+class SplitByDayTest(TestCase):
+    def test_split_at_local_midnight(self):
+        started_at = datetime.datetime(2024, 1, 1, 22, tzinfo=UTC)
+        stopped_at = datetime.datetime(2024, 1, 2, 1, 30, tzinfo=UTC)
+        self.assertEqual(
+            split_by_day(started_at, stopped_at, zoneinfo.ZoneInfo("UTC")),
+            [(datetime.date(2024, 1, 1), 7200), (datetime.date(2024, 1, 2), 5400)],
+        )
+        # 23:00 - 02:30 in Warsaw
+        self.assertEqual(
+            split_by_day(started_at, stopped_at, zoneinfo.ZoneInfo("Europe/Warsaw")),
+            [(datetime.date(2024, 1, 1), 3600), (datetime.date(2024, 1, 2), 9000)],
+        )
+
+    def test_empty(self):
+        started_at = datetime.datetime(2024, 1, 1, 22, tzinfo=UTC)
+        self.assertEqual(split_by_day(started_at, None, zoneinfo.ZoneInfo("UTC")), [])
+        self.assertEqual(split_by_day(started_at, started_at, zoneinfo.ZoneInfo("UTC")), [])
+
+
+class DailyTimeRollupTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="user1", email="user1@example.com")
+        cls.project = Project.objects.create(title="Project", owner=cls.user)
+        cls.task = Task.objects.create(owner=cls.user, title="Task", project=cls.project)
+        cls.started_at = datetime.datetime(2024, 1, 1, 23, tzinfo=UTC)
+        cls.session = TaskWorkSession.objects.create(
+            task=cls.task,
+            user=cls.user,
+            started_at=cls.started_at,
+            stopped_at=cls.started_at + datetime.timedelta(hours=2),
+        )
+
+    def rollup(self):
+        return dict(DailyTimeRollup.objects.filter(seconds__gt=0).values_list("date", "seconds"))
+
+    def test_session_save(self):
+        self.assertEqual(self.rollup(), {datetime.date(2024, 1, 1): 3600, datetime.date(2024, 1, 2): 3600})
+        self.assertEqual(DailyTimeRollup.objects.filter(project=self.project).count(), 2)
+
+        self.session.stopped_at = self.started_at + datetime.timedelta(minutes=30)
+        self.session.save()
+        self.assertEqual(self.rollup(), {datetime.date(2024, 1, 1): 1800})
+
+    def test_session_delete(self):
+        self.session.delete()
+        self.assertEqual(self.rollup(), {})
+
+    def test_stop_work(self):
+        session = start_work(self.user, self.task)
+        self.assertEqual(sum(self.rollup().values()), 7200)
+
+        TaskWorkSession.objects.filter(pk=session.pk).update(started_at=self.started_at - datetime.timedelta(hours=1))
+        stop_work(self.user, stopped_at=self.started_at - datetime.timedelta(minutes=30))
+        self.assertEqual(self.rollup(), {datetime.date(2024, 1, 1): 5400, datetime.date(2024, 1, 2): 3600})
+
+    def test_task_project_change(self):
+        project = Project.objects.create(title="Other project", owner=self.user)
+        self.task.project = project
+        self.task.save()
+        self.assertEqual(DailyTimeRollup.objects.filter(project=project).count(), 2)
+
+    def test_rebuild_command(self):
+        TaskWorkSession.objects.filter(pk=self.session.pk).update(
+            stopped_at=self.started_at + datetime.timedelta(hours=1)
+        )
+
+        out = StringIO()
+        call_command("rebuild_time_rollup", stdout=out)
+        self.assertIn("Rebuilt 1 daily time rollup rows", out.getvalue())
+        self.assertEqual(self.rollup(), {datetime.date(2024, 1, 1): 3600})
+
+    @override_settings(TIME_ROLLUP_TIME_ZONE="Europe/Warsaw")
+    def test_rollup_time_zone(self):
+        DailyTimeRollup.rebuild()
+        self.assertEqual(self.rollup(), {datetime.date(2024, 1, 2): 7200})
+
+    def test_send_user_report(self):
+        call_command(
+            "send_user_report",
+            "-u",
+            self.user.username,
+            "-s",
+            "2024-01-02",
+            "-e",
+            "2024-01-02",
+            "-r",
+            "boss@example.com",
+        )
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("Project:Task - 1h 0m 0s", mail.outbox[0].body)
@@ -0,0 +1,51 @@
+import datetime
+import io
+import os
+import tempfile
+import zipfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import Project, Task, TaskWorkSession, User
+from core.utils.xlsx import xlsx_chunks
+
+
+class XlsxTest(TestCase):
+    def test_cells(self):
+        data = b"".join(xlsx_chunks(("a", "b"), [(1, 'x<&"\x01'), (None, 2.5)], rows_per_chunk=1))
+        sheet = zipfile.ZipFile(io.BytesIO(data)).read("xl/worksheets/sheet1.xml").decode()
+        self.assertIn('<row r="2"><c><v>1</v></c><c t="inlineStr"><is><t xml:space="preserve">x&lt;&amp;"</t>', sheet)
+        self.assertIn('<row r="3"><c/><c><v>2.5</v></c></row>', sheet)
+
+
+class ExportTimesheetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="user1")
+        cls.project = Project.objects.create(title="Project", owner=cls.user)
+        task = Task.objects.create(owner=cls.user, title="Task", project=cls.project)
+        started_at = datetime.datetime(2024, 1, 1, 10, tzinfo=datetime.timezone.utc)
+        for days in range(3):
+            TaskWorkSession.objects.create(
+                task=task,
+                user=cls.user,
+                started_at=started_at + datetime.timedelta(days=days),
+                stopped_at=started_at + datetime.timedelta(days=days, hours=1),
+            )
+
+    def test_csv_to_stdout(self):
+        out = StringIO()
+        call_command("export_timesheet", "-s", "2024-01-02", "-p", str(self.project.id), stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertIn("user1", lines[1])
+
+    def test_xlsx_to_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "timesheet.xlsx")
+            call_command("export_timesheet", "-f", "xlsx", "-o", path, "-u", "user1", stderr=StringIO())
+            sheet = zipfile.ZipFile(path).read("xl/worksheets/sheet1.xml").decode()
+
+        self.assertEqual(sheet.count("<row "), 4)
@@ -0,0 +1,67 @@
+import datetime
+from io import StringIO
+
+from django.core import mail
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core.models import Task, TaskWorkSession, Team, User
+from core.utils.user_reports import report_days
+
+DATES = ["-s", "2024-01-01", "-e", "2024-01-07"]
+
+
+class SendUserReportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.team = Team.objects.create(name="Team")
+        cls.user_1 = User.objects.create(username="user1", email="user1@example.com")
+        cls.user_2 = User.objects.create(username="user2", email="user2@example.com")
+        cls.user_3 = User.objects.create(username="user3")
+        cls.user_1.teams.add(cls.team)
+        cls.user_3.teams.add(cls.team)
+
+        task = Task.objects.create(owner=cls.user_1, title="Task")
+        started_at = datetime.datetime(2024, 1, 2, 10, tzinfo=datetime.timezone.utc)
+        for user in (cls.user_1, cls.user_2):
+            TaskWorkSession.objects.create(
+                task=task, user=user, started_at=started_at, stopped_at=started_at + datetime.timedelta(hours=1)
+            )
+
+    def call(self, *args):
+        out, err = StringIO(), StringIO()
+        call_command("send_user_report", *DATES, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_report_days(self):
+        days = report_days([self.user_1.id, self.user_3.id], datetime.date(2024, 1, 1), datetime.date(2024, 1, 7))
+        self.assertEqual(days[self.user_1.id][datetime.date(2024, 1, 2)]["total"], 3600)
+        self.assertEqual(days[self.user_3.id], {})
+
+    def test_users(self):
+        out, _ = self.call("--users", f"user1,{self.user_2.id}")
+        self.assertIn("Sent 2 of 2 reports", out)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ["user1@example.com", "user2@example.com"])
+        self.assertIn("Task - 1h 0m 0s", mail.outbox[0].body)
+
+    def test_users_missing(self):
+        with self.assertRaisesMessage(CommandError, "Users do not exist: nobody"):
+            self.call("--users", "user1,nobody")
+
+    def test_team_failure_per_user(self):
+        with self.assertRaisesMessage(CommandError, "1 reports failed"):
+            self.call("--team", "Team")
+
+        self.assertEqual([message.to for message in mail.outbox], [["user1@example.com"]])
+
+    def test_all_with_recipient(self):
+        out, _ = self.call("--all", "-r", "boss@example.com")
+        self.assertIn("Sent 3 of 3 reports", out)
+        self.assertEqual({message.to[0] for message in mail.outbox}, {"boss@example.com"})
+
+    def test_dry_run(self):
+        out, _ = self.call("--all", "-r", "boss@example.com", "--dry-run")
+        self.assertIn("Would send User report: user1:2024-01-01-2024-01-07 to boss@example.com", out)
+        self.assertIn("Sent 0 of 3 reports", out)
+        self.assertEqual(mail.outbox, [])
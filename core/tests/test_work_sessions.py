@@ -0,0 +1,48 @@
+import datetime
+
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from core.models import Task, TaskWorkSession, User
+from core.utils.work_sessions import active_session, start_work, stop_work
+
+
+class WorkSessionsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="user1")
+        cls.task_1 = Task.objects.create(owner=cls.user, title="Task 1")
+        cls.task_2 = Task.objects.create(owner=cls.user, title="Task 2")
+
+    def test_one_open_session_per_user(self):
+        TaskWorkSession.objects.create(task=self.task_1, user=self.user)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            TaskWorkSession.objects.create(task=self.task_2, user=self.user)
+
+    def test_start_stops_open_session(self):
+        first = start_work(self.user, self.task_1)
+        TaskWorkSession.objects.filter(pk=first.pk).update(started_at=first.started_at - datetime.timedelta(minutes=5))
+
+        second = start_work(self.user, self.task_2)
+        first.refresh_from_db()
+        self.assertIsNotNone(first.stopped_at)
+        self.assertEqual(first.total_time, 300)
+        self.assertEqual(Task.objects.get(pk=self.task_1.pk).logged_seconds, 300)
+        self.assertEqual(list(TaskWorkSession.objects.filter(stopped_at__isnull=True)), [second])
+
+    def test_stop_only_once(self):
+        start_work(self.user, self.task_1)
+        self.assertIsNone(stop_work(self.user, task=self.task_2))
+        self.assertIsNotNone(stop_work(self.user, task=self.task_1))
+        self.assertIsNone(stop_work(self.user))
+
+    def test_active_session_cached(self):
+        self.assertIsNone(active_session(self.user))
+        session = start_work(self.user, self.task_1)
+
+        self.assertEqual(active_session(self.user), (session.id, self.task_1.id))
+        with self.assertNumQueries(0):
+            self.assertEqual(active_session(self.user), (session.id, self.task_1.id))
+
+        stop_work(self.user)
+        self.assertIsNone(active_session(self.user))
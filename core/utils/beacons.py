@@ -0,0 +1,56 @@
+"""
+Beacons ask users working on a task whether they are still there.
+
+A user with `use_beacons` working for longer than a (random) interval gets a beacon, unless one is waiting for
+confirmation or the last one was confirmed within the interval. Beacons not confirmed in time are closed and the
+work of their users is stopped. Both steps are a few statements for all users, see the create_beacons command.
+"""
+
+from datetime import timedelta
+
+from django.db.models import Exists, OuterRef
+from django.utils.timezone import now
+
+from core.models import Beacon, Log, User
+from core.utils.work_sessions import stop_work_for_users
+
+
+def create_beacons(interval_minutes, at=None):
+    """Create beacons for every eligible user, return the number of created beacons"""
+    cutoff_time = (at or now()) - timedelta(minutes=interval_minutes)
+    users = (
+        User.objects.filter(
+            use_beacons=True, task_work__stopped_at__isnull=True, task_work__started_at__lte=cutoff_time
+        )
+        .exclude(Exists(Beacon.objects.filter(user=OuterRef("pk"), confirmed_at__isnull=True)))
+        .exclude(Exists(Beacon.objects.filter(user=OuterRef("pk"), confirmed_at__gte=cutoff_time)))
+    )
+    user_ids = list(users.values_list("id", flat=True))
+
+    # a beacon created concurrently for the same user is left as it is by the unique constraint
+    Beacon.objects.bulk_create([Beacon(user_id=user_id) for user_id in user_ids], ignore_conflicts=True)
+    return len(user_ids)
+
+
+def expire_beacons(allowed_minutes, at=None):
+    """Close beacons not confirmed within `allowed_minutes` and stop work of their users, return stopped sessions"""
+    at = at or now()
+    expired = Beacon.objects.filter(confirmed_at__isnull=True, created_at__lte=at - timedelta(minutes=allowed_minutes))
+    user_ids = list(expired.values_list("user", flat=True))
+    if not user_ids:
+        return []
+
+    Beacon.objects.filter(user__in=user_ids, confirmed_at__isnull=True).update(confirmed_at=at)
+    sessions = stop_work_for_users(user_ids, stopped_at=at)
+    Log.objects.bulk_create(
+        [
+            Log(
+                event_type=Log.EventType.WORK_STOPPED,
+                task=session.task,
+                user=session.user,
+                message=f"Beacon not confirmed in time. Stopping work on task [{session.task}] [{session.user}]",
+            )
+            for session in sessions
+        ]
+    )
+    return sessions
@@ -0,0 +1,132 @@
+from django.db import transaction
+from django.utils.timezone import now
+from simple_history.utils import bulk_create_with_history, bulk_update_with_history
+
+from core.models import TaskBlock, TaskSearchDocument
+from core.utils.block_positions import BLOCK_POSITION_GAP, position_between
+from core.utils.block_revisions import record_revisions
+
+
+class BlockVersionConflict(Exception):
+    """An update was made for another version of the block than the stored one"""
+
+    def __init__(self, message, version):
+        super().__init__(message)
+        self.version = version
+
+
+class BlockBatch:
+    """
+    Apply a list of block operations to one task in memory and write the result at once.
+    Positions are computed the same way as for single operations (see core.utils.block_positions).
+    """
+
+    def __init__(self, task, user):
+        self.task = task
+        self.user = user
+        blocks = task.blocks.select_for_update(of=("self",)).select_related("created_by").filter(is_archived=False)
+        self.blocks = list(blocks.order_by("position", "id"))
+        self.by_id = {str(block.id): block for block in self.blocks}
+        self.initial_positions = {block.id: block.position for block in self.blocks}
+        self.initial_versions = {block.id: block.version for block in self.blocks}
+        self.created = {}
+        self.updated = {}
+        self.previous_contents = {}
+        self.archived = {}
+
+    def get_block(self, block_id):
+        if str(block_id) not in self.by_id:
+            raise KeyError(f"Block {block_id} not found in task {self.task.id}")
+
+        return self.by_id[str(block_id)]
+
+    def check_version(self, block, version):
+        """`version` the client started from must be the stored (locked) one, blocks created in the batch have none"""
+        if block.id not in self.created and str(version) != str(self.initial_versions[block.id]):
+            raise BlockVersionConflict("Block was changed in the meantime", self.initial_versions[block.id])
+
+    def place(self, block, index):
+        index = min(max(index, 0), len(self.blocks))
+        before = self.blocks[index - 1].position if index > 0 else None
+        after = self.blocks[index].position if index < len(self.blocks) else None
+
+        self.blocks.insert(index, block)
+        block.position = position_between(before, after)
+        if block.position is None:
+            for slot, other in enumerate(self.blocks):
+                other.position = (slot + 1) * BLOCK_POSITION_GAP
+
+    def create(self, index, **fields):
+        block = TaskBlock(task=self.task, created_by=self.user, **fields)
+        self.place(block, index)
+        self.by_id[str(block.id)] = block
+        self.created[block.id] = block
+        return block
+
+    def update(self, block_id, **fields):
+        block = self.get_block(block_id)
+        previous_content = block.content
+        for field, value in fields.items():
+            setattr(block, field, value)
+
+        if block.id not in self.created:
+            block.version += 1
+            self.updated[block.id] = block
+            self.previous_contents.setdefault(block.id, previous_content)
+        return block
+
+    def move(self, block_id, index):
+        block = self.get_block(block_id)
+        self.blocks.remove(block)
+        self.place(block, index)
+        return block
+
+    def delete(self, block_id):
+        block = self.get_block(block_id)
+        self.blocks.remove(block)
+        del self.by_id[str(block.id)]
+        block.is_archived = True
+
+        if self.created.pop(block.id, None) is None:
+            self.updated.pop(block.id, None)
+            self.archived[block.id] = block
+
+    def changed_positions(self):
+        return {
+            str(block.id): block.position
+            for block in self.blocks
+            if block.id in self.initial_positions and block.position != self.initial_positions[block.id]
+        }
+
+    def save(self):
+        """
+        Write created and changed blocks with bulk inserts and updates. Content edits are recorded as revisions,
+        only created, moved and archived blocks get history rows (as with single operations).
+        """
+        moved = {
+            block.id: block
+            for block in self.blocks
+            if block.id in self.initial_positions and block.position != self.initial_positions[block.id]
+        }
+        with_history = dict(self.archived)
+        with_history.update(moved)
+        edited = [block for block_id, block in self.updated.items() if block_id not in with_history]
+
+        timestamp = now()
+        for block in [*with_history.values(), *edited]:
+            block.updated_at = timestamp
+
+        fields = ["block_type", "content", "version", "position", "is_archived", "updated_at"]
+        with transaction.atomic():
+            if self.created:
+                bulk_create_with_history(list(self.created.values()), TaskBlock, default_user=self.user)
+            if with_history:
+                bulk_update_with_history(list(with_history.values()), TaskBlock, fields, default_user=self.user)
+            if edited:
+                TaskBlock.objects.bulk_update(edited, fields)
+
+            revisions = [(block, None) for block in self.created.values()]
+            revisions += [(block, self.previous_contents[block.id]) for block in self.updated.values()]
+            record_revisions(revisions, self.user)
+            if self.created or with_history or edited:
+                TaskSearchDocument.refresh([self.task.id])
@@ -0,0 +1,61 @@
+"""
+Sparse TaskBlock positions.
+
+Blocks of a task are BLOCK_POSITION_GAP apart, so inserting or moving a block writes only that block.
+Clients still send the index where the block should end up, `position_at_index` turns it into a position.
+"""
+
+BLOCK_POSITION_GAP = 1024
+
+
+def position_at_index(blocks, index):
+    """
+    Return `(position, rebalanced)` for putting a block at `index` of `blocks` (clamped to their range).
+    `rebalanced` is `{block id: position}` of blocks renumbered because the neighbours had no room left,
+    it's empty unless the same spot was split about ten times already.
+    """
+    index = max(index, 0)
+    ordered = blocks.order_by("position", "id")
+
+    start, stop = max(index - 1, 0), index + 1
+    neighbours = list(ordered.values_list("position", flat=True)[start:stop])
+    if index == 0:
+        before, after = None, neighbours[0] if neighbours else None
+    elif neighbours:
+        before, after = neighbours[0], neighbours[1] if len(neighbours) > 1 else None
+    else:
+        before, after = ordered.reverse().values_list("position", flat=True).first(), None
+
+    position = position_between(before, after)
+    if position is not None:
+        return position, {}
+
+    return rebalance_positions(ordered, index)
+
+
+def position_between(before, after):
+    """Position between two neighbours (None when missing), or None when they have no room left"""
+    if before is None and after is None:
+        return BLOCK_POSITION_GAP
+    if before is None:
+        return after - BLOCK_POSITION_GAP
+    if after is None:
+        return before + BLOCK_POSITION_GAP
+    if after - before > 1:
+        return (before + after) // 2
+
+    return None
+
+
+def rebalance_positions(ordered, index):
+    """Renumber `ordered` blocks leaving a free slot at `index`, in one batched update"""
+    block_ids = list(ordered.values_list("id", flat=True))
+    index = min(index, len(block_ids))
+
+    renumbered = [
+        ordered.model(id=block_id, position=(slot + (1 if slot < index else 2)) * BLOCK_POSITION_GAP)
+        for slot, block_id in enumerate(block_ids)
+    ]
+    ordered.model.objects.bulk_update(renumbered, ["position"])
+
+    return (index + 1) * BLOCK_POSITION_GAP, {str(block.id): block.position for block in renumbered}
@@ -0,0 +1,157 @@
+"""
+Revisions of TaskBlock content.
+
+Every content change goes through `record_revisions`. Edits of one block by the same user within
+TASK_BLOCK_REVISION_WINDOW seconds extend the latest revision instead of adding a new one. Every
+TASK_BLOCK_KEYFRAME_INTERVAL-th revision stores the full content, the others only a delta from the previous
+revision: JSON Patch operations plus `splice` operations which change a part of a long string.
+"""
+
+import copy
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+from django.utils.timezone import now
+
+from core.models import TaskBlockRevision
+from core.utils.json_patch import apply_operation, make_patch, parse_pointer, resolve
+
+SPLICE_MIN_LENGTH = 80
+
+
+def splice_edit(old, new):
+    """Return `[start, end, text]` replacing `old[start:end]` with `text` to get `new`"""
+    start = 0
+    while start < min(len(old), len(new)) and old[start] == new[start]:
+        start += 1
+
+    end = 0
+    while end < min(len(old), len(new)) - start and old[-end - 1] == new[-end - 1]:
+        end += 1
+
+    new_end = len(new) - end
+    return [start, len(old) - end, new[start:new_end]]
+
+
+def diff_content(old, new):
+    delta = []
+    for operation in make_patch(old, new):
+        if operation["op"] == "replace" and isinstance(operation["value"], str):
+            old_value = resolve(old, parse_pointer(operation["path"]))
+            if isinstance(old_value, str) and len(old_value) >= SPLICE_MIN_LENGTH:
+                delta.append(
+                    {"op": "splice", "path": operation["path"], "edits": [splice_edit(old_value, operation["value"])]}
+                )
+                continue
+
+        delta.append(operation)
+
+    return delta
+
+
+def apply_delta(content, delta):
+    content = copy.deepcopy(content)
+    for operation in delta:
+        if operation["op"] == "splice":
+            value = resolve(content, parse_pointer(operation["path"]))
+            for start, end, text in reversed(operation["edits"]):
+                value = value[:start] + text + value[end:]
+            operation = {"op": "replace", "path": operation["path"], "value": value}
+
+        content = apply_operation(content, operation)
+
+    return content
+
+
+def is_larger(delta, content):
+    return len(json.dumps(delta)) >= len(json.dumps(content))
+
+
+def record_revisions(changes, user):
+    """
+    Record content of blocks after a change, `changes` are `(block, content before the change)` pairs
+    (None for new blocks). Reads latest revisions in one query and writes with one insert and one update.
+    """
+    if not changes:
+        return
+
+    latest_numbers = TaskBlockRevision.objects.filter(block=OuterRef("block")).order_by("-number").values("number")
+    latest = {
+        revision.block_id: revision
+        for revision in TaskBlockRevision.objects.filter(
+            block__in=[block for block, _ in changes], number=Subquery(latest_numbers[:1])
+        )
+    }
+
+    timestamp = now()
+    window = timedelta(seconds=settings.TASK_BLOCK_REVISION_WINDOW)
+    created, updated = [], []
+    for block, previous_content in changes:
+        revision = latest.get(block.id)
+        if (
+            revision is not None
+            and previous_content is not None
+            and revision.user_id == getattr(user, "id", None)
+            and timestamp - revision.updated_at < window
+        ):
+            if not revision.is_keyframe:
+                revision.delta = revision.delta + diff_content(previous_content, block.content)
+                if is_larger(revision.delta, block.content):
+                    revision.delta = None
+                    revision.is_keyframe = True
+                    revision.keyframe_distance = 0
+
+            if revision.is_keyframe:
+                revision.content = block.content
+            revision.version = block.version
+            revision.block_type = block.block_type
+            revision.updated_at = timestamp
+            updated.append(revision)
+            continue
+
+        new_revision = TaskBlockRevision(
+            block=block,
+            number=revision.number + 1 if revision else 1,
+            user=user,
+            version=block.version,
+            block_type=block.block_type,
+            keyframe_distance=revision.keyframe_distance + 1 if revision else 0,
+        )
+        if revision is not None and previous_content is not None:
+            new_revision.delta = diff_content(previous_content, block.content)
+
+        if (
+            new_revision.delta is None
+            or new_revision.keyframe_distance >= settings.TASK_BLOCK_KEYFRAME_INTERVAL
+            or is_larger(new_revision.delta, block.content)
+        ):
+            new_revision.is_keyframe = True
+            new_revision.keyframe_distance = 0
+            new_revision.delta = None
+            new_revision.content = block.content
+
+        created.append(new_revision)
+
+    TaskBlockRevision.objects.bulk_create(created)
+    TaskBlockRevision.objects.bulk_update(
+        updated, ["content", "delta", "is_keyframe", "keyframe_distance", "version", "block_type", "updated_at"]
+    )
+
+
+def revision_content(block_id, number):
+    """Rebuild the block content of revision `number` from the closest keyframe"""
+    revision = TaskBlockRevision.objects.get(block_id=block_id, number=number)
+    if revision.is_keyframe:
+        return revision.content
+
+    chain = TaskBlockRevision.objects.filter(
+        block_id=block_id, number__gte=number - revision.keyframe_distance, number__lte=number
+    ).order_by("number")
+
+    content = None
+    for link in chain:
+        content = link.content if link.is_keyframe else apply_delta(content, link.delta)
+
+    return content
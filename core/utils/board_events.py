@@ -0,0 +1,30 @@
+"""
+Websocket events of boards, sent on the `BRD_<board id>` channel once the change is committed.
+
+Events carry only what changed so collaborators patch their state instead of reloading the board: ids with their
+new positions, and the plain fields of created or updated cards and items. Items reference their task, project or
+board by id only, titles are left out as not every collaborator may see them.
+"""
+
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from core.utils.websockets import WebsocketHelper
+
+
+def board_channel(board_id):
+    return f"BRD_{board_id}"
+
+
+def positions(queryset):
+    """`{id: position}` of the cards or items of `queryset`"""
+    return {str(pk): position for pk, position in queryset.values_list("id", "position")}
+
+
+def send_board_event(board_id, event_name, data):
+    data = json.loads(json.dumps(data, cls=DjangoJSONEncoder))
+    transaction.on_commit(
+        lambda: WebsocketHelper.send(channel=board_channel(board_id), event_name=event_name, data=data)
+    )
@@ -0,0 +1,30 @@
+def snapshot_fields(instance, fields):
+    """Remember current values of given fields (relations by their id) to diff them after save"""
+    return {field: instance.serializable_value(field) for field in fields}
+
+
+def changed_fields(instance, snapshot):
+    """Return `{field: {"from": ..., "to": ...}}` for every snapshot field that differs from the instance"""
+    changes = {}
+    for field, old_value in snapshot.items():
+        new_value = instance.serializable_value(field)
+        if new_value != old_value:
+            changes[field] = {"from": old_value, "to": new_value}
+
+    return changes
+
+
+def describe_changes(instance, changes):
+    """Human readable version of `changed_fields` result, used for Log messages"""
+    descriptions = []
+    for field, change in changes.items():
+        model_field = instance._meta.get_field(field)
+        if model_field.is_relation:
+            old_value = model_field.related_model.objects.filter(pk=change["from"]).first()
+            new_value = getattr(instance, field)
+        else:
+            old_value, new_value = change["from"], change["to"]
+
+        descriptions.append(f"{field} changed from {old_value} to {new_value}")
+
+    return ", ".join(descriptions)
@@ -5,3 +5,14 @@ def extract_hashtags(text):
             hashtag_list.append(word[1:])
 
     return hashtag_list
+
+
+def parse_tags(value):
+    """Tag names of a comma or space separated `tag` field, lowercase, without `#` and duplicates"""
+    names = []
+    for word in (value or "").replace(",", " ").split():
+        name = word.lstrip("#").lower()[:150]
+        if name and name not in names:
+            names.append(name)
+
+    return names
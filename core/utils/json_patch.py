@@ -0,0 +1,180 @@
+"""
+JSON Patch (RFC 6902) for JSON documents stored in JSONFields, with JSON Pointers (RFC 6901) as paths.
+
+`apply_patch` never modifies the given document, a patch is applied completely or not at all.
+"""
+
+import copy
+
+OPERATIONS = ("add", "remove", "replace", "move", "copy", "test")
+
+
+class JsonPatchError(ValueError):
+    pass
+
+
+class JsonPatchConflict(JsonPatchError):
+    """A `test` operation failed, i.e. the document is not in the state the patch was made for"""
+
+
+def parse_pointer(pointer):
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith("/")):
+        raise JsonPatchError(f"Invalid JSON pointer: {pointer!r}")
+    if not pointer:
+        return []
+
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def list_index(container, token, allow_end=False):
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token.startswith("0")):
+        raise JsonPatchError(f"Invalid list index: {token!r}")
+
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise JsonPatchError(f"List index out of range: {token}")
+    return index
+
+
+def resolve(document, tokens):
+    """Return the value at `tokens`"""
+    value = document
+    for token in tokens:
+        if isinstance(value, dict) and token in value:
+            value = value[token]
+        elif isinstance(value, list):
+            value = value[list_index(value, token)]
+        else:
+            raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+
+    return value
+
+
+def json_equal(first, second):
+    """Equality by JSON rules, where `true` is not equal to `1`"""
+    if isinstance(first, bool) or isinstance(second, bool):
+        return type(first) is type(second) and first == second
+    if isinstance(first, dict) and isinstance(second, dict):
+        return first.keys() == second.keys() and all(json_equal(first[key], second[key]) for key in first)
+    if isinstance(first, list) and isinstance(second, list):
+        return len(first) == len(second) and all(json_equal(a, b) for a, b in zip(first, second))
+    return first == second
+
+
+def add(document, tokens, value):
+    if not tokens:
+        return value
+
+    container = resolve(document, tokens[:-1])
+    if isinstance(container, dict):
+        container[tokens[-1]] = value
+    elif isinstance(container, list):
+        container.insert(list_index(container, tokens[-1], allow_end=True), value)
+    else:
+        raise JsonPatchError(f"Cannot add to a scalar at /{'/'.join(tokens[:-1])}")
+
+    return document
+
+
+def remove(document, tokens):
+    if not tokens:
+        raise JsonPatchError("Cannot remove the whole document")
+
+    container = resolve(document, tokens[:-1])
+    if isinstance(container, dict) and tokens[-1] in container:
+        del container[tokens[-1]]
+    elif isinstance(container, list):
+        del container[list_index(container, tokens[-1])]
+    else:
+        raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+
+    return document
+
+
+def apply_operation(document, operation):
+    if not isinstance(operation, dict) or operation.get("op") not in OPERATIONS:
+        raise JsonPatchError(f"Invalid operation: {operation!r}")
+
+    op = operation["op"]
+    tokens = parse_pointer(operation.get("path"))
+    if op in ("add", "replace", "test") and "value" not in operation:
+        raise JsonPatchError(f"Operation {op} requires a value")
+
+    if op == "add":
+        return add(document, tokens, copy.deepcopy(operation["value"]))
+
+    if op == "remove":
+        return remove(document, tokens)
+
+    if op == "replace":
+        resolve(document, tokens)
+        if not tokens:
+            return copy.deepcopy(operation["value"])
+
+        container = resolve(document, tokens[:-1])
+        key = list_index(container, tokens[-1]) if isinstance(container, list) else tokens[-1]
+        container[key] = copy.deepcopy(operation["value"])
+        return document
+
+    if op == "test":
+        if not json_equal(resolve(document, tokens), operation["value"]):
+            raise JsonPatchConflict(f"Test failed at {operation['path']}")
+        return document
+
+    from_tokens = parse_pointer(operation.get("from"))
+    value = resolve(document, from_tokens)
+    if op == "copy":
+        return add(document, tokens, copy.deepcopy(value))
+
+    # move
+    if tokens[: len(from_tokens)] == from_tokens and tokens != from_tokens:
+        raise JsonPatchError("Cannot move a value into itself")
+    return add(remove(document, from_tokens), tokens, value)
+
+
+def apply_patch(document, patch):
+    """Return a patched copy of `document`, raise JsonPatchError if any operation can't be applied"""
+    if not isinstance(patch, list):
+        raise JsonPatchError("Patch has to be a list of operations")
+
+    document = copy.deepcopy(document)
+    for operation in patch:
+        document = apply_operation(document, operation)
+
+    return document
+
+
+def escape_token(token):
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def make_patch(old, new, path=""):
+    """Return a patch turning `old` into `new` (object keys and list items are compared position by position)"""
+    if json_equal(old, new):
+        return []
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        patch = []
+        for key in old:
+            if key not in new:
+                patch.append({"op": "remove", "path": f"{path}/{escape_token(key)}"})
+        for key, value in new.items():
+            if key in old:
+                patch.extend(make_patch(old[key], value, f"{path}/{escape_token(key)}"))
+            else:
+                patch.append({"op": "add", "path": f"{path}/{escape_token(key)}", "value": value})
+        return patch
+
+    if isinstance(old, list) and isinstance(new, list):
+        patch = []
+        for index, (old_item, new_item) in enumerate(zip(old, new)):
+            patch.extend(make_patch(old_item, new_item, f"{path}/{index}"))
+        for index in range(len(old) - 1, len(new) - 1, -1):
+            patch.append({"op": "remove", "path": f"{path}/{index}"})
+        for index in range(len(old), len(new)):
+            patch.append({"op": "add", "path": f"{path}/-", "value": new[index]})
+        return patch
+
+    return [{"op": "replace", "path": path, "value": new}]
@@ -0,0 +1,148 @@
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+from core.models import Log
+
+logger = logging.getLogger(__name__)
+
+_current_buffer: ContextVar["LogBuffer | None"] = ContextVar("log_buffer", default=None)
+
+
+class LogWriter:
+    """
+    Background writer used by buffers in async mode.
+    Batches are handed over through a queue and written by a single daemon thread.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, entries):
+        self._ensure_running()
+        self._queue.put(entries)
+
+    def join(self):
+        """Block until every submitted batch has been written"""
+        self._queue.join()
+
+    def _ensure_running(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            entries = self._queue.get()
+            try:
+                Log.objects.bulk_create(entries)
+            except Exception as ex:
+                logger.exception(f"Writing {len(entries)} log entries failed: {ex}")
+            finally:
+                close_old_connections()
+                self._queue.task_done()
+
+
+log_writer = LogWriter()
+
+
+class LogBuffer:
+    """
+    Collects Log entries and writes them with a single bulk_create.
+    An entry written inside a transaction is only kept once that transaction commits, it is dropped when the
+    transaction (or the savepoint it was written in) rolls back, the same way a direct insert would have been.
+    """
+
+    def __init__(self, use_async=False):
+        self.use_async = use_async
+        self.entries = []
+        self.uncommitted = set()
+
+    def add(self, **fields):
+        entry = Log(**fields)
+        if not connection.in_atomic_block:
+            self.entries.append(entry)
+            return entry
+
+        # rolled back transactions never call the callback, so their entries stay uncommitted and are not written
+        self.uncommitted.add(entry)
+        transaction.on_commit(partial(self.committed, entry))
+        return entry
+
+    def committed(self, entry):
+        self.uncommitted.discard(entry)
+        self.entries.append(entry)
+
+    def discard(self):
+        self.entries = []
+        self.uncommitted = set()
+
+    def flush(self):
+        # A direct insert pointing to an object deleted later in the request would have been removed by the cascade
+        entries = [entry for entry in self.entries if not _references_deleted_object(entry)]
+        self.entries = []
+
+        if self.uncommitted and connection.in_atomic_block:
+            # a transaction around the whole buffer is still open, what it commits is written after it
+            transaction.on_commit(self.flush)
+
+        if not entries:
+            return
+        if self.use_async:
+            log_writer.submit(entries)
+        else:
+            Log.objects.bulk_create(entries)
+
+
+def _references_deleted_object(entry):
+    for field in entry._meta.concrete_fields:
+        if field.is_relation and field.is_cached(entry):
+            related = field.get_cached_value(entry)
+            if related is not None and related.pk is None:
+                return True
+
+    return False
+
+
+@contextmanager
+def buffered_logs(use_async=None):
+    """
+    Route every `write_log` call made inside the block to one buffer.
+    The buffer is flushed when the block exits with the entries whose transactions committed, and dropped when
+    the block exits with an exception.
+    """
+    if use_async is None:
+        use_async = settings.LOG_BUFFER_ASYNC
+
+    buffer = LogBuffer(use_async=use_async)
+    token = _current_buffer.set(buffer)
+    try:
+        yield buffer
+    except BaseException:
+        buffer.discard()
+        raise
+    finally:
+        _current_buffer.reset(token)
+
+    buffer.flush()
+
+
+def write_log(**fields):
+    """
+    Drop-in replacement for `Log.objects.create`.
+    Inside `buffered_logs` (every API request) the entry is queued, otherwise it is written right away.
+    """
+    buffer = _current_buffer.get()
+    if buffer is None:
+        return Log.objects.create(**fields)
+
+    return buffer.add(**fields)
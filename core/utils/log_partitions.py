@@ -0,0 +1,123 @@
+"""
+Monthly partitioning of the Log table.
+
+On PostgreSQL `core_log` is a table partitioned by range of `created_at`, one partition per month
+(plus a default one), so any query with a `created_at` bound only touches the matching months.
+Other databases (SQLite in tests and local setups) keep recent rows in `core_log` and move older
+months to `core_logarchive`. `log_sources` hides the difference from views.
+"""
+
+import datetime
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from core.models import Log, LogArchive
+
+LOG_TABLE = Log._meta.db_table
+
+
+def uses_native_partitions():
+    return connection.vendor == "postgresql"
+
+
+def month_start(value):
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time.min)
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, datetime.timezone.utc)
+
+    value = value.astimezone(datetime.timezone.utc)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month, months):
+    month_index = month.month - 1 + months
+    return month.replace(year=month.year + month_index // 12, month=month_index % 12 + 1)
+
+
+def iter_months(start, end):
+    """Yield first moments of every month from `start` up to and including `end`"""
+    month = month_start(start)
+    last = month_start(end)
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+
+def partition_name(month):
+    return f"{LOG_TABLE}_p{month:%Y%m}"
+
+
+def create_partitions(start, end):
+    """Create missing monthly partitions covering `start`..`end` (PostgreSQL only)"""
+    created = []
+    with connection.cursor() as cursor:
+        for month in iter_months(start, end):
+            name = partition_name(month)
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{LOG_TABLE}" FOR VALUES FROM (%s) TO (%s)',
+                [month, add_months(month, 1)],
+            )
+            created.append(name)
+
+    return created
+
+
+def archive_horizon():
+    """Rows created before this moment belong to the archive"""
+    return add_months(month_start(timezone.now()), -(settings.LOG_HOT_MONTHS - 1))
+
+
+def archive_logs(before):
+    """Move Log rows created before `before` to LogArchive with two set based statements"""
+    columns = ", ".join(f'"{field.column}"' for field in Log._meta.concrete_fields)
+    before = connection.ops.adapt_datetimefield_value(before)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO "{LogArchive._meta.db_table}" ({columns}) '
+            f'SELECT {columns} FROM "{LOG_TABLE}" WHERE "created_at" < %s',
+            [before],
+        )
+        moved = cursor.rowcount
+        cursor.execute(f'DELETE FROM "{LOG_TABLE}" WHERE "created_at" < %s', [before])
+
+    return moved
+
+
+def log_sources(start=None, end=None):
+    """
+    Return querysets that can hold Log rows created in [start, end), already bounded by that period.
+    With native partitions it's always the Log table and PostgreSQL prunes partitions by the bounds.
+    Otherwise the archive is added only when the period reaches back past the newest archived row.
+    """
+    bounds = {}
+    if start is not None:
+        bounds["created_at__gte"] = start
+    if end is not None:
+        bounds["created_at__lt"] = end
+
+    if uses_native_partitions():
+        return [Log.objects.filter(**bounds)]
+
+    archived_until = LogArchive.objects.aggregate(newest=Max("created_at"))["newest"]
+    if archived_until is None:
+        return [Log.objects.filter(**bounds)]
+
+    sources = []
+    if end is None or end > archived_until:
+        sources.append(Log.objects.filter(**bounds))
+    if start is None or start <= archived_until:
+        sources.append(LogArchive.objects.filter(**bounds))
+
+    return sources
+
+
+def combine_sources(sources):
+    """Merge querysets returned by `log_sources` into one (no filtering is possible afterwards)"""
+    if len(sources) == 1:
+        return sources[0]
+
+    return sources[0].order_by().union(*[source.order_by() for source in sources[1:]])
@@ -0,0 +1,34 @@
+"""
+Logged work totals of tasks and projects.
+
+Task.logged_seconds and Project.logged_seconds are kept up to date by TaskWorkSession.save and delete with
+F() updates. `reconcile_logged_seconds` recomputes them from the sessions for rows that drifted anyway
+(bulk updates, cascading deletes, ...).
+"""
+
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from core.models import Project, Task, TaskWorkSession
+
+
+def session_totals(**lookups):
+    """Sum of total_time of sessions matching `lookups` (with OuterRef) as a subquery, 0 without sessions"""
+    sessions = TaskWorkSession.objects.filter(**lookups).order_by().values(*lookups)
+    return Coalesce(Subquery(sessions.annotate(total=Sum("total_time")).values("total")), 0)
+
+
+def reconcile_logged_seconds(dry_run=False):
+    """Fix totals which differ from the sessions, return the number of drifted tasks and projects"""
+    counts = []
+    for model, totals in (
+        (Task, session_totals(task=OuterRef("pk"))),
+        (Project, session_totals(task__project=OuterRef("pk"))),
+    ):
+        drifted = model.objects.annotate(actual=totals).exclude(logged_seconds=F("actual"))
+        drifted_ids = list(drifted.values_list("pk", flat=True))
+        if drifted_ids and not dry_run:
+            model.objects.filter(pk__in=drifted_ids).update(logged_seconds=totals)
+        counts.append(len(drifted_ids))
+
+    return tuple(counts)
@@ -1,4 +1,6 @@
-from core.models import ProjectAccess, TaskAccess
+from django.db.models import Q
+
+from core.models import Project, ProjectAccess, TaskAccess, User
 
 
 def user_can_see_task(user, task):
@@ -26,3 +28,42 @@ def user_can_see_project(user, project):
         return True
 
     return False
+
+
+def visible_task_ids(user, tasks):
+    """Ids of `tasks` (with their projects loaded) `user_can_see_task` is true for, with two queries at most"""
+    visible = {
+        task.id for task in tasks if task.owner_id == user.id or (task.project and task.project.owner_id == user.id)
+    }
+    hidden = [task for task in tasks if task.id not in visible]
+    if not hidden:
+        return visible
+
+    visible |= set(
+        TaskAccess.objects.filter(user=user, task__in=[task.id for task in hidden]).values_list("task", flat=True)
+    )
+    project_ids = {task.project_id for task in hidden if task.id not in visible and task.project_id}
+    if project_ids:
+        shared = set(ProjectAccess.objects.filter(user=user, project__in=project_ids).values_list("project", flat=True))
+        visible |= {task.id for task in hidden if task.project_id in shared}
+
+    return visible
+
+
+def visible_project_ids(user, projects):
+    """Ids of `projects` `user_can_see_project` is true for, with one query at most"""
+    visible = {project.id for project in projects if project.owner_id == user.id}
+    hidden = {project.id for project in projects if project.id not in visible}
+    if hidden:
+        visible |= set(ProjectAccess.objects.filter(user=user, project__in=hidden).values_list("project", flat=True))
+
+    return visible
+
+
+def visible_user_ids(user, user_ids):
+    """Ids of `user_ids` whose work `user` can see: their own and of users sharing a team or a project with them"""
+    projects = Project.objects.filter(Q(owner=user) | Q(permissions__user=user)).values("pk")
+    shared = User.objects.filter(pk__in=user_ids).filter(
+        Q(teams__user=user) | Q(owned_projects__in=projects) | Q(projects__project__in=projects)
+    )
+    return set(shared.values_list("id", flat=True)) | ({user.id} & set(user_ids))
@@ -0,0 +1,53 @@
+"""
+Gap based priorities for UserTaskQueue (higher is more important).
+
+Neighbouring rows are PRIORITY_GAP apart so a row can be moved between two others by updating only that
+row. When two neighbours get too close the user's queue is renumbered with one batched update.
+"""
+
+from core.models import UserTaskQueue
+
+PRIORITY_GAP = 1024
+
+
+def top_priority(user):
+    highest = UserTaskQueue.objects.filter(user=user).order_by("-priority").values_list("priority", flat=True).first()
+    return PRIORITY_GAP if highest is None else highest + PRIORITY_GAP
+
+
+def bottom_priority(user):
+    lowest = UserTaskQueue.objects.filter(user=user).order_by("priority").values_list("priority", flat=True).first()
+    return PRIORITY_GAP if lowest is None else lowest - PRIORITY_GAP
+
+
+def apply_queue_order(entries):
+    """Renumber `entries` (most important first) with full gaps in a single UPDATE statement"""
+    for index, entry in enumerate(entries):
+        entry.priority = (len(entries) - index) * PRIORITY_GAP
+
+    UserTaskQueue.objects.bulk_update(entries, ["priority"])
+
+
+def rebalance_queue(user):
+    apply_queue_order(list(UserTaskQueue.objects.filter(user=user).order_by("-priority", "id").only("id", "priority")))
+
+
+def priority_below(entry, above):
+    """Return a priority placing `entry` right below `above` (or on top when None), rebalancing if needed"""
+    others = UserTaskQueue.objects.filter(user=entry.user).exclude(pk=entry.pk)
+    if above is None:
+        highest = others.order_by("-priority").values_list("priority", flat=True).first()
+        return entry.priority if highest is None else highest + PRIORITY_GAP
+
+    for _ in range(2):
+        lower = others.filter(priority__lt=above.priority).order_by("-priority").values_list("priority", flat=True)
+        lower_priority = lower.first()
+        if lower_priority is None:
+            return above.priority - PRIORITY_GAP
+        if above.priority - lower_priority > 1:
+            return (above.priority + lower_priority) // 2
+
+        rebalance_queue(entry.user)
+        above.refresh_from_db(fields=["priority"])
+
+    raise RuntimeError("No room in queue priorities after rebalancing")
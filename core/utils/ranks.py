@@ -0,0 +1,84 @@
+"""
+Lexicographic rank keys for manually ordered rows.
+
+A rank is a string of base 36 digits compared as plain text, so a row can always be placed between two
+neighbours by generating a key in between them, without touching any other row. Keys never end with the
+lowest digit, otherwise nothing could be placed right before them.
+"""
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+
+
+def rank_between(before=None, after=None):
+    """
+    Return a key sorting strictly between `before` and `after` (None means no bound on that side).
+    Appending or prepending steps the neighbouring key by one at its length and doubles the length only once that
+    length is used up, so keys stay short; a bisection adds roughly one digit.
+    """
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f"Cannot place a rank between {before!r} and {after!r}")
+
+    if before and after is None:
+        return _step(before, 1) or before + DIGITS[0] * (len(before) - 1) + DIGITS[1]
+    if not before and after:
+        return _step(after, -1) or DIGITS[0] * len(after) + DIGITS[-1] * len(after)
+
+    before = before or ""
+    rank = ""
+    position = 0
+    while True:
+        lower_open = position >= len(before)
+        low = 0 if lower_open else DIGITS.index(before[position])
+        high = BASE if after is None else DIGITS.index(after[position])
+
+        if high - low > 1:
+            if after is None and not lower_open:
+                digit = low + 1
+            elif lower_open and after is not None:
+                digit = high - 1
+            else:
+                digit = (low + high) // 2
+            return rank + DIGITS[digit]
+
+        rank += DIGITS[low]
+        if high - low == 1:
+            # the key is already below `after`, whatever follows
+            after = None
+        position += 1
+
+
+def evenly_spaced_ranks(count):
+    """Return `count` ascending keys of equal length, spread evenly so each gap leaves room for new rows"""
+    width = 2
+    while BASE**width < (count + 1) * BASE:
+        width += 1
+
+    step = BASE**width // (count + 1)
+    ranks = []
+    for index in range(1, count + 1):
+        value = index * step
+        if value % BASE == 0:
+            value += 1
+
+        ranks.append(_digits(value, width))
+
+    return ranks
+
+
+def _digits(value, width):
+    digits = ""
+    for _ in range(width):
+        value, digit = divmod(value, BASE)
+        digits = DIGITS[digit] + digits
+    return digits
+
+
+def _step(rank, step):
+    """`rank` moved by `step` at its length, skipping keys ending with the lowest digit, None once out of keys"""
+    value = int(rank, BASE) + step
+    if value % BASE == 0:
+        value += step
+    if not 0 < value < BASE ** len(rank):
+        return None
+    return _digits(value, len(rank))
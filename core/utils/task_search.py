@@ -0,0 +1,69 @@
+"""
+Full-text search over tasks.
+
+Every task has a TaskSearchDocument with the text of its title and tag and of its description and active
+markdown and checklist blocks. PostgreSQL indexes it with a generated tsvector column and a GIN index,
+SQLite with an FTS5 table kept in sync by triggers (see migration 0061).
+"""
+
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+SEARCH_BLOCK_TYPES = ("MARKDOWN", "CHECKLIST")
+
+
+def block_text(block_type, content):
+    """Searchable text of a block, empty for blocks without text"""
+    if not isinstance(content, dict):
+        return ""
+
+    if block_type == "MARKDOWN":
+        return content.get("markdown") or ""
+
+    if block_type == "CHECKLIST":
+        parts = [content.get("title") or ""]
+        for element in content.get("elements") or []:
+            if isinstance(element, dict):
+                parts.extend(value for value in element.values() if isinstance(value, str))
+            elif isinstance(element, str):
+                parts.append(element)
+        return "\n".join(part for part in parts if part)
+
+    return ""
+
+
+def search_terms(value):
+    return re.findall(r"\w+", value.lower())
+
+
+def search_tasks(queryset, value):
+    """Restrict `queryset` to tasks matching every word of `value` as a prefix, best matches first"""
+    terms = search_terms(value)
+    if not terms:
+        return queryset.none()
+
+    if connection.vendor == "postgresql":
+        query = " & ".join(f"{term}:*" for term in terms)
+        matching = RawSQL(
+            "SELECT task_id FROM core_tasksearchdocument WHERE search_vector @@ to_tsquery('simple', %s)", [query]
+        )
+        rank = RawSQL(
+            "SELECT ts_rank(search_vector, to_tsquery('simple', %s)) FROM core_tasksearchdocument "
+            "WHERE task_id = core_task.id",
+            [query],
+        )
+    else:
+        query = " ".join(f'"{term}"*' for term in terms)
+        matching = RawSQL(
+            "SELECT task_id FROM core_tasksearchdocument_fts WHERE core_tasksearchdocument_fts MATCH %s", [query]
+        )
+        # bm25 is lower for better matches, title and tag weigh more than the rest
+        rank = RawSQL(
+            "SELECT -bm25(core_tasksearchdocument_fts, 0, 4.0, 1.0) FROM core_tasksearchdocument_fts "
+            "WHERE core_tasksearchdocument_fts MATCH %s AND task_id = core_task.id",
+            [query],
+        )
+
+    return queryset.filter(id__in=matching).annotate(search_rank=rank).order_by("-search_rank", "rank")
@@ -0,0 +1,78 @@
+"""
+Subtask trees (Task.parent_task) loaded with one recursive query.
+
+Every node comes with the totals of its loaded subtree (itself included): average progress, sum of
+estimated_work_hours and of logged work seconds, all computed by the database.
+"""
+
+from django.db import connection
+
+from core.models import Task
+
+SUBTREE_SQL = """
+WITH RECURSIVE tree (id, parent_task_id, depth, path) AS (
+    SELECT id, parent_task_id, 0, CAST(rank AS TEXT) FROM core_task WHERE id = %(root)s
+    UNION ALL
+    SELECT child.id, child.parent_task_id, tree.depth + 1, tree.path || '/' || child.rank
+    FROM core_task child JOIN tree ON child.parent_task_id = tree.id
+    WHERE tree.depth < %(depth)s
+),
+closure (ancestor_id, id) AS (
+    SELECT id, id FROM tree
+    UNION ALL
+    SELECT closure.ancestor_id, tree.id FROM closure JOIN tree ON tree.parent_task_id = closure.id
+),
+logged (task_id, seconds) AS (
+    SELECT task_id, SUM(total_time) FROM core_taskworksession
+    WHERE task_id IN (SELECT id FROM tree)
+    GROUP BY task_id
+),
+rollup (id, progress, estimated_work_hours, logged_seconds) AS (
+    SELECT closure.ancestor_id, AVG(node.progress), SUM(node.estimated_work_hours), COALESCE(SUM(logged.seconds), 0)
+    FROM closure
+    JOIN core_task node ON node.id = closure.id
+    LEFT JOIN logged ON logged.task_id = closure.id
+    GROUP BY closure.ancestor_id
+)
+SELECT
+    task.*,
+    tree.depth,
+    COALESCE(logged.seconds, 0) AS logged_seconds,
+    rollup.progress AS rollup_progress,
+    rollup.estimated_work_hours AS rollup_estimated_work_hours,
+    rollup.logged_seconds AS rollup_logged_seconds,
+    CASE WHEN task.owner_id = %(user)s
+        OR project.owner_id = %(user)s
+        OR EXISTS (SELECT 1 FROM core_taskaccess access WHERE access.task_id = task.id AND access.user_id = %(user)s)
+        OR EXISTS (
+            SELECT 1 FROM core_projectaccess access
+            WHERE access.project_id = task.project_id AND access.user_id = %(user)s
+        )
+    THEN 1 ELSE 0 END AS is_visible,
+    CASE WHEN tree.depth = %(depth)s AND EXISTS (SELECT 1 FROM core_task child WHERE child.parent_task_id = task.id)
+    THEN 1 ELSE 0 END AS has_more_children
+FROM tree
+JOIN core_task task ON task.id = tree.id
+LEFT JOIN core_project project ON project.id = task.project_id
+JOIN rollup ON rollup.id = tree.id
+LEFT JOIN logged ON logged.task_id = tree.id
+ORDER BY tree.path {collation}
+"""
+
+# depth first order needs "/" to sort below rank digits; locale collations
+# (PostgreSQL defaults) skip punctuation at first, so compare paths bytewise
+PATH_COLLATIONS = {"postgresql": 'COLLATE "C"', "sqlite": "COLLATE BINARY"}
+
+
+def load_subtree(root, user, depth):
+    """
+    Return `root` and its subtasks down to `depth` levels below it, depth first, as Task instances with `depth`,
+    `logged_seconds`, `rollup_*`, `is_visible` (for `user`) and `has_more_children` (subtasks beyond `depth`).
+    """
+    params = {
+        "root": Task._meta.pk.get_db_prep_value(root.pk, connection),
+        "depth": depth,
+        "user": user._meta.pk.get_db_prep_value(user.pk, connection),
+    }
+    sql = SUBTREE_SQL.format(collation=PATH_COLLATIONS.get(connection.vendor, ""))
+    return list(Task.objects.raw(sql, params))
@@ -5,3 +5,9 @@ def time_from_seconds(seconds_value):
     minutes, seconds = divmod(seconds_value, 60)
     hours, minutes = divmod(minutes, 60)
     return hours, minutes, seconds
+
+
+def format_duration(seconds_value):
+    """`HH:MM` of a number of seconds"""
+    hours, minutes, _ = time_from_seconds(seconds_value)
+    return f"{hours:02}:{minutes:02}"
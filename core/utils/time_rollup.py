@@ -0,0 +1,56 @@
+"""
+Logged work per user, task and local day.
+
+DailyTimeRollup keeps the seconds of stopped work sessions per (user, task, date) for local days of
+settings.TIME_ROLLUP_TIME_ZONE. TaskWorkSession.save, delete and `core.utils.work_sessions.stop_work` add and
+subtract the part of a session inside each day it overlaps, so reports over long ranges read one row per user,
+task and day instead of every session. `rebuild_time_rollup` recomputes it from the sessions.
+"""
+
+import datetime
+import zoneinfo
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.timezone import is_aware, make_aware
+
+
+def rollup_time_zone():
+    return zoneinfo.ZoneInfo(settings.TIME_ROLLUP_TIME_ZONE)
+
+
+def day_starts(start_date, end_date, tz):
+    """Local midnights of every day from `start_date` to `end_date` and of the day after"""
+    days = (end_date - start_date).days + 2
+    return [
+        datetime.datetime.combine(start_date + datetime.timedelta(days=day), datetime.time(), tzinfo=tz)
+        for day in range(days)
+    ]
+
+
+def split_by_day(started_at, stopped_at, tz):
+    """`[(date, seconds)]` of the local days of `tz` overlapped by [started_at, stopped_at)"""
+    if started_at is None or stopped_at is None:
+        return []
+
+    # naive values are in the default timezone, as Django stores them
+    started_at, stopped_at = (value if is_aware(value) else make_aware(value) for value in (started_at, stopped_at))
+    if stopped_at <= started_at:
+        return []
+
+    bounds = day_starts(started_at.astimezone(tz).date(), stopped_at.astimezone(tz).date(), tz)
+    parts = []
+    for start, end in zip(bounds, bounds[1:]):
+        seconds = int((min(stopped_at, end) - max(started_at, start)).total_seconds())
+        if seconds > 0:
+            parts.append((start.date(), seconds))
+    return parts
+
+
+def daily_totals(sessions, tz):
+    """`{(user id, task id, date): seconds}` of `(user id, task id, started_at, stopped_at)` tuples"""
+    totals = defaultdict(int)
+    for user_id, task_id, started_at, stopped_at in sessions:
+        for date, seconds in split_by_day(started_at, stopped_at, tz):
+            totals[user_id, task_id, date] += seconds
+    return totals
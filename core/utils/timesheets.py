@@ -0,0 +1,75 @@
+"""
+Timesheet exports: work sessions with their user, task and project as CSV or XLSX.
+
+Rows are read with `iterator()` (a server-side cursor on PostgreSQL) and written as they come, so exports of any
+length are streamed in constant memory.
+"""
+
+import csv
+import datetime
+import uuid
+
+from django.utils.timezone import localtime
+
+from core.utils.xlsx import CONTENT_TYPE as XLSX_CONTENT_TYPE
+from core.utils.xlsx import xlsx_chunks
+
+CHUNK_SIZE = 2000
+
+FIELDS = (
+    "id",
+    "user__username",
+    "task_id",
+    "task__title",
+    "task__project__title",
+    "started_at",
+    "stopped_at",
+    "total_time",
+    "message",
+)
+HEADER = ("session", "user", "task_id", "task", "project", "started_at", "stopped_at", "total_time", "message")
+
+FORMATS = {
+    "csv": "text/csv",
+    "xlsx": XLSX_CONTENT_TYPE,
+}
+
+
+class _Echo:
+    """File-like object handing back what csv.writer writes"""
+
+    def write(self, value):
+        return value
+
+
+def format_value(value):
+    if isinstance(value, datetime.datetime):
+        return localtime(value).strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def timesheet_rows(sessions):
+    """Export rows of the `sessions` queryset"""
+    rows = sessions.order_by("started_at", "id").values_list(*FIELDS)
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        yield tuple(format_value(value) for value in row)
+
+
+def csv_chunks(rows, rows_per_chunk=500):
+    writer = csv.writer(_Echo())
+    chunk = [writer.writerow(HEADER)]
+    for row in rows:
+        chunk.append(writer.writerow(row))
+        if len(chunk) >= rows_per_chunk:
+            yield "".join(chunk)
+            chunk = []
+    yield "".join(chunk)
+
+
+def timesheet_chunks(sessions, file_format):
+    """Chunks of the export of `sessions` in `file_format` (a key of FORMATS)"""
+    if file_format == "xlsx":
+        return xlsx_chunks(HEADER, timesheet_rows(sessions), sheet_name="Timesheet")
+    return csv_chunks(timesheet_rows(sessions))
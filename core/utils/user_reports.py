@@ -0,0 +1,44 @@
+"""
+Activity report emails of users, see the send_user_report command.
+
+Logged work of any number of users is read from DailyTimeRollup with one query, rendering only needs the gathered
+data, so reports can be rendered in worker threads without touching the database.
+"""
+
+from collections import defaultdict
+
+from django.db.models import F, Sum
+from django.template.loader import render_to_string
+
+from core.models import DailyTimeRollup
+
+
+def report_days(user_ids, start_date, end_date):
+    """`{user id: {date: {"entries": [...], "total": seconds}}}` of logged work per task and day"""
+    rollups = DailyTimeRollup.objects.filter(user__in=user_ids, date__range=(start_date, end_date)).exclude(seconds=0)
+    rollups = rollups.values("user", "date", "task").annotate(
+        task_name=F("task__title"), project_name=F("project__title"), total_time=Sum("seconds")
+    )
+
+    days = {user_id: defaultdict(lambda: {"entries": [], "total": 0}) for user_id in user_ids}
+    for entry in rollups.order_by("user", "date", "task_name"):
+        day = days[entry["user"]][entry["date"]]
+        day["entries"].append(entry)
+        day["total"] += entry["total_time"]
+
+    return {user_id: dict(user_days) for user_id, user_days in days.items()}
+
+
+def render_report(user, start_date, end_date, sessions_by_day):
+    """Subject and HTML body of the report"""
+    message_content_html = render_to_string(
+        "user_report.html",
+        {
+            "total_time_sum": sum(day_data["total"] for day_data in sessions_by_day.values()),
+            "user": user,
+            "start_date": start_date,
+            "end_date": end_date,
+            "sessions_by_day": sessions_by_day,
+        },
+    )
+    return f"User report: {user.username}:{start_date}-{end_date}", message_content_html
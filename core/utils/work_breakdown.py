@@ -0,0 +1,98 @@
+"""
+Work session totals per day and per task, computed by the database.
+
+Days are local to the requested timezone. A session is counted into every day it overlaps with only the part
+inside that day, so sessions crossing midnight are split. Sessions still running count up to now.
+
+For the timezone of the daily rollup (see core.utils.time_rollup) stopped sessions are read from DailyTimeRollup,
+other timezones sum the sessions themselves.
+"""
+
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Case, DateTimeField, DurationField, F, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils.timezone import now
+
+from core.models import DailyTimeRollup, TaskWorkSession
+from core.utils.time_rollup import day_starts, split_by_day
+
+MAX_DAYS = 366
+
+
+def overlap(start, end):
+    """Duration of the annotated session (`session_start`, `session_end`) inside [start, end), NULL outside"""
+    start, end = Value(start, output_field=DateTimeField()), Value(end, output_field=DateTimeField())
+    return Case(
+        When(
+            session_start__lt=end,
+            session_end__gt=start,
+            then=Least(F("session_end"), end) - Greatest(F("session_start"), start),
+        ),
+        output_field=DurationField(),
+    )
+
+
+def overlapping_sessions(user_ids, start_date, end_date, tz):
+    """Sessions of `user_ids` overlapping the local days from `start_date` to `end_date`"""
+    bounds = day_starts(start_date, end_date, tz)
+    return (
+        TaskWorkSession.objects.filter(user__in=user_ids)
+        .annotate(
+            session_start=F("started_at"),
+            session_end=Coalesce("stopped_at", Value(now(), output_field=DateTimeField())),
+        )
+        .filter(session_start__lt=bounds[-1], session_end__gt=bounds[0])
+    )
+
+
+def seconds(duration):
+    return int(duration.total_seconds()) if duration else 0
+
+
+def breakdown(user_ids, start_date, end_date, tz):
+    """
+    Return `{user id: {"days": {date: seconds}, "tasks": {task title: seconds}}}` with one query for the days
+    (a conditional sum per day) and one for the tasks.
+    """
+    if getattr(tz, "key", None) == settings.TIME_ROLLUP_TIME_ZONE:
+        return rollup_breakdown(user_ids, start_date, end_date, tz)
+
+    bounds = day_starts(start_date, end_date, tz)
+    sessions = overlapping_sessions(user_ids, start_date, end_date, tz).order_by()
+
+    day_sums = {f"day_{index}": Sum(overlap(start, end)) for index, (start, end) in enumerate(zip(bounds, bounds[1:]))}
+    result = {user_id: {"days": {}, "tasks": defaultdict(int)} for user_id in user_ids}
+    for row in sessions.values("user").annotate(**day_sums):
+        result[row["user"]]["days"] = {
+            (start_date + datetime.timedelta(days=index)).isoformat(): seconds(row[f"day_{index}"])
+            for index in range(len(bounds) - 1)
+            if row[f"day_{index}"]
+        }
+
+    task_totals = sessions.values("user", "task", "task__title").annotate(total=Sum(overlap(bounds[0], bounds[-1])))
+    for row in task_totals:
+        result[row["user"]]["tasks"][row["task__title"]] += seconds(row["total"])
+
+    return result
+
+
+def rollup_breakdown(user_ids, start_date, end_date, tz):
+    """`breakdown` from the daily rollup of `tz` plus the sessions still running"""
+    result = {user_id: {"days": defaultdict(int), "tasks": defaultdict(int)} for user_id in user_ids}
+    rows = DailyTimeRollup.objects.filter(user__in=user_ids, date__range=(start_date, end_date)).order_by()
+    for row in rows.values("user", "date").annotate(total=Sum("seconds")).filter(total__gt=0):
+        result[row["user"]]["days"][row["date"].isoformat()] += row["total"]
+    for row in rows.values("user", "task", "task__title").annotate(total=Sum("seconds")).filter(total__gt=0):
+        result[row["user"]]["tasks"][row["task__title"]] += row["total"]
+
+    running = TaskWorkSession.objects.filter(user__in=user_ids, stopped_at__isnull=True)
+    for user_id, task_title, started_at in running.values_list("user", "task__title", "started_at"):
+        for date, seconds in split_by_day(started_at, now(), tz):
+            if start_date <= date <= end_date:
+                result[user_id]["days"][date.isoformat()] += seconds
+                result[user_id]["tasks"][task_title] += seconds
+
+    return result
@@ -0,0 +1,120 @@
+"""
+Starting and stopping work on tasks.
+
+A user has at most one open TaskWorkSession (stopped_at is NULL), enforced by a partial unique index which also
+makes finding it a single index lookup. Stopping is a conditional UPDATE, so of two concurrent stops only one
+counts the session into the logged totals and the daily rollup. The open session is cached per user for the views
+polling it.
+"""
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import BigIntegerField, Case, F, Value, When
+from django.utils.timezone import now
+
+from core.models import DailyTimeRollup, Project, Task, TaskWorkSession
+
+
+def stop_work(user, task=None, stopped_at=None):
+    """Stop the open session of `user` (only if it's on `task` when given), return it or None if none was stopped"""
+    sessions = TaskWorkSession.objects.filter(user=user, stopped_at__isnull=True)
+    if task is not None:
+        sessions = sessions.filter(task=task)
+
+    session = sessions.select_related("task").first()
+    if session is None:
+        return None
+
+    previous_time = session.total_time
+    session.stopped_at = max(stopped_at or now(), session.started_at)
+    session.total_time = int((session.stopped_at - session.started_at).total_seconds())
+    with transaction.atomic():
+        stopped = TaskWorkSession.objects.filter(pk=session.pk, stopped_at__isnull=True).update(
+            stopped_at=session.stopped_at, total_time=session.total_time
+        )
+        if not stopped:
+            return None
+
+        TaskWorkSession.add_logged_seconds(session.task_id, session.total_time - previous_time)
+        DailyTimeRollup.add_session(user.id, session.task_id, session.started_at, session.stopped_at)
+
+    TaskWorkSession.forget_active(user.id)
+    return session
+
+
+def stop_work_for_users(user_ids, stopped_at=None):
+    """
+    Stop the open sessions of `user_ids` with a few statements for all of them, return the stopped sessions.
+    The sessions are locked first, so a concurrent stop_work of one of them waits and then finds it stopped.
+    """
+    stopped_at = stopped_at or now()
+    with transaction.atomic():
+        sessions = list(
+            TaskWorkSession.objects.select_for_update(of=("self",))
+            .filter(user__in=user_ids, stopped_at__isnull=True)
+            .select_related("task", "user")
+        )
+        if not sessions:
+            return []
+
+        task_seconds, project_seconds = defaultdict(int), defaultdict(int)
+        for session in sessions:
+            previous_time = session.total_time
+            session.stopped_at = max(stopped_at, session.started_at)
+            session.total_time = int((session.stopped_at - session.started_at).total_seconds())
+            if session.task_id:
+                task_seconds[session.task_id] += session.total_time - previous_time
+                if session.task.project_id:
+                    project_seconds[session.task.project_id] += session.total_time - previous_time
+
+        TaskWorkSession.objects.bulk_update(sessions, ["stopped_at", "total_time"])
+        add_logged_seconds(Task, task_seconds)
+        add_logged_seconds(Project, project_seconds)
+        for session in sessions:
+            DailyTimeRollup.add_session(session.user_id, session.task_id, session.started_at, session.stopped_at)
+
+    for session in sessions:
+        TaskWorkSession.forget_active(session.user_id)
+    return sessions
+
+
+def add_logged_seconds(model, seconds_by_pk):
+    """Add seconds to logged_seconds of tasks or projects, one UPDATE for all of them"""
+    seconds_by_pk = {pk: seconds for pk, seconds in seconds_by_pk.items() if seconds}
+    if not seconds_by_pk:
+        return
+
+    delta = Case(
+        *[When(pk=pk, then=Value(seconds)) for pk, seconds in seconds_by_pk.items()],
+        default=Value(0),
+        output_field=BigIntegerField(),
+    )
+    model.objects.filter(pk__in=seconds_by_pk).update(logged_seconds=F("logged_seconds") + delta)
+
+
+def start_work(user, task):
+    """Stop the open session of `user` and open a new one on `task`"""
+    with transaction.atomic():
+        stop_work(user)
+        try:
+            with transaction.atomic():
+                return TaskWorkSession.objects.create(task=task, user=user, started_at=now())
+        except IntegrityError:
+            # a concurrent start opened another session in the meantime
+            stop_work(user)
+            return TaskWorkSession.objects.create(task=task, user=user, started_at=now())
+
+
+def active_session(user):
+    """`(session id, task id)` of the open session of `user` or None, cached"""
+    key = TaskWorkSession.ACTIVE_CACHE_KEY.format(user.id)
+    active = cache.get(key)
+    if active is None:
+        active = TaskWorkSession.objects.filter(user=user, stopped_at__isnull=True).values_list("id", "task").first()
+        active = active or ()
+        cache.set(key, active, settings.ACTIVE_WORK_SESSION_CACHE_TIMEOUT)
+
+    return active or None
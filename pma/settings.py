@@ -61,6 +61,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "simple_history.middleware.HistoryRequestMiddleware",  # automatically track user for history
+    "core.middleware.LogBufferMiddleware",
     "silk.middleware.SilkyMiddleware",
 ]
 
@@ -100,6 +101,9 @@ DATABASES = {
     ),
 }
 
+# Has to be shared by all workers in production (e.g. redis://...), the local memory cache is per process
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -268,6 +272,28 @@ CREATE_BEACONS_INTERVAL_TIME_MIN = env.int("CREATE_BEACONS_INTERVAL_TIME_MIN", d
 CREATE_BEACONS_INTERVAL_TIME_MAX = env.int("CREATE_BEACONS_INTERVAL_TIME_MAX", default=60)
 CREATE_BEACONS_ALLOWED_CLICK_TIME = env.int("CREATE_BEACONS_ALLOWED_CLICK_TIME", default=60)
 
+# Write buffered request logs from a background thread instead of at the end of the request
+LOG_BUFFER_ASYNC = env.bool("LOG_BUFFER_ASYNC", default=False)
+# Months of logs kept in the main table on databases without native partitioning (older go to LogArchive)
+LOG_HOT_MONTHS = env.int("LOG_HOT_MONTHS", default=12)
+
+# Task ranks longer than this get rewritten by the rebalance_task_ranks command
+TASK_RANK_MAX_LENGTH = env.int("TASK_RANK_MAX_LENGTH", default=32)
+
+# Edits of one block by the same user less than this many seconds apart are merged into one revision
+TASK_BLOCK_REVISION_WINDOW = env.int("TASK_BLOCK_REVISION_WINDOW", default=120)
+# Every n-th block revision stores full content, the rest store deltas
+TASK_BLOCK_KEYFRAME_INTERVAL = env.int("TASK_BLOCK_KEYFRAME_INTERVAL", default=20)
+
+# Deepest level of subtasks returned by the task subtree endpoint
+TASK_SUBTREE_MAX_DEPTH = env.int("TASK_SUBTREE_MAX_DEPTH", default=20)
+
+# Seconds the open work session of a user is cached for the current task and side app views
+ACTIVE_WORK_SESSION_CACHE_TIMEOUT = env.int("ACTIVE_WORK_SESSION_CACHE_TIMEOUT", default=300)
+
+# Timezone of the local days logged work is rolled up into, changing it requires the rebuild_time_rollup command
+TIME_ROLLUP_TIME_ZONE = env.str("TIME_ROLLUP_TIME_ZONE", default=TIME_ZONE)
+
 
 # SILK config
 SILKY_AUTHENTICATION = True